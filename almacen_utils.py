@@ -0,0 +1,95 @@
+"""
+Tablas Parquet derivadas de archivos descargados (PIBE, DataTur, ITER...).
+
+Cada módulo de datos solo sabe interpretar su fuente; el ciclo de vida del
+almacén es el mismo para todos y vive aquí:
+
+- `construir(destino, armar, origen)`: bajo `candados_utils.candado`, obtiene
+  el archivo fuente con `origen()` y reescribe `destino` con `armar(fuente)`
+  solo si falta o la fuente es más nueva. Sin red se sirve la tabla que haya.
+- `escribir_atomico` / `guardar_parquet`: escritura a un temporal y
+  `os.replace`, así nadie lee una tabla a medias.
+- `cargar_parquet(ruta)`: un solo DataFrame por archivo en el proceso,
+  releído cuando cambian su mtime o tamaño.
+"""
+import os
+import threading
+
+import pandas as pd
+
+import candados_utils
+
+_LOCK = threading.Lock()
+_CACHE_DF = {}  # ruta parquet -> ((mtime_ns, size), DataFrame)
+
+
+# ==========================================
+# ESCRITURA
+# ==========================================
+def escribir_atomico(destino, escribir):
+    """Llama `escribir(tmp)` y mueve el temporal a `destino`; si falla, el temporal se borra."""
+    tmp = destino.with_name(f"{destino.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        escribir(tmp)
+        os.replace(tmp, destino)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return destino
+
+
+def guardar_parquet(df: pd.DataFrame, destino):
+    return escribir_atomico(destino, lambda tmp: df.to_parquet(tmp, index=False))
+
+
+def construir(destino, armar, origen=None, forzar: bool = False):
+    """Genera la tabla `destino` con `armar(fuente)` y devuelve su ruta.
+
+    `origen()` devuelve la ruta del archivo fuente (normalmente con
+    descargas_utils, que ya aplica TTL y revalidación); la tabla se rehace
+    cuando la fuente es más nueva. Si `origen()` falla y ya hay tabla, se
+    devuelve la que hay. Sin `origen`, la tabla se arma solo si falta
+    (`armar(None)` se encarga de conseguir sus datos).
+    """
+    if origen is None and not forzar and destino.exists():
+        return destino
+    with candados_utils.candado(str(destino)):
+        fuente = None
+        if origen is not None:
+            try:
+                fuente = origen()
+            except Exception:
+                # Sin red: si ya hay tabla se sirve la que hay
+                if destino.exists():
+                    return destino
+                raise
+        if destino.exists() and not forzar and (
+                fuente is None or destino.stat().st_mtime >= fuente.stat().st_mtime):
+            return destino
+        guardar_parquet(armar(fuente), destino)
+    return destino
+
+
+# ==========================================
+# LECTURA
+# ==========================================
+def cargar_parquet(ruta, leer=pd.read_parquet) -> pd.DataFrame:
+    """DataFrame de `ruta` compartido dentro del proceso (no modificarlo en sitio).
+
+    `leer(ruta)` solo corre cuando el archivo cambió; las lecturas
+    simultáneas del mismo archivo comparten una sola.
+    """
+    st_ = ruta.stat()
+    firma = (st_.st_mtime_ns, st_.st_size)
+    with _LOCK:
+        entrada = _CACHE_DF.get(str(ruta))
+    if entrada is not None and entrada[0] == firma:
+        return entrada[1]
+
+    def _leer():
+        df = leer(ruta)
+        with _LOCK:
+            _CACHE_DF[str(ruta)] = (firma, df)
+        return df
+
+    return candados_utils.unico(f"{ruta}:{firma}", _leer)
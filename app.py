@@ -6,13 +6,10 @@ import pandas as pd
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
-import json
-import io
 import sys
-import requests
-import zipfile
 import shutil
 import os
+import time
 from PIL import Image
 
 # Importamos el módulo personalizado
@@ -22,6 +19,15 @@ try:
 except ImportError:
     pass 
 
+import notebook_utils
+import busqueda_utils
+import descargas_utils
+import artefactos_utils
+import ejecutor_utils
+import cache_utils
+import cache_compartida_utils
+import graficas_utils
+
 sys.path.append(".") 
 
 # ---------------------------
@@ -88,110 +94,15 @@ if not check_password():
 OPCION_DEFAULT = "--- Selecciona un indicador ---"
 
 # ---------------------------
-# CONSTANTES GEOGRÁFICAS
-# ---------------------------
-ESTADOS_MEXICANOS = [
-    "Aguascalientes", "Baja California", "Baja California Sur", "Campeche",
-    "Chiapas", "Chihuahua", "Ciudad de México", "Coahuila", "Colima",
-    "Durango", "Guanajuato", "Guerrero", "Hidalgo", "Jalisco",
-    "México", "Michoacán", "Morelos", "Nayarit", "Nuevo León",
-    "Oaxaca", "Puebla", "Querétaro", "Quintana Roo", "San Luis Potosí",
-    "Sinaloa", "Sonora", "Tabasco", "Tamaulipas", "Tlaxcala",
-    "Veracruz", "Yucatán", "Zacatecas"
-]
-
-# ---------------------------
-# CONSTANTES Y RUTAS: NIVEL PAÍS
-# ---------------------------
-OPCIONES_PAIS_ORDENADAS = [
-    "PIB nacional",
-    "Inflación nacional",
-    "Crecimiento poblacional nacional",
-    "Distribución de la población por edad",
-    "Distribución de la población por sexo",
-    "Población económicamente activa",
-    "Población por sector de actividad económica",
-    "PIB histórico total y per cápita",
-    "Proyección del PIB total y per cápita",
-    "Inflación histórica",
-    "Tasa cambiaria histórica",
-    "Flujo de inversión extranjera para un Estado",
-    "Anuncio de inversión por país",
-    "Ranking mundial de países por ingreso de divisas",
-    "Histórico de llegadas y salidas de turistas",
-    "Entradas aereas de turistas",
-    "Actividad hotelera",
-    "Conectividad aérea (Vuelos nacionales)",
-    "Conectividad aérea (Vuelos internacionales)"
-]
-
-RUTAS_PAIS = {
-    "PIB nacional": "pib_nacional.ipynb",
-    "Inflación nacional": "inflacion_nacional.ipynb",
-    "Crecimiento poblacional nacional": "crecimiento_poblacional_nacional.ipynb",
-    "Distribución de la población por edad": "pob_distribucion_edad.ipynb",
-    "Distribución de la población por sexo": "pob_distribucion_sexo.ipynb",
-    "Población económicamente activa": "pob_economicamente_activa.ipynb",
-    "Población por sector de actividad económica": "pob_sector_actividad.ipynb",
-    "PIB histórico total y per cápita": "pib_historico_percapita.ipynb",
-    "Proyección del PIB total y per cápita": "pib_proyeccion.ipynb",
-    "Inflación histórica": "inflacion_historica.ipynb",
-    "Tasa cambiaria histórica": "tasa_cambiaria.ipynb",
-    "Flujo de inversión extranjera para un Estado": "inversion_extranjera_ied.ipynb",
-    "Anuncio de inversión por país": "inversion_anuncios_pais.ipynb",
-    "Ranking mundial de países por ingreso de divisas": "turismo_ranking_divisas.ipynb",
-    "Histórico de llegadas y salidas de turistas": "turismo_historico_flujos.ipynb",
-    "Entradas aereas de turistas": "turismo_entradas_aereas.ipynb",
-    "Actividad hotelera": "turismo_actividad_hotelera.ipynb",
-    "Conectividad aérea (Vuelos nacionales)": "conectividad_aerea_nacionales.ipynb",
-    "Conectividad aérea (Vuelos internacionales)": "conectividad_aerea_internacionales.ipynb"
-}
-
+# CONSTANTES GEOGRÁFICAS Y CATÁLOGO DE REPORTES
 # ---------------------------
-# CONSTANTES Y RUTAS: NIVEL ESTADO
-# ---------------------------
-OPCIONES_ESTADO_ORDENADAS = [
-    "Población y PIB",
-    "Crecimiento histórico poblacional",
-    "Proyección poblacional",
-    "PIB por sectores",
-    "Anuncios de inversión por industria",
-    "Llegada de turistas (Histórico) y ocupación de alojamiento",
-    "Conecctividad terrestre"
-]
-
-RUTAS_ESTADO = {
-    "Población y PIB": "estado_poblacion_pib.ipynb",
-    "Crecimiento histórico poblacional": "estado_crecimiento_hist.ipynb",
-    "Proyección poblacional": "estado_proyeccion.ipynb",
-    "PIB por sectores": "estado_pib_sectores.ipynb",
-    "Anuncios de inversión por industria": "estado_inversion_anuncios.ipynb",
-    "Llegada de turistas (Histórico) y ocupación de alojamiento": "estado_turismo_llegadas.ipynb",
-    "Conecctividad terrestre": "estado_conectividad.ipynb"
-}
-
-# ---------------------------
-# CONSTANTES Y RUTAS: NIVEL MUNICIPIO Y LOCALIDAD
-# ---------------------------
-OPCIONES_MUNICIPIOS_ORDENADAS = [
-    "Distribución de la población",
-    "Proyección de la población"
-]
-
-RUTAS_MUNICIPIO = {
-    "Distribución de la población": "municipio_distribucion_pob.ipynb",
-    "Proyección de la población": "municipio_proyeccion_pob.ipynb"
-}
-
-OPCIONES_LOCALIDADES_ORDENADAS = [
-    "Distribución de la población",
-    "Crecimiento histórico de la población"
-]
-
-RUTAS_LOCALIDAD = {
-    "Distribución de la población": "localidad_distribucion_pob.ipynb",
-    "Crecimiento histórico de la población": "localidad_crecimiento_hist.ipynb"
-}
+from catalogo_utils import (
+    ESTADOS_MEXICANOS,
+    OPCIONES_PAIS_ORDENADAS, RUTAS_PAIS,
+    OPCIONES_ESTADO_ORDENADAS, RUTAS_ESTADO,
+    OPCIONES_MUNICIPIOS_ORDENADAS, RUTAS_MUNICIPIO,
+    OPCIONES_LOCALIDADES_ORDENADAS, RUTAS_LOCALIDAD,
+)
 
 # ---------------------------
 # CONFIGURACIÓN DE RUTAS Y ESTILOS
@@ -206,6 +117,9 @@ BASE_DIR = Path(__file__).parent.resolve()
 # 2. Construimos las rutas a las carpetas 'recursos' y 'scripts'
 RECURSOS_DIR = BASE_DIR / "recursos"
 NOTEBOOK_DIR = BASE_DIR / "scripts"
+# Los notebooks pueden importar los módulos .py de scripts/ (p. ej. turismo_backend)
+if str(NOTEBOOK_DIR) not in sys.path:
+    sys.path.append(str(NOTEBOOK_DIR))
 
 # 3. Definimos los archivos específicos
 # Usamos .resolve() para evitar ambigüedades en Linux
@@ -312,64 +226,112 @@ def execute_notebook_content(notebook_path: str, context: dict = None):
     if not p.exists():
         return False
 
-    # 1. Leer contenido
-    if p.suffix == '.ipynb':
-        try:
-            with p.open('r', encoding='utf-8') as f:
-                notebook = json.load(f)
-            code_to_execute = "".join(
-                "".join(cell.get('source', [])) + "\n\n"
-                for cell in notebook.get('cells', []) if cell.get('cell_type') == 'code'
-            )
-        except Exception as e:
-            st.error(f"Error al leer JSON: {e}")
-            return True
-    elif p.suffix == '.py':
-        code_to_execute = p.read_text(encoding='utf-8')
-    else:
+    # 1. Obtener código compilado (caché por proceso: solo se relee y
+    #    recompila cuando cambia el mtime/tamaño del archivo)
+    if p.suffix not in ('.ipynb', '.py'):
         st.error(f"Formato no soportado: {p.suffix}")
         return True
+    try:
+        code_to_execute = notebook_utils.obtener_codigo_compilado(p)
+    except SyntaxError as syn_e:
+        st.error(f"❌ Error de Ejecución en el Notebook: {type(syn_e).__name__}")
+        st.code(f"{syn_e}", language='python')
+        return True
+    except Exception as e:
+        st.error(f"Error al leer JSON: {e}")
+        return True
 
     # 2. Preparar entorno
-    original_stdout = sys.stdout
-    original_stdin = sys.stdin
+    execution_context = globals().copy()
+    if context:
+        execution_context.update(context)
+    notebook_inputs = execution_context.pop("NOTEBOOK_INPUTS", None)
 
-    try:
-        sys.stdout = capture = io.StringIO()
-        execution_context = globals().copy()
-        if context:
-            execution_context.update(context)
-
-        # 3. Simular Inputs (sys.stdin)
-        notebook_inputs = execution_context.pop("NOTEBOOK_INPUTS", None)
-        if notebook_inputs:
-            if isinstance(notebook_inputs, list):
-                input_string = "\n".join(str(x) for x in notebook_inputs) + "\n"
-            elif isinstance(notebook_inputs, (str, int, float)):
-                input_string = str(notebook_inputs) + "\n"
-            else:
-                input_string = ""
-            sys.stdin = io.StringIO(input_string)
-
-        # 4. Ejecutar
-        exec(code_to_execute, execution_context)
-
-        # 5. Restaurar y Mostrar Salida
-        sys.stdout = original_stdout
-        sys.stdin = original_stdin
-
-        console_output = capture.getvalue().strip()
-        if console_output:
-             st.text(console_output)
+    # 3. Ejecutar en un hilo aislado (stdout/stdin propios, tiempo máximo y
+    #    cancelación si el usuario cambia la selección mientras corre)
+    aviso = st.empty()
 
-        return True
+    def _latido(segundos):
+        if segundos >= 2:
+            aviso.caption(f"⏳ Ejecutando… {segundos:.0f} s")
 
+    t_exec = time.perf_counter()
+    try:
+        console_output = ejecutor_utils.ejecutar_en_hilo(
+            code_to_execute, execution_context, notebook_inputs, latido=_latido
+        ).strip()
+    except (ejecutor_utils.TiempoAgotado, ejecutor_utils.MemoriaExcedida) as exec_e:
+        aviso.empty()
+        st.error(f"⏱️ {exec_e}. Intenta de nuevo más tarde.")
+        return True
     except Exception as exec_e:
-        sys.stdout = original_stdout
-        sys.stdin = original_stdin
+        aviso.empty()
         st.error(f"❌ Error de Ejecución en el Notebook: {type(exec_e).__name__}")
         st.code(f"{exec_e}", language='python')
         return True
+    finally:
+        notebook_utils.registrar_tiempo(p, "exec", time.perf_counter() - t_exec)
+
+    # 4. Mostrar salida
+    aviso.empty()
+    if console_output:
+        st.text(console_output)
+    return True
+
+# ---------------------------
+# EJECUCIÓN PEREZOSA DE SECCIONES
+# ---------------------------
+# Streamlit ejecuta el cuerpo de todas las pestañas en cada rerun. Cada
+# sección (país, estado, municipio, localidad) se declara como fragmento:
+# al mover un control de una sección solo esa sección vuelve a correr su
+# notebook y las demás conservan en pantalla su última salida. Cambiar la
+# paleta o la fuente (fuera de las secciones) sí recalcula todo.
+# AEDM_EJECUCION_PEREZOSA=0 regresa al comportamiento anterior.
+EJECUCION_PEREZOSA = os.environ.get("AEDM_EJECUCION_PEREZOSA", "1") != "0"
+_FRAGMENTO = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+def seccion_perezosa(func):
+    if EJECUCION_PEREZOSA and _FRAGMENTO is not None:
+        return _FRAGMENTO(func)
+    return func
+
+# ---------------------------
+# SUGERENCIAS DE BÚSQUEDA (MUNICIPIO / LOCALIDAD)
+# ---------------------------
+SUGERENCIA_DEFAULT = "--- Sugerencias ---"
+
+def _aplicar_sugerencia(key_sel: str, key_input: str):
+    valor = st.session_state.get(key_sel)
+    if valor and valor != SUGERENCIA_DEFAULT:
+        st.session_state[key_input] = valor
+
+def mostrar_sugerencias(nivel: str, texto: str, key_input: str):
+    """Muestra nombres sugeridos (índice del Censo 2020) bajo la caja de texto."""
+    if not texto:
+        return
+    try:
+        sugerencias = busqueda_utils.sugerir(nivel, texto)
+    except Exception as e:
+        print(f"--> Sugerencias no disponibles ({nivel}): {e}")
+        return
+    # Si lo escrito ya coincide exactamente, no estorbamos
+    if not sugerencias or sugerencias[0]["tipo"] == "exacta":
+        return
+
+    etiquetas = {SUGERENCIA_DEFAULT: SUGERENCIA_DEFAULT}
+    for sug in sugerencias:
+        extra = sug["etiqueta"] if sug["n"] == 1 else f"{sug['n']} coincidencias"
+        etiquetas.setdefault(sug["nombre"], f"{sug['nombre']} ({extra})")
+
+    key_sel = f"sug_{key_input}"
+    st.selectbox(
+        "¿Quisiste decir?",
+        list(etiquetas),
+        format_func=etiquetas.get,
+        key=key_sel,
+        on_change=_aplicar_sugerencia,
+        args=(key_sel, key_input),
+    )
 
 # ---------------------------
 # UTILIDAD GRÁFICA DUMMY
@@ -526,7 +488,8 @@ tab1, tab2, tab3 = st.tabs([
 # -------------------------------------------------------
 # TAB 1: PAIS
 # -------------------------------------------------------
-with tab1:
+@seccion_perezosa
+def seccion_pais(active_palette, active_font):
     st.subheader("Indicadores Nacionales")
 
     lista_pais = [OPCION_DEFAULT] + OPCIONES_PAIS_ORDENADAS
@@ -556,10 +519,15 @@ with tab1:
             display_dummy_graph(active_font, active_palette, title=ind_pais)
 
 
+with tab1:
+    seccion_pais(active_palette, active_font)
+
+
 # -------------------------------------------------------
 # TAB 2: ESTADO
 # -------------------------------------------------------
-with tab2:
+@seccion_perezosa
+def seccion_estado(active_palette, active_font):
     st.subheader("Datos a nivel Estado")
 
     st.markdown("""
@@ -607,21 +575,18 @@ with tab2:
                     with st.spinner("Descargando ZIP y extrayendo Excel..."):
                         try:
                             url = "https://datatur.sectur.gob.mx/Documentos%20compartidos/CETM2023.zip"
-                            r = requests.get(url)
-                            r.raise_for_status()
-                            
-                            zip_in_memory = zipfile.ZipFile(io.BytesIO(r.content))
-                            
-                            target_file = None
-                            for filename in zip_in_memory.namelist():
-                                if ("6.2" in filename or "6_2" in filename) and filename.endswith((".xlsx", ".xls")):
-                                    target_file = filename
-                                    break
+                            # Descarga por bloques a disco (reanudable) y extracción
+                            # de un solo miembro: el ZIP nunca se carga en memoria.
+                            excel_path = descargas_utils.obtener_miembro_zip(
+                                url,
+                                lambda n: ("6.2" in n or "6_2" in n) and n.endswith((".xlsx", ".xls"))
+                            )
                             
-                            if target_file:
-                                excel_bytes = zip_in_memory.read(target_file)
-                                st.session_state['ready_to_download'] = excel_bytes
-                                st.session_state['filename'] = os.path.basename(target_file)
+                            if excel_path:
+                                # La sesión solo guarda el handle (sha256) del archivo;
+                                # el contenido vive una sola vez en el almacén compartido.
+                                st.session_state['ready_to_download'] = artefactos_utils.guardar_archivo(excel_path)
+                                st.session_state['filename'] = excel_path.name
                                 
                                 st.success("✅ Archivo encontrado y listo.")
                                 st.rerun() 
@@ -631,10 +596,18 @@ with tab2:
                         except Exception as e:
                             st.error(f"Error de conexión o procesamiento: {e}")
 
+                excel_listo = None
                 if st.session_state.get('ready_to_download') is not None and st.session_state.get('filename'):
+                    excel_listo = artefactos_utils.leer(st.session_state['ready_to_download'])
+                    if excel_listo is None:
+                        # El archivo fue desalojado por el presupuesto del almacén
+                        st.session_state['ready_to_download'] = None
+                        st.info("El archivo preparado expiró; vuelve a buscarlo.")
+
+                if excel_listo is not None:
                     st.download_button(
                         label=f"⬇️ Descargar {st.session_state['filename']}",
-                        data=st.session_state['ready_to_download'],
+                        data=excel_listo,
                         file_name=st.session_state['filename'],
                         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                         use_container_width=True
@@ -654,10 +627,12 @@ with tab2:
             with col_viz:
                 if uploaded_file is not None:
                     try:
-                        xls = pd.ExcelFile(uploaded_file)
+                        # Se parsea una sola vez por archivo (llave: hash del contenido);
+                        # cambiar de estado solo consulta el índice del libro.
+                        libro = turismo_utils.cargar_libro(uploaded_file)
                         
-                        df_hist = turismo_utils.get_data_historico(xls, edo_sel)
-                        data_men = turismo_utils.get_data_mensual(xls, edo_sel)
+                        df_hist = turismo_utils.get_data_historico(libro, edo_sel)
+                        data_men = turismo_utils.get_data_mensual(libro, edo_sel)
                         
                         if df_hist is None and data_men is None:
                             st.warning(f"⚠️ No se encontraron datos válidos para **{edo_sel}**.")
@@ -700,74 +675,150 @@ with tab2:
             if not ejecutado_edo:
                 display_dummy_graph(active_font, active_palette, title=f"{ind_edo} - {edo_sel}")
 
+
+with tab2:
+    seccion_estado(active_palette, active_font)
+
+
 # -------------------------------------------------------
 # TAB 3: MUNICIPIO Y LOCALIDAD
 # -------------------------------------------------------
-with tab3:
-    col_mun, col_loc = st.columns(2, gap="medium")
+@seccion_perezosa
+def seccion_municipio(active_palette, active_font):
+    st.subheader("🏢 Municipios")
 
-    # --- COLUMNA IZQUIERDA: MUNICIPIOS ---
-    with col_mun:
-        st.subheader("🏢 Municipios")
-        
-        lista_mun = [OPCION_DEFAULT] + OPCIONES_MUNICIPIOS_ORDENADAS
-        ind_mun = st.selectbox("Indicador:", lista_mun, key="sel_ind_mun")
+    lista_mun = [OPCION_DEFAULT] + OPCIONES_MUNICIPIOS_ORDENADAS
+    ind_mun = st.selectbox("Indicador:", lista_mun, key="sel_ind_mun")
 
-        nombre_municipio = st.text_input("Nombre del Municipio:", placeholder="Ej. Monterrey", key="txt_mun_input")
+    nombre_municipio = st.text_input("Nombre del Municipio:", placeholder="Ej. Monterrey", key="txt_mun_input")
+    mostrar_sugerencias("municipio", nombre_municipio, "txt_mun_input")
 
-        st.markdown("---")
+    st.markdown("---")
+
+    if ind_mun == OPCION_DEFAULT:
+        st.info("☝️ Selecciona un indicador.")
+    elif not nombre_municipio:
+        st.info("👆 Ingresa el nombre de un municipio.")
+    else:
+        archivo_mun = RUTAS_MUNICIPIO.get(ind_mun)
+        ctx_mun = {
+            "active_palette": active_palette,
+            "active_font": active_font,
+            "TIPO_NIVEL": "Municipio",
+            "MUNICIPIO_SELECCIONADO": nombre_municipio,
+            "NOTEBOOK_INPUTS": [nombre_municipio]
+        }
+
+        ejecutado_mun = False
+        if archivo_mun:
+            path_mun = str(Path(NOTEBOOK_DIR) / archivo_mun)
+            ejecutado_mun = execute_notebook_content(path_mun, context=ctx_mun)
+
+        if not ejecutado_mun:
+            display_dummy_graph(active_font, active_palette, title=f"{ind_mun}\n({nombre_municipio})")
 
-        if ind_mun == OPCION_DEFAULT:
-            st.info("☝️ Selecciona un indicador.")
-        elif not nombre_municipio:
-            st.info("👆 Ingresa el nombre de un municipio.")
-        else:
-            archivo_mun = RUTAS_MUNICIPIO.get(ind_mun)
-            ctx_mun = {
-                "active_palette": active_palette,
-                "active_font": active_font,
-                "TIPO_NIVEL": "Municipio",
-                "MUNICIPIO_SELECCIONADO": nombre_municipio,
-                "NOTEBOOK_INPUTS": [nombre_municipio]
-            }
 
-            ejecutado_mun = False
-            if archivo_mun:
-                path_mun = str(Path(NOTEBOOK_DIR) / archivo_mun)
-                ejecutado_mun = execute_notebook_content(path_mun, context=ctx_mun)
+@seccion_perezosa
+def seccion_localidad(active_palette, active_font):
+    st.subheader("🏡 Localidades")
 
-            if not ejecutado_mun:
-                display_dummy_graph(active_font, active_palette, title=f"{ind_mun}\n({nombre_municipio})")
+    lista_loc = [OPCION_DEFAULT] + OPCIONES_LOCALIDADES_ORDENADAS
+    ind_loc = st.selectbox("Indicador:", lista_loc, key="sel_ind_loc")
+
+    nombre_localidad = st.text_input("Nombre de la Localidad:", placeholder="Ej. Polanco", key="txt_loc_input")
+    mostrar_sugerencias("localidad", nombre_localidad, "txt_loc_input")
+
+    st.markdown("---")
+
+    if ind_loc == OPCION_DEFAULT:
+         st.info("☝️Selecciona un indicador.")
+    elif not nombre_localidad:
+        st.info("👆 Ingresa el nombre de una localidad.")
+    else:
+        archivo_loc = RUTAS_LOCALIDAD.get(ind_loc)
+        ctx_loc = {
+            "active_palette": active_palette,
+            "active_font": active_font,
+            "TIPO_NIVEL": "Localidad",
+            "LOCALIDAD_SELECCIONADA": nombre_localidad,
+            "NOTEBOOK_INPUTS": [nombre_localidad]
+        }
+
+        ejecutado_loc = False
+        if archivo_loc:
+            path_loc = str(Path(NOTEBOOK_DIR) / archivo_loc)
+            ejecutado_loc = execute_notebook_content(path_loc, context=ctx_loc)
+
+        if not ejecutado_loc:
+            display_dummy_graph(active_font, active_palette, title=f"{ind_loc}\n({nombre_localidad})")
+
+
+with tab3:
+    col_mun, col_loc = st.columns(2, gap="medium")
+
+    # --- COLUMNA IZQUIERDA: MUNICIPIOS ---
+    with col_mun:
+        seccion_municipio(active_palette, active_font)
 
     # --- COLUMNA DERECHA: LOCALIDADES ---
     with col_loc:
-        st.subheader("🏡 Localidades")
-        
-        lista_loc = [OPCION_DEFAULT] + OPCIONES_LOCALIDADES_ORDENADAS
-        ind_loc = st.selectbox("Indicador:", lista_loc, key="sel_ind_loc")
+        seccion_localidad(active_palette, active_font)
 
-        nombre_localidad = st.text_input("Nombre de la Localidad:", placeholder="Ej. Polanco", key="txt_loc_input")
 
-        st.markdown("---")
-
-        if ind_loc == OPCION_DEFAULT:
-             st.info("☝️Selecciona un indicador.")
-        elif not nombre_localidad:
-            st.info("👆 Ingresa el nombre de una localidad.")
-        else:
-            archivo_loc = RUTAS_LOCALIDAD.get(ind_loc)
-            ctx_loc = {
-                "active_palette": active_palette,
-                "active_font": active_font,
-                "TIPO_NIVEL": "Localidad",
-                "LOCALIDAD_SELECCIONADA": nombre_localidad,
-                "NOTEBOOK_INPUTS": [nombre_localidad]
-            }
+# -------------------------------------------------------
+# ADMINISTRACIÓN DE CACHÉS (solo con AEDM_ADMIN=1)
+# -------------------------------------------------------
+def _edad(segundos):
+    if segundos is None or pd.isna(segundos):
+        return ""
+    if segundos < 3600:
+        return f"{segundos / 60:.0f} min"
+    if segundos < 86400:
+        return f"{segundos / 3600:.1f} h"
+    return f"{segundos / 86400:.1f} d"
+
+
+def vista_admin_caches():
+    with st.expander("🛠️ Administración de cachés"):
+        df = cache_utils.resumen()
+        tabla = pd.DataFrame({
+            "Región": df["region"],
+            "Tipo": df["tipo"],
+            "Entradas": df["entradas"],
+            "MB": (df["bytes"] / 2**20).round(2),
+            "Más antigua": df["edad_max_s"].map(_edad),
+            "Más reciente": df["edad_min_s"].map(_edad),
+            "Aciertos": df["aciertos"],
+            "Fallos": df["fallos"],
+            "Compartida": df["compartida"].map({True: "sí", False: "no"}),
+        })
+        st.dataframe(tabla, use_container_width=True, hide_index=True)
+        compartida = cache_compartida_utils.backend()
+        st.caption(f"Caché compartida: {compartida.descripcion if compartida else 'desactivada'}")
+
+        fig = graficas_utils.uso_figuras()
+        art = artefactos_utils.uso()
+        c1, c2 = st.columns(2)
+        c1.metric("Figuras en caché", fig["entradas"], f"{fig['bytes'] / 2**20:.1f} MB")
+        c2.metric("Artefactos", art["archivos"], f"{art['bytes_disco'] / 2**20:.1f} MB en disco")
+
+        opciones = [f"{r} ({t})" for r, t in zip(df["region"], df["tipo"])]
+        if opciones:
+            elegida = st.selectbox("Región a invalidar:", opciones, key="admin_region")
+            fila = df.iloc[opciones.index(elegida)]
+            confirmar = (fila["tipo"] != "disco" and not bool(fila["compartida"])) or st.checkbox(
+                "Borrar los datos de esta región (también para las demás réplicas; "
+                "se vuelven a descargar/construir al pedirlos)",
+                key="admin_confirmar")
+            if st.button("Invalidar región", disabled=not confirmar, key="admin_invalidar"):
+                if fila["tipo"] == "disco":
+                    cache_utils.vaciar_disco(fila["region"])
+                else:
+                    cache_utils.invalidar(fila["region"])
+                st.success(f"Región '{fila['region']}' invalidada.")
+        if st.button("Vaciar caché de figuras", key="admin_figuras"):
+            graficas_utils.limpiar_figuras()
 
-            ejecutado_loc = False
-            if archivo_loc:
-                path_loc = str(Path(NOTEBOOK_DIR) / archivo_loc)
-                ejecutado_loc = execute_notebook_content(path_loc, context=ctx_loc)
 
-            if not ejecutado_loc:
-                display_dummy_graph(active_font, active_palette, title=f"{ind_loc}\n({nombre_localidad})")
\ No newline at end of file
+if os.environ.get("AEDM_ADMIN", "0") == "1":
+    vista_admin_caches()
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+
+from descargas_utils import TAM_BLOQUE, dir_artefactos
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Almacén deduplicado de archivos que se entregan a los usuarios (p. ej. el
+# 6_2.xlsx de DataTur). Cada contenido se guarda una sola vez en disco con su
+# SHA-256 como nombre; las sesiones de Streamlit solo guardan ese "handle".
+# Presupuestos (MB): disco total del almacén (incluidas las copias que
+# descargas_utils.extrae de los ZIP en artefactos/extraidos, que se vuelven a
+# extraer si se desalojan) y bytes que se mantienen en memoria para servir
+# `st.download_button` sin releer el archivo.
+MAX_DISCO_MB = float(os.environ.get("AEDM_ARTEFACTOS_DISCO_MB", 1024))
+MAX_MEMORIA_MB = float(os.environ.get("AEDM_ARTEFACTOS_MEMORIA_MB", 64))
+
+_MEMORIA = OrderedDict()   # sha -> bytes (LRU)
+_BYTES_MEMORIA = 0
+_LOCK = threading.Lock()
+
+_PATRON_HANDLE = re.compile(r"[0-9a-f]{64}")
+
+
+def _ruta_blob(sha: str):
+    return dir_artefactos("blobs", sha[:2]) / sha
+
+
+def _valido(handle) -> bool:
+    return isinstance(handle, str) and _PATRON_HANDLE.fullmatch(handle) is not None
+
+
+# ==========================================
+# ESCRITURA
+# ==========================================
+def guardar_archivo(ruta) -> str:
+    """Guarda una copia deduplicada del archivo y devuelve su handle (sha256)."""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(TAM_BLOQUE), b""):
+            h.update(bloque)
+    sha = h.hexdigest()
+
+    destino = _ruta_blob(sha)
+    if destino.exists():
+        os.utime(destino)
+    else:
+        tmp = destino.with_name(f"{sha}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.copyfile(ruta, tmp)
+        os.replace(tmp, destino)
+    aplicar_presupuesto_disco(proteger=destino)
+    return sha
+
+
+def guardar_bytes(datos: bytes) -> str:
+    """Igual que `guardar_archivo` pero a partir de bytes en memoria."""
+    sha = hashlib.sha256(datos).hexdigest()
+    destino = _ruta_blob(sha)
+    if destino.exists():
+        os.utime(destino)
+    else:
+        tmp = destino.with_name(f"{sha}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(datos)
+        os.replace(tmp, destino)
+    aplicar_presupuesto_disco(proteger=destino)
+    return sha
+
+
+# ==========================================
+# LECTURA
+# ==========================================
+def ruta(handle):
+    """Ruta del archivo del handle, o None si no existe (o fue desalojado)."""
+    if not _valido(handle):
+        return None
+    p = _ruta_blob(handle)
+    try:
+        os.utime(p)   # marca de uso para el LRU de disco
+    except OSError:
+        return None
+    return p
+
+
+def leer(handle):
+    """Bytes del artefacto (compartidos entre sesiones), o None si ya no existe.
+
+    Los contenidos recientes se quedan en memoria hasta `MAX_MEMORIA_MB`; así
+    treinta sesiones que muestran el mismo botón de descarga comparten un
+    solo objeto `bytes` en lugar de tener treinta copias.
+    """
+    global _BYTES_MEMORIA
+    if not _valido(handle):
+        return None
+    with _LOCK:
+        datos = _MEMORIA.get(handle)
+        if datos is not None:
+            _MEMORIA.move_to_end(handle)
+            return datos
+
+    p = ruta(handle)
+    if p is None:
+        return None
+    datos = p.read_bytes()
+
+    limite = MAX_MEMORIA_MB * 1024 * 1024
+    if len(datos) <= limite:
+        with _LOCK:
+            if handle not in _MEMORIA:
+                _MEMORIA[handle] = datos
+                _BYTES_MEMORIA += len(datos)
+            while _BYTES_MEMORIA > limite and _MEMORIA:
+                _, viejo = _MEMORIA.popitem(last=False)
+                _BYTES_MEMORIA -= len(viejo)
+    return datos
+
+
+# ==========================================
+# PRESUPUESTO / DESALOJO
+# ==========================================
+def _blobs():
+    base = dir_artefactos("blobs")
+    for p in base.glob("*/*"):
+        if _valido(p.name):
+            yield p
+
+
+def _extraidos():
+    for p in dir_artefactos("extraidos").rglob("*"):
+        if p.is_file() and not p.name.endswith(".tmp"):
+            yield p
+
+
+def aplicar_presupuesto_disco(proteger=None):
+    """Borra los archivos menos usados (mtime) hasta quedar bajo el presupuesto.
+
+    Cuenta los blobs y las copias extraídas; `proteger` (una ruta) no se borra.
+    """
+    global _BYTES_MEMORIA
+    limite = MAX_DISCO_MB * 1024 * 1024
+    archivos = []
+    for p in [*_blobs(), *_extraidos()]:
+        try:
+            st_ = p.stat()
+        except OSError:
+            continue
+        archivos.append((st_.st_mtime, st_.st_size, p))
+    total = sum(a[1] for a in archivos)
+    if total <= limite:
+        return
+
+    for _, tam, p in sorted(archivos, key=lambda a: a[0]):
+        if total <= limite:
+            break
+        if p == proteger:
+            continue
+        try:
+            p.unlink()
+        except OSError:
+            continue
+        total -= tam
+        if p.parent.parent == dir_artefactos("extraidos"):
+            try:
+                p.parent.rmdir()   # extraidos/<zip>/ queda vacío
+            except OSError:
+                pass
+            continue
+        with _LOCK:
+            datos = _MEMORIA.pop(p.name, None)
+            if datos is not None:
+                _BYTES_MEMORIA -= len(datos)
+
+
+def uso() -> dict:
+    """Resumen del almacén: número de archivos y bytes en disco / memoria.
+
+    `archivos` y `bytes_disco` incluyen las copias extraídas (`extraidos`).
+    """
+    extraidos = list(_extraidos())
+    archivos = list(_blobs()) + extraidos
+    with _LOCK:
+        en_memoria = len(_MEMORIA)
+        bytes_memoria = _BYTES_MEMORIA
+    return {
+        "archivos": len(archivos),
+        "extraidos": len(extraidos),
+        "bytes_disco": sum(p.stat().st_size for p in archivos if p.exists()),
+        "en_memoria": en_memoria,
+        "bytes_memoria": bytes_memoria,
+        "max_disco_mb": MAX_DISCO_MB,
+        "max_memoria_mb": MAX_MEMORIA_MB,
+    }
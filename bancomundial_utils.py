@@ -0,0 +1,286 @@
+"""
+Almacén local de indicadores del Banco Mundial (API v2, WDI).
+
+Todos los indicadores viven en una sola tabla columnar
+<DATA_DIR>/bancomundial/indicadores.parquet (iso3 × indicador × año) que los
+notebooks consultan con filtros vectorizados. Los indicadores se piden en
+bloque (varios por petición, todos los países, páginas en paralelo) y solo
+se vuelven a descargar los que cambiaron su `lastupdated` en la API.
+
+Para llenar el almacén con todos los indicadores que usan los notebooks:
+
+    python bancomundial_utils.py
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import almacen_utils
+import candados_utils
+import http_utils
+import rutas_utils
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+API_ROOT = "https://api.worldbank.org/v2"
+FUENTE_WDI = 2
+TIMEOUT = 60
+POR_PAGINA = 20000
+# La API acepta hasta 60 indicadores separados por ';' en una sola consulta
+MAX_POR_CONSULTA = 60
+HILOS = 4
+
+# Entre dos revisiones de `lastupdated` pasan al menos INTERVALO segundos
+# (por defecto el TTL del Banco Mundial en http_utils).
+INTERVALO = int(os.environ.get("AEDM_BM_INTERVALO", http_utils.TTL_POR_FUENTE["worldbank.org"]))
+
+# Indicadores que usan los notebooks (se descargan juntos con `python bancomundial_utils.py`)
+INDICADORES = (
+    "SP.POP.TOTL",          # población total
+    "SP.POP.0014.TO.ZS",    # % 0-14 años
+    "SP.POP.1564.TO.ZS",    # % 15-64 años
+    "SP.POP.65UP.TO.ZS",    # % 65 años y más
+    "SP.POP.TOTL.MA.IN",    # población hombres
+    "SP.POP.TOTL.FE.IN",    # población mujeres
+    "NY.GDP.MKTP.CD",       # PIB (US$ corrientes)
+    "NY.GDP.PCAP.CD",       # PIB per cápita (US$ corrientes)
+    "ST.INT.RCPT.CD",       # ingresos por turismo internacional (US$ corrientes)
+)
+
+log = logging.getLogger("bancomundial_utils")
+
+
+def _rutas():
+    base = rutas_utils.subdir("bancomundial")
+    return base / "indicadores.parquet", base / "indicadores.json", base / "paises.parquet"
+
+
+# ==========================================
+# API v2
+# ==========================================
+def _pagina(url, params, pagina):
+    # Las respuestas en bloque son grandes y se guardan en el almacén: no en la caché HTTP
+    r = http_utils.get(url, params=dict(params, page=pagina), timeout=TIMEOUT, cache=False)
+    r.raise_for_status()
+    datos = r.json()
+    if not isinstance(datos, list) or len(datos) < 2 or not isinstance(datos[0], dict):
+        mensaje = datos[0].get("message") if isinstance(datos, list) and datos and isinstance(datos[0], dict) else None
+        raise ValueError(f"Respuesta inesperada de la API del Banco Mundial: {mensaje or datos!r:.200}")
+    return datos[0], datos[1] or []
+
+
+def _paginado(url, params):
+    """Todas las filas de una consulta; la primera página da el total y el resto va en paralelo."""
+    params = dict(params, format="json", per_page=POR_PAGINA)
+    cabecera, filas = _pagina(url, params, 1)
+    paginas = int(cabecera.get("pages") or 1)
+    if paginas > 1:
+        with ThreadPoolExecutor(max_workers=min(HILOS, paginas - 1)) as ex:
+            for _, resto in ex.map(lambda p: _pagina(url, params, p), range(2, paginas + 1)):
+                filas.extend(resto)
+    return cabecera, filas
+
+
+def _a_tabla(filas) -> pd.DataFrame:
+    """Filas JSON de la API -> DataFrame (iso3, indicador, anio, valor) sin nulos."""
+    df = pd.DataFrame({
+        "iso3": [f.get("countryiso3code") or "" for f in filas],
+        "indicador": [(f.get("indicator") or {}).get("id") for f in filas],
+        "anio": pd.to_numeric(pd.Series([f.get("date") for f in filas], dtype="object"), errors="coerce"),
+        "valor": pd.to_numeric(pd.Series([f.get("value") for f in filas], dtype="object"), errors="coerce"),
+    })
+    df = df[(df["iso3"] != "") & df["anio"].notna() & df["valor"].notna()]
+    return df.astype({"anio": "int16", "valor": "float64"})
+
+
+def _descargar(indicadores) -> pd.DataFrame:
+    """Historia completa de `indicadores` para todos los países, en consultas de varios indicadores."""
+    partes = []
+    for i in range(0, len(indicadores), MAX_POR_CONSULTA):
+        grupo = indicadores[i:i + MAX_POR_CONSULTA]
+        url = f"{API_ROOT}/country/all/indicator/{';'.join(grupo)}"
+        _, filas = _paginado(url, {"source": FUENTE_WDI})
+        partes.append(_a_tabla(filas))
+    return pd.concat(partes, ignore_index=True)
+
+
+def _lastupdated(indicador):
+    """Fecha `lastupdated` que reporta la API para el indicador (consulta de una sola fila)."""
+    url = f"{API_ROOT}/country/WLD/indicator/{indicador}"
+    r = http_utils.get(url, params={"format": "json", "per_page": 1, "mrv": 1}, timeout=TIMEOUT, cache=False)
+    r.raise_for_status()
+    datos = r.json()
+    if not isinstance(datos, list) or not datos or not isinstance(datos[0], dict) or "message" in datos[0]:
+        raise ValueError(f"Indicador no reconocido por la API del Banco Mundial: {indicador}")
+    return datos[0].get("lastupdated")
+
+
+# ==========================================
+# ALMACÉN LOCAL
+# ==========================================
+def _leer_parquet(ruta):
+    return almacen_utils.cargar_parquet(ruta) if ruta.exists() else None
+
+
+def _leer():
+    ruta, ruta_meta, _ = _rutas()
+    try:
+        meta = json.loads(ruta_meta.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        meta = {}
+    df = _leer_parquet(ruta) if meta else None
+    if df is None:
+        return pd.DataFrame({"iso3": pd.Series(dtype="category"), "indicador": pd.Series(dtype="category"),
+                             "anio": pd.Series(dtype="int16"), "valor": pd.Series(dtype="float64")}), {}
+    return df, meta
+
+
+def _guardar(df, meta):
+    ruta, ruta_meta, _ = _rutas()
+    df = df.astype({"iso3": "category", "indicador": "category"})
+    df = df.sort_values(["indicador", "iso3", "anio"], ignore_index=True)
+    almacen_utils.guardar_parquet(df, ruta)
+    almacen_utils.escribir_atomico(
+        ruta_meta, lambda tmp: tmp.write_text(json.dumps(meta, indent=1), encoding="utf-8"))
+
+
+def asegurar(indicadores=INDICADORES, forzar: bool = False):
+    """Deja `indicadores` al día en el almacén.
+
+    - Los que faltan se descargan juntos (varios indicadores por consulta).
+    - Los guardados cuya última revisión tiene más de INTERVALO segundos (o
+      todos, con `forzar`) se comparan con el `lastupdated` de la API y solo
+      los que cambiaron se vuelven a descargar.
+    - Si la API falla y hay datos guardados, se conservan los guardados.
+
+    Las consultas a la API no retienen el candado del almacén: solo se toma
+    para combinar lo descargado con la tabla vigente y reemplazarla.
+    """
+    indicadores = list(dict.fromkeys(indicadores))
+    # Dentro del proceso, las llamadas simultáneas comparten una sola actualización
+    candados_utils.unico(f"bancomundial:{forzar}:{';'.join(sorted(indicadores))}",
+                         lambda: _actualizar(indicadores, forzar))
+
+
+def _actualizar(indicadores, forzar):
+    _, meta = _leer()
+    ahora = time.time()
+    faltan = [i for i in indicadores if i not in meta]
+    revisar = [i for i in indicadores if i in meta
+               and (forzar or ahora - meta[i].get("consultado", 0) >= INTERVALO)]
+    if not faltan and not revisar:
+        return
+
+    try:
+        probar = faltan + revisar
+        with ThreadPoolExecutor(max_workers=min(HILOS, len(probar))) as ex:
+            fechas = dict(zip(probar, ex.map(_lastupdated, probar)))
+        pedir = faltan + [i for i in revisar if fechas[i] != meta[i].get("lastupdated")]
+        nuevo = _descargar(pedir) if pedir else None
+    except Exception as e:
+        if faltan:
+            raise
+        log.warning("Banco Mundial: no se pudo actualizar %s (%s); se usan datos guardados",
+                    ", ".join(revisar), e)
+        return
+
+    with candados_utils.candado("bancomundial"):
+        # Se relee: otro proceso pudo guardar otros indicadores mientras tanto
+        df, meta = _leer()
+        if nuevo is not None:
+            viejo = df[~df["indicador"].isin(pedir)].astype({"iso3": str, "indicador": str})
+            df = pd.concat([viejo, nuevo], ignore_index=True)
+        for i in probar:
+            meta[i] = {"lastupdated": fechas[i], "consultado": ahora}
+        _guardar(df, meta)
+
+
+def paises(agregados: bool = False) -> pd.DataFrame:
+    """Catálogo de países (iso3, nombre, region); sin agregados regionales salvo que se pidan."""
+    _, _, ruta = _rutas()
+    df = _leer_parquet(ruta)
+    if df is None or time.time() - ruta.stat().st_mtime >= INTERVALO:
+        try:
+            _, filas = _paginado(f"{API_ROOT}/country", {})
+            df = pd.DataFrame({
+                "iso3": [f.get("id") for f in filas],
+                "nombre": [f.get("name") for f in filas],
+                "region": [((f.get("region") or {}).get("value") or "").strip() for f in filas],
+            })
+            df["agregado"] = df["region"].eq("Aggregates")
+            # Un solo archivo reemplazado de golpe: no hace falta el candado del almacén
+            almacen_utils.guardar_parquet(df, ruta)
+        except Exception as e:
+            if df is None:
+                raise
+            log.warning("Banco Mundial: no se pudo actualizar el catálogo de países (%s)", e)
+    return df if agregados else df[~df["agregado"]].reset_index(drop=True)
+
+
+# ==========================================
+# CONSULTAS
+# ==========================================
+def tabla(indicadores, paises=None, desde=None, hasta=None) -> pd.DataFrame:
+    """Observaciones (iso3, indicador, anio, valor) de los indicadores pedidos.
+
+    `paises` es una lista de códigos ISO3 (None = todos, incluidos agregados).
+    """
+    indicadores = [indicadores] if isinstance(indicadores, str) else list(indicadores)
+    asegurar(indicadores)
+    df, _ = _leer()
+    mascara = df["indicador"].isin(indicadores)
+    if paises is not None:
+        mascara &= df["iso3"].isin([paises] if isinstance(paises, str) else list(paises))
+    if desde is not None:
+        mascara &= df["anio"] >= desde
+    if hasta is not None:
+        mascara &= df["anio"] <= hasta
+    sel = df[mascara].astype({"iso3": str, "indicador": str})
+    return sel.sort_values(["indicador", "iso3", "anio"], ignore_index=True)
+
+
+def serie(indicador: str, pais: str = "MEX", desde=None, hasta=None) -> pd.DataFrame:
+    """Serie anual (anio, valor) de un indicador para un país, ordenada por año."""
+    return tabla([indicador], [pais], desde, hasta)[["anio", "valor"]]
+
+
+def panel(indicadores, pais: str = "MEX", desde=None, hasta=None) -> pd.DataFrame:
+    """Años × indicadores para un país (índice anio, una columna por indicador)."""
+    sel = tabla(indicadores, [pais], desde, hasta)
+    return sel.pivot(index="anio", columns="indicador", values="valor").reindex(columns=list(indicadores))
+
+
+def lastupdated(indicadores):
+    """La fecha `lastupdated` más reciente entre los indicadores guardados ('' si no hay)."""
+    _, meta = _leer()
+    fechas = [meta.get(i, {}).get("lastupdated") for i in
+              ([indicadores] if isinstance(indicadores, str) else indicadores)]
+    return max((f for f in fechas if f), default="")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Llena el almacén local de indicadores del Banco Mundial.")
+    parser.add_argument("indicadores", nargs="*", default=list(INDICADORES))
+    parser.add_argument("--forzar", action="store_true", help="Revisar `lastupdated` aunque no haya pasado el intervalo.")
+    args = parser.parse_args(argv)
+
+    inicio = time.time()
+    asegurar(args.indicadores, forzar=args.forzar)
+    paises(agregados=True)
+    df, meta = _leer()
+    for i in args.indicadores:
+        n = int((df["indicador"] == i).sum())
+        print(f"{i:<20} {n:>7} filas  actualizado {meta.get(i, {}).get('lastupdated')}")
+    print(f"{time.time() - inicio:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
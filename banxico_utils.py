@@ -0,0 +1,166 @@
+import datetime as dt
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+import almacen_utils
+import candados_utils
+import http_utils
+import rutas_utils
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+API_ROOT = "https://www.banxico.org.mx/SieAPIRest/service/v1"
+TIMEOUT = 30
+
+# Cada serie se guarda una vez en Parquet (fecha, dato) y solo se piden a la
+# API las fechas posteriores a la última observación guardada. Entre dos
+# consultas a la API pasan al menos INTERVALO segundos (por defecto el TTL
+# de Banxico en http_utils), así que una serie diaria de 25 años cuesta una
+# petición pequeña por día en lugar de una descarga completa por notebook.
+INTERVALO = int(os.environ.get("AEDM_BANXICO_INTERVALO",
+                               http_utils.TTL_POR_FUENTE["banxico.org.mx"]))
+# Ventana inicial cuando solo se necesita el último dato de una serie nueva
+DIAS_SEMILLA = 31
+
+log = logging.getLogger("banxico_utils")
+
+
+def _rutas(serie):
+    base = rutas_utils.subdir("banxico")
+    return base / f"{serie}.parquet", base / f"{serie}.json"
+
+
+# ==========================================
+# API SIE
+# ==========================================
+def _descargar(serie, token, inicio=None, fin=None) -> pd.DataFrame:
+    """Observaciones de la API (columnas fecha, dato). Sin fechas = historia completa."""
+    url = f"{API_ROOT}/series/{serie}/datos"
+    if inicio is not None:
+        url += f"/{inicio:%Y-%m-%d}/{(fin or dt.date.today()):%Y-%m-%d}"
+    # Las ventanas incrementales cambian cada día: no vale la pena guardarlas en la caché HTTP
+    r = http_utils.get(url, headers={"Bmx-Token": token}, timeout=TIMEOUT, cache=False)
+    r.raise_for_status()
+    series = r.json().get("bmx", {}).get("series") or [{}]
+    datos = series[0].get("datos") or []
+
+    df = pd.DataFrame(datos, columns=["fecha", "dato"])
+    df["fecha"] = pd.to_datetime(df["fecha"], format="%d/%m/%Y", errors="coerce")
+    # "N/E" (no existe) y vacíos quedan fuera
+    df["dato"] = pd.to_numeric(df["dato"].astype(str).str.replace(",", "", regex=False), errors="coerce")
+    return df.dropna()
+
+
+# ==========================================
+# ALMACÉN LOCAL
+# ==========================================
+def _leer_meta(ruta_meta):
+    try:
+        return json.loads(ruta_meta.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _leer(serie):
+    ruta, ruta_meta = _rutas(serie)
+    meta = _leer_meta(ruta_meta)
+    if meta is None or not ruta.exists():
+        return None, None
+    return almacen_utils.cargar_parquet(ruta), meta
+
+
+def _guardar(serie, df, meta):
+    ruta, ruta_meta = _rutas(serie)
+    almacen_utils.guardar_parquet(df, ruta)
+    almacen_utils.escribir_atomico(
+        ruta_meta, lambda tmp: tmp.write_text(json.dumps(meta), encoding="utf-8"))
+
+
+def _unir(*partes):
+    df = pd.concat([p for p in partes if p is not None and not p.empty], ignore_index=True)
+    if df.empty:
+        return pd.DataFrame({"fecha": pd.Series(dtype="datetime64[ns]"), "dato": pd.Series(dtype="float64")})
+    df = df.drop_duplicates("fecha", keep="last").sort_values("fecha").reset_index(drop=True)
+    return df[["fecha", "dato"]]
+
+
+def obtener_serie(serie: str, token: str, inicio=None, fin=None, forzar: bool = False) -> pd.DataFrame:
+    """Serie de Banxico SIE desde el almacén local, actualizada por deltas.
+
+    - `inicio=None` pide la historia completa; con fecha, basta que el
+      almacén cubra desde ese día (si no, se completa el tramo faltante).
+    - Si la última consulta tiene más de INTERVALO segundos (o `forzar`), se
+      piden solo las fechas posteriores a la última observación guardada.
+    - Si la API falla y hay datos guardados, se devuelven los guardados.
+
+    Cada serie se actualiza bajo `candados_utils.candado`, también entre
+    procesos: quien espera relee el almacén al entrar y encuentra el delta
+    ya guardado, así ninguna actualización pisa filas de otra.
+
+    Devuelve un DataFrame (fecha, dato) ordenado, recortado a [inicio, fin].
+    """
+    inicio = pd.Timestamp(inicio).date() if inicio is not None else None
+    fin = pd.Timestamp(fin).date() if fin is not None else None
+
+    with candados_utils.candado(f"banxico:{serie}"):
+        df, meta = _leer(serie)
+        hoy = dt.date.today()
+
+        try:
+            if df is None:
+                # Primera vez: descarga completa del rango pedido
+                df = _unir(_descargar(serie, token, inicio))
+                meta = {"inicio": inicio.isoformat() if inicio else None}
+                cambio = True
+            else:
+                cambio = False
+                cubierto = meta.get("inicio")
+                # Tramo anterior a lo guardado
+                if cubierto is not None and (inicio is None or inicio < dt.date.fromisoformat(cubierto)):
+                    hasta = dt.date.fromisoformat(cubierto) - dt.timedelta(days=1)
+                    previo = (_descargar(serie, token) if inicio is None
+                              else _descargar(serie, token, inicio, hasta))
+                    df = _unir(previo, df)
+                    meta["inicio"] = inicio.isoformat() if inicio else None
+                    cambio = True
+                # Delta: solo fechas posteriores a la última observación
+                if forzar or time.time() - meta.get("consultado", 0) >= INTERVALO:
+                    desde = (df["fecha"].max().date() + dt.timedelta(days=1)) if not df.empty else (inicio or None)
+                    if desde is None or desde <= hoy:
+                        nuevo = _descargar(serie, token, desde)
+                        if not nuevo.empty:
+                            df = _unir(df, nuevo)
+                    cambio = True
+            if cambio:
+                meta["consultado"] = time.time()
+                _guardar(serie, df, meta)
+        except Exception as e:
+            if df is None:
+                raise
+            log.warning("Banxico %s: no se pudo actualizar (%s); se usan datos guardados", serie, e)
+
+    sel = df
+    if inicio is not None:
+        sel = sel[sel["fecha"] >= pd.Timestamp(inicio)]
+    if fin is not None:
+        sel = sel[sel["fecha"] <= pd.Timestamp(fin)]
+    return sel.reset_index(drop=True)
+
+
+def ultimo_dato(serie: str, token: str):
+    """(fecha, dato) de la observación más reciente (equivale a `/datos/oportuno`)."""
+    _, meta = _leer(serie)
+    if meta is not None:
+        inicio = meta.get("inicio")
+    else:
+        inicio = dt.date.today() - dt.timedelta(days=DIAS_SEMILLA)
+    df = obtener_serie(serie, token, inicio=inicio)
+    if df.empty:
+        raise ValueError(f"La serie {serie} no tiene observaciones")
+    fila = df.iloc[-1]
+    return fila["fecha"], float(fila["dato"])
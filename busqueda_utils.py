@@ -0,0 +1,275 @@
+import bisect
+import re
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+import censo_utils
+
+# ==========================================
+# NORMALIZACIÓN
+# ==========================================
+def normalizar(s) -> str:
+    """Minúsculas, sin acentos y sin espacios en los extremos."""
+    if s is None or (isinstance(s, float) and pd.isna(s)):
+        return ""
+    s = str(s).lower().strip()
+    return unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
+
+
+def _trigramas(s: str) -> set:
+    s = f"  {s} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+# ==========================================
+# ÍNDICE DE NOMBRES
+# ==========================================
+class IndiceNombres:
+    """Índice en memoria de nombres geográficos normalizados.
+
+    Se construye una sola vez y resuelve búsquedas exactas, por prefijo (del
+    nombre completo o de cualquier palabra), por subcadena y aproximadas por
+    trigramas, sin recorrer la tabla completa en cada consulta. Los resultados se ordenan por
+    tipo de coincidencia y, dentro de cada tipo, por población.
+    """
+
+    TIPOS = ("exacta", "prefijo", "palabra", "subcadena", "aproximada")
+
+    def __init__(self, df: pd.DataFrame, col_nombre: str, col_peso: str = None, col_etiqueta: str = None):
+        # Sin nombre no hay nada que buscar (astype(str) los volvería "nan"/"None")
+        df = df[df[col_nombre].notna()]
+        nombres = df[col_nombre].astype(str)
+        # Normalizamos solo los valores únicos (hay muchos nombres repetidos)
+        unicos = pd.unique(nombres)
+        mapa = {u: normalizar(u) for u in unicos}
+        tabla = pd.DataFrame({
+            "clave": nombres.map(mapa).values,
+            "nombre": nombres.values,
+            "peso": df[col_peso].fillna(0).values if col_peso else 0.0,
+            "etiqueta": df[col_etiqueta].astype(str).values if col_etiqueta else "",
+            "fila": df.index.values,
+        })
+        tabla = tabla[tabla["clave"] != ""]
+
+        # Por clave: representante = fila más poblada
+        tabla = tabla.sort_values(["clave", "peso"], ascending=[True, False], kind="mergesort")
+        grupos = tabla.groupby("clave", sort=True)
+        rep = grupos.first()
+        self._claves = rep.index.tolist()
+        self._nombres = rep["nombre"].tolist()
+        self._etiquetas = rep["etiqueta"].tolist()
+        self._pesos = rep["peso"].to_numpy(dtype="float64")
+        self._n = grupos.size().to_numpy()
+        filas = tabla["fila"].to_numpy()
+        posiciones = grupos.indices
+        self._filas = [filas[posiciones[c]] for c in self._claves]
+        self._pos = {c: i for i, c in enumerate(self._claves)}
+
+        # Índice de palabras: (palabra, id) ordenado para búsquedas por prefijo
+        pares = sorted(
+            (palabra, i)
+            for i, c in enumerate(self._claves)
+            for palabra in set(c.split()[1:])
+        )
+        self._palabras = [p for p, _ in pares]
+        self._palabras_id = np.array([i for _, i in pares], dtype=np.int32)
+
+        # Subcadena a media palabra: una búsqueda sobre todas las claves unidas
+        self._texto = "\n".join(self._claves)
+        self._inicios = np.cumsum([0] + [len(c) + 1 for c in self._claves[:-1]])
+
+        # Índice de trigramas para búsqueda aproximada
+        postings = {}
+        ntri = np.empty(len(self._claves), dtype=np.int32)
+        for i, c in enumerate(self._claves):
+            tri = _trigramas(c)
+            ntri[i] = len(tri)
+            for t in tri:
+                postings.setdefault(t, []).append(i)
+        self._trigramas = {t: np.array(v, dtype=np.int32) for t, v in postings.items()}
+        self._ntri = ntri
+
+    def __len__(self):
+        return len(self._claves)
+
+    # --- Primitivas ---
+    def _rango_prefijo(self, lista, prefijo):
+        lo = bisect.bisect_left(lista, prefijo)
+        hi = bisect.bisect_left(lista, prefijo + "\uffff")
+        return lo, hi
+
+    def _top(self, ids, limite):
+        """Ordena ids por peso descendente y recorta a `limite`."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if limite is not None and len(ids) > limite:
+            ids = ids[np.argpartition(-self._pesos[ids], limite - 1)[:limite]]
+        return ids[np.argsort(-self._pesos[ids], kind="stable")]
+
+    def _subcadena(self, clave):
+        posiciones = [m.start() for m in re.finditer(re.escape(clave), self._texto)]
+        if not posiciones:
+            return np.array([], dtype=np.int64)
+        return np.unique(np.searchsorted(self._inicios, posiciones, side="right") - 1)
+
+    def _aproximada(self, clave, limite, umbral):
+        q = _trigramas(clave)
+        listas = [self._trigramas[t] for t in q if t in self._trigramas]
+        if not listas:
+            return np.array([], dtype=np.int64), np.array([])
+        comunes = np.bincount(np.concatenate(listas), minlength=len(self._claves))
+        ids = np.nonzero(comunes)[0]
+        jac = comunes[ids] / (len(q) + self._ntri[ids] - comunes[ids])
+        ok = jac >= umbral
+        ids, jac = ids[ok], jac[ok]
+        orden = np.lexsort((-self._pesos[ids], -jac))
+        if limite is not None:
+            orden = orden[:limite]
+        return ids[orden], jac[orden]
+
+    # --- API pública ---
+    def buscar(self, consulta, limite=10, difuso=True, umbral=0.35):
+        """Devuelve coincidencias ordenadas como lista de dicts.
+
+        Cada resultado trae: clave, nombre, etiqueta, tipo, puntaje, peso, n.
+        Con `limite=None` se devuelven todos los nombres que contienen la
+        consulta, como un `str.contains` (útil para los notebooks).
+        """
+        clave = normalizar(consulta)
+        if not clave:
+            return []
+
+        vistos = set()
+        salida = []
+
+        def _agregar(ids, tipo, puntajes=None):
+            for k, i in enumerate(ids):
+                i = int(i)
+                if i in vistos:
+                    continue
+                if limite is not None and len(salida) >= limite:
+                    return
+                vistos.add(i)
+                salida.append({
+                    "clave": self._claves[i],
+                    "nombre": self._nombres[i],
+                    "etiqueta": self._etiquetas[i],
+                    "tipo": tipo,
+                    "puntaje": 1.0 if puntajes is None else float(puntajes[k]),
+                    "peso": float(self._pesos[i]),
+                    "n": int(self._n[i]),
+                })
+
+        # 1. Exacta
+        i = self._pos.get(clave)
+        if i is not None:
+            _agregar([i], "exacta")
+
+        # 2. Prefijo del nombre completo (ids contiguos en la lista ordenada)
+        lo, hi = self._rango_prefijo(self._claves, clave)
+        if hi > lo:
+            _agregar(self._top(np.arange(lo, hi), None if limite is None else limite + 1), "prefijo")
+
+        # 3. Prefijo de cualquier palabra interior ("polanco" -> "ampliacion polanco")
+        lo, hi = self._rango_prefijo(self._palabras, clave)
+        if hi > lo:
+            ids = np.unique(self._palabras_id[lo:hi])
+            _agregar(self._top(ids, None if limite is None else limite + len(vistos)), "palabra")
+
+        # 4. Subcadena a media palabra ("terrey" -> "monterrey")
+        if limite is None or len(salida) < limite:
+            ids = self._subcadena(clave)
+            if len(ids):
+                _agregar(self._top(ids, None if limite is None else limite + len(vistos)), "subcadena")
+
+        # 5. Aproximada (errores de dedo, acentos, abreviaturas)
+        if difuso and (limite is None or len(salida) < limite):
+            ids, jac = self._aproximada(clave, limite, umbral)
+            _agregar(ids, "aproximada", jac)
+
+        return salida
+
+    def filas(self, claves):
+        """Etiquetas de fila del DataFrame de origen para las claves dadas."""
+        partes = [self._filas[self._pos[c]] for c in claves if c in self._pos]
+        if not partes:
+            return np.array([], dtype=np.int64)
+        return np.concatenate(partes)
+
+
+# ==========================================
+# ÍNDICES POR CENSO (CACHÉ POR PROCESO)
+# ==========================================
+NIVELES = ("localidad", "municipio")
+
+_INDICES = {}
+_LOCKS = {}
+_HILOS = {}     # llave -> hilo que construye el índice en segundo plano
+_LOCK = threading.Lock()
+
+
+def _construir(anio, nivel):
+    df = censo_utils.cargar_iter(anio, censo_utils.COLS_CLAVE + censo_utils.COLS_NOMBRE + ["POBTOT"])
+    if nivel == "localidad":
+        df = df[~df["LOC"].isin([0, 9998, 9999])]
+        etiqueta = df["NOM_MUN"].astype(str) + ", " + df["NOM_ENT"].astype(str)
+        return IndiceNombres(df.assign(_etq=etiqueta), "NOM_LOC", "POBTOT", "_etq")
+    if nivel == "municipio":
+        df = df[(df["LOC"] == 0) & (df["MUN"] != 0)]
+        return IndiceNombres(df, "NOM_MUN", "POBTOT", "NOM_ENT")
+    raise ValueError(f"Nivel no soportado: {nivel}")
+
+
+def _construir_en_fondo(anio, nivel):
+    try:
+        obtener_indice(anio, nivel)
+    except Exception as e:
+        # El siguiente pedido vuelve a intentarlo
+        print(f"--> No se pudo construir el índice {nivel} {anio}: {e}")
+
+
+def obtener_indice(anio: int, nivel: str, esperar: bool = True):
+    """Índice de nombres para un censo (2005/2010/2020) y nivel, construido una vez.
+
+    La primera vez puede implicar descargar el ITER. Con `esperar=False` no
+    se bloquea: si el índice aún no existe, se construye en un hilo aparte y
+    se devuelve None.
+    """
+    llave = (anio, nivel)
+    indice = _INDICES.get(llave)
+    if indice is not None:
+        return indice
+    if not esperar:
+        with _LOCK:
+            hilo = _HILOS.get(llave)
+            if hilo is None or not hilo.is_alive():
+                hilo = _HILOS[llave] = threading.Thread(
+                    target=_construir_en_fondo, args=llave, daemon=True, name=f"indice-{nivel}-{anio}")
+                hilo.start()
+        return None
+
+    with _LOCK:
+        lock = _LOCKS.setdefault(llave, threading.Lock())
+    # Un candado por índice: distintos censos se pueden construir en paralelo
+    with lock:
+        indice = _INDICES.get(llave)
+        if indice is None:
+            indice = _construir(anio, nivel)
+            _INDICES[llave] = indice
+    return indice
+
+
+def sugerir(nivel: str, texto: str, anio: int = 2020, limite: int = 8):
+    """Sugerencias ordenadas para las cajas de búsqueda de la app.
+
+    No bloquea el render: mientras el índice se construye (la primera vez en
+    el proceso) no hay sugerencias.
+    """
+    if not texto or len(normalizar(texto)) < 2:
+        return []
+    indice = obtener_indice(anio, nivel, esperar=False)
+    if indice is None:
+        return []
+    return indice.buscar(texto, limite=limite)
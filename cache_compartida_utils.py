@@ -0,0 +1,411 @@
+"""
+Caché compartida entre réplicas de la app.
+
+Las cachés en memoria (st.cache_data, regiones de cache_utils) son de cada
+proceso: con varias réplicas detrás de un balanceador cada una calienta las
+suyas y un reinicio las vacía. Esta capa guarda los resultados fuera del
+proceso, en el backend que indique AEDM_CACHE_COMPARTIDA:
+
+- "archivos" (por defecto): <DATA_DIR>/cache_compartida/ (o la ruta de
+  AEDM_CACHE_COMPARTIDA_DIR); se comparte si DATA_DIR es un volumen común.
+- "redis://[:clave@]host:6379/0": cualquier servidor que hable el protocolo
+  de Redis (Redis, Valkey, KeyDB...). El cliente RESP es propio (sin
+  dependencias) y usa SET con PX para el TTL.
+- "0": desactivada (se construye siempre).
+
+Los DataFrames (también dentro de dicts, tuplas, etc.) se serializan como
+Arrow IPC conservando `df.attrs`; lo demás con pickle. Solo debe apuntarse a
+servidores de confianza: el contenido se deserializa tal cual.
+
+Si el backend falla, se avisa en el log, se construye el valor localmente y
+el backend se deja de consultar durante PAUSA_FALLA segundos.
+"""
+import io
+import logging
+import os
+import pickle
+import re
+import shutil
+import socket
+import struct
+import threading
+import time
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+import candados_utils
+import rutas_utils
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+BACKEND = os.environ.get("AEDM_CACHE_COMPARTIDA", "archivos")
+PREFIJO = os.environ.get("AEDM_CACHE_PREFIJO", "aedm")
+TIMEOUT = 5
+PAUSA_FALLA = 60
+MAGIA = b"AEDMC1"
+
+log = logging.getLogger("cache_compartida_utils")
+
+_LOCK = threading.Lock()
+_BACKEND = None
+_PAUSADO_HASTA = 0.0
+_FALTA = object()
+
+
+def _limpiar(texto) -> str:
+    return re.sub(r"[^\w.-]", "_", str(texto)) or "_"
+
+
+# ==========================================
+# SERIALIZACIÓN (ARROW IPC PARA DATAFRAMES)
+# ==========================================
+def _df_a_arrow(df: pd.DataFrame) -> bytes:
+    tabla = pa.Table.from_pandas(df)
+    if df.attrs:
+        meta = dict(tabla.schema.metadata or {})
+        meta[b"aedm_attrs"] = pickle.dumps(df.attrs, protocol=pickle.HIGHEST_PROTOCOL)
+        tabla = tabla.replace_schema_metadata(meta)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabla.schema) as w:
+        w.write_table(tabla)
+    return sink.getvalue().to_pybytes()
+
+
+def _arrow_a_df(datos) -> pd.DataFrame:
+    tabla = pa.ipc.open_stream(pa.py_buffer(datos)).read_all()
+    df = tabla.to_pandas()
+    attrs = (tabla.schema.metadata or {}).get(b"aedm_attrs")
+    if attrs is not None:
+        df.attrs = pickle.loads(attrs)
+    return df
+
+
+def serializar(valor) -> bytes:
+    """Bytes de `valor`: los DataFrames van como Arrow IPC y el resto como pickle."""
+    tablas, vistos = [], {}
+
+    class _Pickler(pickle.Pickler):
+        def persistent_id(self, obj):
+            if pa is None or type(obj) is not pd.DataFrame:
+                return None
+            if id(obj) not in vistos:
+                try:
+                    tablas.append(_df_a_arrow(obj))
+                except (pa.ArrowException, TypeError, ValueError):
+                    # Columnas con tipos mezclados: se quedan en pickle
+                    vistos[id(obj)] = None
+                else:
+                    vistos[id(obj)] = len(tablas) - 1
+            return vistos[id(obj)]
+
+    f = io.BytesIO()
+    _Pickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump(valor)
+    cabecera = struct.pack(f"<I{len(tablas)}Q", len(tablas), *map(len, tablas))
+    return b"".join([MAGIA, cabecera, *tablas, f.getvalue()])
+
+
+def deserializar(datos):
+    datos = memoryview(datos)
+    if bytes(datos[:len(MAGIA)]) != MAGIA:
+        raise ValueError("Formato de caché compartida desconocido")
+    pos = len(MAGIA)
+    (n,) = struct.unpack_from("<I", datos, pos)
+    largos = struct.unpack_from(f"<{n}Q", datos, pos + 4)
+    pos += 4 + 8 * n
+    tablas = []
+    for largo in largos:
+        tablas.append(datos[pos:pos + largo])
+        pos += largo
+
+    class _Unpickler(pickle.Unpickler):
+        def persistent_load(self, pid):
+            return _arrow_a_df(tablas[pid])
+
+    return _Unpickler(io.BytesIO(datos[pos:])).load()
+
+
+# ==========================================
+# BACKEND EN ARCHIVOS
+# ==========================================
+class BackendArchivos:
+    """Un archivo por llave: 8 bytes con la expiración (0 = sin TTL) + los datos."""
+
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        self.descripcion = f"archivos: {self.ruta}"
+
+    def _archivo(self, region, llave):
+        return self.ruta / region / f"{llave}.bin"
+
+    def leer(self, region, llave):
+        ruta = self._archivo(region, llave)
+        try:
+            datos = ruta.read_bytes()
+        except FileNotFoundError:
+            return None
+        (expira,) = struct.unpack_from("<d", datos)
+        if expira and time.time() >= expira:
+            ruta.unlink(missing_ok=True)
+            return None
+        return memoryview(datos)[8:]
+
+    def escribir(self, region, llave, datos, ttl=None):
+        ruta = self._archivo(region, llave)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ruta.with_name(f"{ruta.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(struct.pack("<d", time.time() + ttl if ttl else 0.0))
+                f.write(datos)
+            os.replace(tmp, ruta)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def borrar(self, region, llave):
+        self._archivo(region, llave).unlink(missing_ok=True)
+
+    def borrar_region(self, region):
+        shutil.rmtree(self.ruta / region, ignore_errors=True)
+
+
+# ==========================================
+# BACKEND CON PROTOCOLO DE REDIS (RESP)
+# ==========================================
+class ErrorRedis(Exception):
+    pass
+
+
+class _ConexionRedis:
+    def __init__(self, host, puerto, db, usuario, clave, timeout):
+        self.sock = socket.create_connection((host, puerto), timeout=timeout)
+        self.archivo = self.sock.makefile("rb")
+        if clave:
+            self.comando("AUTH", *([usuario] if usuario else []), clave)
+        if db:
+            self.comando("SELECT", db)
+
+    def comando(self, *args):
+        partes = [b"*%d\r\n" % len(args)]
+        for a in args:
+            a = a if isinstance(a, (bytes, bytearray, memoryview)) else str(a).encode("utf-8")
+            partes += [b"$%d\r\n" % len(a), a, b"\r\n"]
+        self.sock.sendall(b"".join(partes))
+        return self._respuesta()
+
+    def _respuesta(self):
+        linea = self.archivo.readline()
+        if not linea.endswith(b"\r\n"):
+            raise ConnectionError("Conexión cerrada por el servidor")
+        tipo, resto = linea[:1], linea[1:-2]
+        if tipo == b"+":
+            return resto.decode()
+        if tipo == b"-":
+            raise ErrorRedis(resto.decode())
+        if tipo == b":":
+            return int(resto)
+        if tipo == b"$":
+            n = int(resto)
+            if n < 0:
+                return None
+            datos = self.archivo.read(n + 2)
+            if len(datos) != n + 2:
+                raise ConnectionError("Respuesta incompleta del servidor")
+            return datos[:-2]
+        if tipo == b"*":
+            n = int(resto)
+            return None if n < 0 else [self._respuesta() for _ in range(n)]
+        raise ErrorRedis(f"Respuesta RESP inesperada: {linea[:40]!r}")
+
+    def cerrar(self):
+        try:
+            self.archivo.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class BackendRedis:
+    """Claves "<PREFIJO>:<region>:<llave>" en un servidor compatible con Redis."""
+
+    def __init__(self, url, timeout=TIMEOUT, prefijo=PREFIJO):
+        u = urlsplit(url)
+        self._params = (u.hostname or "localhost", u.port or 6379, int(u.path.strip("/") or 0),
+                        unquote(u.username) if u.username else None,
+                        unquote(u.password) if u.password else None, timeout)
+        self.prefijo = prefijo
+        self.descripcion = f"redis: {self._params[0]}:{self._params[1]}/{self._params[2]}"
+        self._libres = []
+        self._lock = threading.Lock()
+
+    def _comando(self, *args):
+        with self._lock:
+            con = self._libres.pop() if self._libres else None
+        if con is None:
+            con = _ConexionRedis(*self._params)
+        try:
+            resp = con.comando(*args)
+        except ErrorRedis:
+            with self._lock:
+                self._libres.append(con)
+            raise
+        except Exception:
+            con.cerrar()
+            raise
+        with self._lock:
+            self._libres.append(con)
+        return resp
+
+    def _clave(self, region, llave):
+        return f"{self.prefijo}:{region}:{llave}"
+
+    def leer(self, region, llave):
+        return self._comando("GET", self._clave(region, llave))
+
+    def escribir(self, region, llave, datos, ttl=None):
+        if ttl:
+            self._comando("SET", self._clave(region, llave), datos, "PX", int(ttl * 1000))
+        else:
+            self._comando("SET", self._clave(region, llave), datos)
+
+    def borrar(self, region, llave):
+        self._comando("DEL", self._clave(region, llave))
+
+    def borrar_region(self, region):
+        cursor = b"0"
+        while True:
+            cursor, claves = self._comando("SCAN", cursor, "MATCH", self._clave(region, "*"), "COUNT", 500)
+            if claves:
+                self._comando("DEL", *claves)
+            if cursor in (b"0", "0"):
+                return
+
+
+# ==========================================
+# SELECCIÓN DEL BACKEND
+# ==========================================
+def _crear(spec):
+    spec = (spec or "").strip()
+    if spec in ("", "0", "no", "ninguno"):
+        return None
+    if spec.startswith(("redis://", "rediss://")):
+        if spec.startswith("rediss://"):
+            raise ValueError("rediss:// (TLS) no está soportado; use un túnel o redis://")
+        return BackendRedis(spec)
+    if spec == "archivos":
+        ruta = os.environ.get("AEDM_CACHE_COMPARTIDA_DIR") or rutas_utils.DATA_DIR / "cache_compartida"
+        return BackendArchivos(ruta)
+    raise ValueError(f"AEDM_CACHE_COMPARTIDA no reconocido: {spec!r}")
+
+
+def backend():
+    """Backend activo (None si la caché compartida está desactivada)."""
+    global _BACKEND
+    with _LOCK:
+        if _BACKEND is None:
+            _BACKEND = _crear(BACKEND) or False
+        return _BACKEND or None
+
+
+def configurar(spec_o_backend):
+    """Cambia el backend en caliente: texto como AEDM_CACHE_COMPARTIDA o un objeto backend."""
+    global _BACKEND, _PAUSADO_HASTA
+    b = _crear(spec_o_backend) if isinstance(spec_o_backend, str) or spec_o_backend is None else spec_o_backend
+    with _LOCK:
+        _BACKEND = b or False
+        _PAUSADO_HASTA = 0.0
+
+
+def _disponible():
+    b = backend()
+    return b if b is not None and time.monotonic() >= _PAUSADO_HASTA else None
+
+
+def _falla(accion, e):
+    global _PAUSADO_HASTA
+    with _LOCK:
+        _PAUSADO_HASTA = time.monotonic() + PAUSA_FALLA
+    log.warning("Caché compartida: falló %s (%s); se usa solo la caché local por %d s", accion, e, PAUSA_FALLA)
+
+
+# ==========================================
+# API
+# ==========================================
+def _leer(region, llave):
+    b = _disponible()
+    if b is None:
+        return _FALTA
+    try:
+        datos = b.leer(_limpiar(region), _limpiar(llave))
+    except Exception as e:
+        _falla("la lectura", e)
+        return _FALTA
+    if datos is None:
+        return _FALTA
+    try:
+        return deserializar(datos)
+    except Exception as e:
+        # Entrada corrupta o de otra versión: se descarta
+        log.warning("Caché compartida: entrada ilegible %s/%s (%s)", region, llave, e)
+        try:
+            b.borrar(_limpiar(region), _limpiar(llave))
+        except Exception:
+            pass
+        return _FALTA
+
+
+def leer(region: str, llave: str, defecto=None):
+    """Valor guardado en la caché compartida (o `defecto` si no está o venció)."""
+    valor = _leer(region, llave)
+    return defecto if valor is _FALTA else valor
+
+
+def escribir(region: str, llave: str, valor, ttl=None):
+    """Guarda `valor` para todas las réplicas; `ttl` en segundos (None = sin vencimiento)."""
+    b = _disponible()
+    if b is None:
+        return
+    try:
+        b.escribir(_limpiar(region), _limpiar(llave), serializar(valor), ttl)
+    except Exception as e:
+        _falla("la escritura", e)
+
+
+def obtener(region: str, llave: str, construir, ttl=None):
+    """Valor compartido para `llave`; si no está, lo arma `construir()` y lo publica.
+
+    En el mismo equipo solo un hilo/proceso lo construye a la vez (ver
+    candados_utils); los demás lo leen de la caché al terminar.
+    """
+    valor = _leer(region, llave)
+    if valor is not _FALTA:
+        return valor
+    if _disponible() is None:
+        return construir()
+
+    def _construir():
+        valor = _leer(region, llave)
+        if valor is _FALTA:
+            valor = construir()
+            escribir(region, llave, valor, ttl)
+        return valor
+
+    return candados_utils.unico(f"cache_compartida:{region}:{llave}", _construir, entre_procesos=True)
+
+
+def invalidar(region: str):
+    """Borra la región en la caché compartida (para todas las réplicas)."""
+    b = _disponible()
+    if b is None:
+        return
+    try:
+        b.borrar_region(_limpiar(region))
+    except Exception as e:
+        _falla("la invalidación", e)
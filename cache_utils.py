@@ -0,0 +1,290 @@
+"""
+Cachés por región con invalidación independiente.
+
+Cada notebook o fuente de datos guarda sus resultados en una región con
+nombre propio (p. ej. "conectividad_aerea_internacionales"); "Recargar
+datos" invalida solo esa región, a diferencia de st.cache_data.clear(), que
+borra las cachés de todos los usuarios y todas las fuentes.
+
+Las regiones en memoria guardan el resultado serializado (cada sesión recibe
+su propia copia, como st.cache_data), con TTL opcional y un tope de MB por
+región (LRU). Con `compartida=True`, lo que falta en memoria se busca en la
+caché compartida entre réplicas (ver cache_compartida_utils) antes de
+construirlo, e invalidar la región también la borra ahí. Además, cada subdirectorio de DATA_DIR (censos, caché HTTP,
+Banco Mundial...) se reporta como región en disco.
+"""
+import datetime
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from enum import Enum
+from functools import wraps
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import cache_compartida_utils
+import rutas_utils
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+MAX_REGION_MB = float(os.environ.get("AEDM_CACHE_REGION_MB", 256))
+
+_REGIONES = {}
+_LOCK = threading.Lock()
+
+
+# Tipos cuyo repr() es estable entre ejecuciones (no incluye direcciones de memoria)
+_ESCALARES = (type(None), bool, int, float, complex, str, bytes, Decimal, Path, Enum,
+              datetime.date, datetime.time, datetime.timedelta, np.generic, type(pd.NaT))
+
+
+def huella(obj, h):
+    """Agrega a `h` una huella estable del contenido de `obj`.
+
+    Solo acepta datos (pandas, numpy, contenedores y escalares): con otros
+    objetos el repr() suele llevar una dirección de memoria y la llave nunca
+    se repetiría, así que se lanza TypeError.
+    """
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        cols = list(obj.columns) if isinstance(obj, pd.DataFrame) else [obj.name]
+        h.update(repr((type(obj).__name__, obj.shape, cols)).encode())
+        opciones = {} if isinstance(obj, pd.Index) else {"index": True}
+        try:
+            valores = pd.util.hash_pandas_object(obj, **opciones)
+        except TypeError:
+            # Celdas no hashables (listas, dicts...): se comparan por su texto
+            valores = pd.util.hash_pandas_object(obj.astype(str), **opciones)
+        h.update(valores.values.tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(repr((obj.dtype.str, obj.shape)).encode())
+        h.update(np.ascontiguousarray(obj).tobytes() if obj.dtype != object else repr(obj.tolist()).encode())
+    elif isinstance(obj, dict):
+        for k in sorted(obj, key=repr):
+            h.update(repr(k).encode())
+            huella(obj[k], h)
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for x in obj:
+            huella(x, h)
+    elif isinstance(obj, (set, frozenset)):
+        h.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for x in sorted(obj, key=repr):
+            huella(x, h)
+    elif isinstance(obj, _ESCALARES):
+        h.update(f"{type(obj).__name__}:{obj!r}".encode())
+    else:
+        raise TypeError(f"No se puede usar un {type(obj).__name__} en una llave de caché; "
+                        "pase datos (DataFrame, números, texto...) o una llave explícita")
+
+
+# ==========================================
+# REGIONES EN MEMORIA
+# ==========================================
+class Region:
+    """Caché LRU con nombre; sus entradas se invalidan sin tocar otras regiones."""
+
+    def __init__(self, nombre, ttl=None, max_mb=MAX_REGION_MB, compartida=False):
+        self.nombre = nombre
+        self.ttl = ttl
+        self.max_mb = max_mb
+        self.compartida = compartida
+        self._entradas = OrderedDict()   # llave -> (creado, datos serializados)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def _vigente(self, creado, ttl):
+        ttl = self.ttl if ttl is None else ttl
+        return ttl is None or time.time() - creado < ttl
+
+    def obtener(self, llave, construir, ttl=None):
+        """Valor guardado para `llave` (una copia); si no está o venció, lo arma con `construir()`."""
+        with self._lock:
+            entrada = self._entradas.get(llave)
+            if entrada is not None and self._vigente(entrada[0], ttl):
+                self._entradas.move_to_end(llave)
+                self.aciertos += 1
+            else:
+                entrada = None
+                self.fallos += 1
+        if entrada is not None:
+            return pickle.loads(entrada[1])
+
+        if self.compartida:
+            valor = cache_compartida_utils.obtener(self.nombre, llave, construir,
+                                                   ttl=self.ttl if ttl is None else ttl)
+        else:
+            valor = construir()
+        datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        limite = self.max_mb * 1024 * 1024
+        if len(datos) <= limite:
+            with self._lock:
+                previo = self._entradas.pop(llave, None)
+                if previo is not None:
+                    self._bytes -= len(previo[1])
+                self._entradas[llave] = (time.time(), datos)
+                self._bytes += len(datos)
+                while self._bytes > limite and self._entradas:
+                    _, (_, viejo) = self._entradas.popitem(last=False)
+                    self._bytes -= len(viejo)
+        return valor
+
+    def memo(self, func=None, *, ttl=None, llave=None):
+        """Decorador: memoiza `func` en la región (llave = código de la función + argumentos).
+
+        Si algún argumento no es un dato (ver `huella`), `llave(*args, **kwargs)`
+        debe devolver los datos que lo identifican.
+        """
+        if func is None:
+            return lambda f: self.memo(f, ttl=ttl, llave=llave)
+
+        @wraps(func)
+        def envoltura(*args, **kwargs):
+            h = hashlib.sha256()
+            h.update(func.__qualname__.encode())
+            h.update(func.__code__.co_code)
+            huella(llave(*args, **kwargs) if llave is not None else (args, kwargs), h)
+            return self.obtener(h.hexdigest(), lambda: func(*args, **kwargs), ttl=ttl)
+
+        envoltura.clear = self.invalidar
+        return envoltura
+
+    def invalidar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+        if self.compartida:
+            cache_compartida_utils.invalidar(self.nombre)
+
+    def uso(self) -> dict:
+        ahora = time.time()
+        with self._lock:
+            creados = [c for c, _ in self._entradas.values()]
+            return {
+                "region": self.nombre,
+                "tipo": "memoria",
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "edad_max_s": ahora - min(creados) if creados else None,
+                "edad_min_s": ahora - max(creados) if creados else None,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "ttl_s": self.ttl,
+                "compartida": self.compartida,
+            }
+
+
+def region(nombre: str, ttl=None, max_mb=None, compartida=None) -> Region:
+    """La región `nombre` (se crea la primera vez; `ttl`/`max_mb`/`compartida` actualizan la existente)."""
+    with _LOCK:
+        reg = _REGIONES.get(nombre)
+        if reg is None:
+            reg = _REGIONES[nombre] = Region(nombre, ttl, MAX_REGION_MB if max_mb is None else max_mb,
+                                             bool(compartida))
+        else:
+            if ttl is not None:
+                reg.ttl = ttl
+            if max_mb is not None:
+                reg.max_mb = max_mb
+            if compartida is not None:
+                reg.compartida = compartida
+        return reg
+
+
+def cacheado(nombre_region: str, ttl=None, compartida=False, llave=None):
+    """Reemplazo de @st.cache_data cuya caché vive en la región `nombre_region`.
+
+    Con `compartida=True` los resultados también se publican en la caché
+    compartida entre réplicas y sobreviven a los reinicios. La función se
+    ejecuta entonces bajo un candado entre procesos: debe limitarse a
+    armar los datos (sin st.error/st.stop ni otros `st.*`).
+    """
+    return region(nombre_region, ttl=ttl, compartida=compartida).memo(llave=llave)
+
+
+def invalidar(nombre: str):
+    """Invalida solo la región en memoria `nombre` (no hace nada si no existe)."""
+    with _LOCK:
+        reg = _REGIONES.get(nombre)
+    if reg is not None:
+        reg.invalidar()
+
+
+# ==========================================
+# REGIONES EN DISCO (SUBDIRECTORIOS DE DATA_DIR)
+# ==========================================
+# Directorios de DATA_DIR que no son datos: vaciar candados/ rompería los
+# flock de quien esté construyendo algo en ese momento
+_DIRS_INTERNOS = {"candados"}
+# Archivos a medio escribir (escrituras atómicas, descargas reanudables)
+_SUFIJOS_EN_VUELO = (".tmp", ".part")
+def _uso_directorio(ruta) -> dict:
+    tam, n, mtimes = 0, 0, []
+    for raiz, _, archivos in os.walk(ruta):
+        for a in archivos:
+            try:
+                st_ = os.stat(os.path.join(raiz, a))
+            except OSError:
+                continue
+            tam += st_.st_size
+            n += 1
+            mtimes.append(st_.st_mtime)
+    ahora = time.time()
+    return {
+        "region": ruta.name,
+        "tipo": "disco",
+        "entradas": n,
+        "bytes": tam,
+        "edad_max_s": ahora - min(mtimes) if mtimes else None,
+        "edad_min_s": ahora - max(mtimes) if mtimes else None,
+        "aciertos": None,
+        "fallos": None,
+        "ttl_s": None,
+        "compartida": None,
+    }
+
+
+def regiones_disco():
+    base = rutas_utils.DATA_DIR
+    if not base.exists():
+        return []
+    return sorted((p for p in base.iterdir() if p.is_dir() and p.name not in _DIRS_INTERNOS),
+                  key=lambda p: p.name)
+
+
+def vaciar_disco(nombre: str):
+    """Borra el contenido de DATA_DIR/<nombre>; sus datos se vuelven a construir al pedirlos.
+
+    Los archivos a medio escribir se dejan: pertenecen a una escritura o
+    descarga en curso, que los mueve o borra al terminar.
+    """
+    ruta = (rutas_utils.DATA_DIR / nombre).resolve()
+    if ruta.parent != rutas_utils.DATA_DIR.resolve() or not ruta.is_dir() or ruta.name in _DIRS_INTERNOS:
+        raise ValueError(f"No es una región en disco: {nombre}")
+    for raiz, dirs, archivos in os.walk(ruta, topdown=False):
+        for a in archivos:
+            if not a.endswith(_SUFIJOS_EN_VUELO):
+                Path(raiz, a).unlink(missing_ok=True)
+        for d in dirs:
+            try:
+                Path(raiz, d).rmdir()
+            except OSError:
+                pass  # conserva un archivo en vuelo
+
+
+def resumen() -> pd.DataFrame:
+    """Una fila por región (memoria y disco): entradas, MB y edades."""
+    with _LOCK:
+        regiones = list(_REGIONES.values())
+    filas = [r.uso() for r in regiones] + [_uso_directorio(p) for p in regiones_disco()]
+    df = pd.DataFrame(filas, columns=["region", "tipo", "entradas", "bytes", "edad_max_s", "edad_min_s",
+                                      "aciertos", "fallos", "ttl_s", "compartida"])
+    return df.sort_values(["tipo", "bytes"], ascending=[False, False], ignore_index=True)
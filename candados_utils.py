@@ -0,0 +1,155 @@
+"""
+Vuelo único (single-flight) para los cargadores de datos.
+
+Cuando varias sesiones piden el mismo dato en frío (p. ej. justo después de
+un despliegue), solo la primera hace el trabajo:
+
+- `candado(llave)`: exclusión mutua por llave entre hilos del proceso y
+  entre procesos del mismo equipo (flock sobre <DATA_DIR>/candados/). Quien
+  espera debe volver a revisar el artefacto en disco al entrar: ya lo
+  construyó el primero. Si el proceso que lo tiene muere, el sistema
+  operativo libera el candado.
+- `unico(llave, func)`: dentro del proceso, las llamadas concurrentes con la
+  misma llave esperan el resultado de la primera en vez de repetirla (mismo
+  objeto, o una copia de su excepción). Con `entre_procesos=True` la
+  ejecución además se hace bajo `candado(llave)`.
+
+En sistemas sin fcntl (Windows) solo se coordinan los hilos del proceso.
+"""
+import copy
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+import rutas_utils
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Segundos máximos de espera por un candado de otro proceso
+ESPERA_MAX = float(os.environ.get("AEDM_CANDADO_ESPERA", 1800))
+INTERVALO_SONDEO = 0.1
+
+_LOCK = threading.Lock()
+_LOCKS = {}    # llave -> threading.Lock
+_VUELOS = {}   # llave -> _Vuelo en curso
+
+
+def _lock_para(llave):
+    with _LOCK:
+        return _LOCKS.setdefault(llave, threading.Lock())
+
+
+def ruta_candado(llave: str):
+    sha = hashlib.sha256(str(llave).encode("utf-8")).hexdigest()[:24]
+    return rutas_utils.subdir("candados") / f"{sha}.lock"
+
+
+# ==========================================
+# CANDADO ENTRE HILOS Y PROCESOS
+# ==========================================
+@contextmanager
+def candado(llave: str, espera=None):
+    """Sección crítica para `llave` en todo el equipo (hilos y procesos)."""
+    espera = ESPERA_MAX if espera is None else espera
+    with _lock_para(llave):
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(ruta_candado(llave), os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            limite = time.monotonic() + espera
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= limite:
+                        raise TimeoutError(f"Otro proceso retiene el candado de {llave!r} desde hace {espera:.0f} s")
+                    time.sleep(INTERVALO_SONDEO)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+# ==========================================
+# VUELO ÚNICO DENTRO DEL PROCESO
+# ==========================================
+class _Vuelo:
+    def __init__(self):
+        self.listo = threading.Event()
+        self.valor = None
+        self.error = None
+        # El líder se interrumpió (cancelación, st.stop...): hay que elegir otro
+        self.abandonado = False
+
+
+def _error_para_espera(error):
+    """Copia de `error` para un hilo que esperaba (cada hilo levanta su propia instancia)."""
+    try:
+        nuevo = copy.copy(error)
+    except Exception:
+        nuevo = None
+    if type(nuevo) is not type(error):
+        nuevo = RuntimeError(f"{type(error).__name__}: {error}")
+    nuevo.__traceback__ = None
+    return nuevo
+
+
+def unico(llave: str, func, entre_procesos: bool = False):
+    """Resultado de `func()`; las llamadas simultáneas con la misma llave lo comparten.
+
+    Se comparten el valor (por referencia: no modificarlo en sitio) y los
+    errores ordinarios (cada espera recibe una copia encadenada al
+    original). Si el líder sale por una BaseException (cancelación de su
+    sesión, st.stop()...), esa excepción es solo suya: las esperas eligen
+    un nuevo líder y reintentan.
+    """
+    while True:
+        with _LOCK:
+            vuelo = _VUELOS.get(llave)
+            lider = vuelo is None
+            if lider:
+                vuelo = _VUELOS[llave] = _Vuelo()
+        if lider:
+            break
+        vuelo.listo.wait()
+        if vuelo.abandonado:
+            continue
+        if vuelo.error is not None:
+            raise _error_para_espera(vuelo.error) from vuelo.error
+        return vuelo.valor
+
+    try:
+        if entre_procesos:
+            with candado(llave):
+                vuelo.valor = func()
+        else:
+            vuelo.valor = func()
+    except Exception as e:
+        vuelo.error = e
+        raise
+    except BaseException:
+        vuelo.abandonado = True
+        raise
+    finally:
+        with _LOCK:
+            _VUELOS.pop(llave, None)
+        vuelo.listo.set()
+    return vuelo.valor
+
+
+def en_vuelo() -> int:
+    """Cantidad de cargas en curso con esperas compartidas (para diagnóstico)."""
+    with _LOCK:
+        return len(_VUELOS)
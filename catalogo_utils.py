@@ -0,0 +1,112 @@
+# ==========================================
+# CATÁLOGO DE REPORTES
+# ==========================================
+# Estados y reportes disponibles por nivel. Lo comparten app.py y el
+# script de precarga de datos en disco (precargar_datos.py), que no puede
+# importar app.py.
+
+# ---------------------------
+# CONSTANTES GEOGRÁFICAS
+# ---------------------------
+ESTADOS_MEXICANOS = [
+    "Aguascalientes", "Baja California", "Baja California Sur", "Campeche",
+    "Chiapas", "Chihuahua", "Ciudad de México", "Coahuila", "Colima",
+    "Durango", "Guanajuato", "Guerrero", "Hidalgo", "Jalisco",
+    "México", "Michoacán", "Morelos", "Nayarit", "Nuevo León",
+    "Oaxaca", "Puebla", "Querétaro", "Quintana Roo", "San Luis Potosí",
+    "Sinaloa", "Sonora", "Tabasco", "Tamaulipas", "Tlaxcala",
+    "Veracruz", "Yucatán", "Zacatecas"
+]
+
+# ---------------------------
+# CONSTANTES Y RUTAS: NIVEL PAÍS
+# ---------------------------
+OPCIONES_PAIS_ORDENADAS = [
+    "PIB nacional",
+    "Inflación nacional",
+    "Crecimiento poblacional nacional",
+    "Distribución de la población por edad",
+    "Distribución de la población por sexo",
+    "Población económicamente activa",
+    "Población por sector de actividad económica",
+    "PIB histórico total y per cápita",
+    "Proyección del PIB total y per cápita",
+    "Inflación histórica",
+    "Tasa cambiaria histórica",
+    "Flujo de inversión extranjera para un Estado",
+    "Anuncio de inversión por país",
+    "Ranking mundial de países por ingreso de divisas",
+    "Histórico de llegadas y salidas de turistas",
+    "Entradas aereas de turistas",
+    "Actividad hotelera",
+    "Conectividad aérea (Vuelos nacionales)",
+    "Conectividad aérea (Vuelos internacionales)"
+]
+
+RUTAS_PAIS = {
+    "PIB nacional": "pib_nacional.ipynb",
+    "Inflación nacional": "inflacion_nacional.ipynb",
+    "Crecimiento poblacional nacional": "crecimiento_poblacional_nacional.ipynb",
+    "Distribución de la población por edad": "pob_distribucion_edad.ipynb",
+    "Distribución de la población por sexo": "pob_distribucion_sexo.ipynb",
+    "Población económicamente activa": "pob_economicamente_activa.ipynb",
+    "Población por sector de actividad económica": "pob_sector_actividad.ipynb",
+    "PIB histórico total y per cápita": "pib_historico_percapita.ipynb",
+    "Proyección del PIB total y per cápita": "pib_proyeccion.ipynb",
+    "Inflación histórica": "inflacion_historica.ipynb",
+    "Tasa cambiaria histórica": "tasa_cambiaria.ipynb",
+    "Flujo de inversión extranjera para un Estado": "inversion_extranjera_ied.ipynb",
+    "Anuncio de inversión por país": "inversion_anuncios_pais.ipynb",
+    "Ranking mundial de países por ingreso de divisas": "turismo_ranking_divisas.ipynb",
+    "Histórico de llegadas y salidas de turistas": "turismo_historico_flujos.ipynb",
+    "Entradas aereas de turistas": "turismo_entradas_aereas.ipynb",
+    "Actividad hotelera": "turismo_actividad_hotelera.ipynb",
+    "Conectividad aérea (Vuelos nacionales)": "conectividad_aerea_nacionales.ipynb",
+    "Conectividad aérea (Vuelos internacionales)": "conectividad_aerea_internacionales.ipynb"
+}
+
+# ---------------------------
+# CONSTANTES Y RUTAS: NIVEL ESTADO
+# ---------------------------
+OPCIONES_ESTADO_ORDENADAS = [
+    "Población y PIB",
+    "Crecimiento histórico poblacional",
+    "Proyección poblacional",
+    "PIB por sectores",
+    "Anuncios de inversión por industria",
+    "Llegada de turistas (Histórico) y ocupación de alojamiento",
+    "Conecctividad terrestre"
+]
+
+RUTAS_ESTADO = {
+    "Población y PIB": "estado_poblacion_pib.ipynb",
+    "Crecimiento histórico poblacional": "estado_crecimiento_hist.ipynb",
+    "Proyección poblacional": "estado_proyeccion.ipynb",
+    "PIB por sectores": "estado_pib_sectores.ipynb",
+    "Anuncios de inversión por industria": "estado_inversion_anuncios.ipynb",
+    "Llegada de turistas (Histórico) y ocupación de alojamiento": "estado_turismo_llegadas.ipynb",
+    "Conecctividad terrestre": "estado_conectividad.ipynb"
+}
+
+# ---------------------------
+# CONSTANTES Y RUTAS: NIVEL MUNICIPIO Y LOCALIDAD
+# ---------------------------
+OPCIONES_MUNICIPIOS_ORDENADAS = [
+    "Distribución de la población",
+    "Proyección de la población"
+]
+
+RUTAS_MUNICIPIO = {
+    "Distribución de la población": "municipio_distribucion_pob.ipynb",
+    "Proyección de la población": "municipio_proyeccion_pob.ipynb"
+}
+
+OPCIONES_LOCALIDADES_ORDENADAS = [
+    "Distribución de la población",
+    "Crecimiento histórico de la población"
+]
+
+RUTAS_LOCALIDAD = {
+    "Distribución de la población": "localidad_distribucion_pob.ipynb",
+    "Crecimiento histórico de la población": "localidad_crecimiento_hist.ipynb"
+}
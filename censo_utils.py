@@ -0,0 +1,165 @@
+import zipfile
+
+import pandas as pd
+
+import almacen_utils
+import descargas_utils
+import rutas_utils
+
+# ==========================================
+# CONFIGURACIÓN: CENSOS (ITER 2005 / 2010 / 2020)
+# ==========================================
+ITER_2020_URL = "https://www.inegi.org.mx/contenidos/programas/ccpv/2020/datosabiertos/iter/iter_00_cpv2020_csv.zip"
+ITER_2020_CSV = "conjunto_de_datos_iter_00CSV20.csv"
+
+# Los encabezados se normalizan a MAYÚSCULAS y al esquema de 2020.
+FUENTES_ITER = {
+    2005: {
+        "url": "https://www.inegi.org.mx/contenidos/programas/ccpv/2005/datosabiertos/cpv2005_iter_00_csv.zip",
+        "csv": "cpv2005_iter_00.csv",
+        "encoding": "latin-1",
+        "renombrar": {"P_TOTAL": "POBTOT", "P_MAS": "POBMAS", "P_FEM": "POBFEM"},
+        "edades": False,
+    },
+    2010: {
+        "url": "https://www.inegi.org.mx/contenidos/programas/ccpv/2010/datosabiertos/iter_nal_2010_csv.zip",
+        "csv": "iter_00_cpv2010.csv",
+        "encoding": "latin-1",
+        "renombrar": {},
+        "edades": False,
+    },
+    2020: {
+        "url": ITER_2020_URL,
+        "csv": ITER_2020_CSV,
+        "encoding": "utf-8-sig",
+        "renombrar": {},
+        "edades": True,
+    },
+}
+
+RANGOS_EDAD = [
+    ("0 a 4 años", "P_0A4_F", "P_0A4_M"),
+    ("5 a 9 años", "P_5A9_F", "P_5A9_M"),
+    ("10 a 14 años", "P_10A14_F", "P_10A14_M"),
+    ("15 a 19 años", "P_15A19_F", "P_15A19_M"),
+    ("20 a 24 años", "P_20A24_F", "P_20A24_M"),
+    ("25 a 29 años", "P_25A29_F", "P_25A29_M"),
+    ("30 a 34 años", "P_30A34_F", "P_30A34_M"),
+    ("35 a 39 años", "P_35A39_F", "P_35A39_M"),
+    ("40 a 44 años", "P_40A44_F", "P_40A44_M"),
+    ("45 a 49 años", "P_45A49_F", "P_45A49_M"),
+    ("50 a 54 años", "P_50A54_F", "P_50A54_M"),
+    ("55 a 59 años", "P_55A59_F", "P_55A59_M"),
+    ("60 a 64 años", "P_60A64_F", "P_60A64_M"),
+    ("65 a 69 años", "P_65A69_F", "P_65A69_M"),
+    ("70 a 74 años", "P_70A74_F", "P_70A74_M"),
+    ("75 a 79 años", "P_75A79_F", "P_75A79_M"),
+    ("80 a 84 años", "P_80A84_F", "P_80A84_M"),
+    ("85 y más", "P_85YMAS_F", "P_85YMAS_M"),
+]
+
+COLS_CLAVE = ["ENTIDAD", "MUN", "LOC"]
+COLS_NOMBRE = ["NOM_ENT", "NOM_MUN", "NOM_LOC"]
+COLS_POBLACION_BASE = ["POBTOT", "POBFEM", "POBMAS"]
+COLS_POBLACION = COLS_POBLACION_BASE + [c for _, f, m in RANGOS_EDAD for c in (f, m)]
+
+
+def columnas_poblacion(anio):
+    return COLS_POBLACION if FUENTES_ITER[anio]["edades"] else COLS_POBLACION_BASE
+
+
+def ruta_iter(anio):
+    return rutas_utils.subdir("censo") / f"iter_{anio}.parquet"
+
+
+def ruta_iter_2020():
+    return ruta_iter(2020)
+
+
+# ==========================================
+# INGESTA (SOLO CORRE UNA VEZ)
+# ==========================================
+def _leer_csv_iter(zip_path, anio):
+    fuente = FUENTES_ITER[anio]
+    renombrar = fuente["renombrar"]
+    cols_pob = columnas_poblacion(anio)
+    deseadas = set(COLS_CLAVE + COLS_NOMBRE + cols_pob)
+
+    def _canonica(c):
+        c = c.strip().upper()
+        return renombrar.get(c, c)
+
+    with zipfile.ZipFile(zip_path) as z:
+        nombre = next((n for n in z.namelist() if fuente["csv"] in n), None)
+        if nombre is None:
+            raise FileNotFoundError("No se encontró el archivo CSV esperado dentro del ZIP.")
+        with z.open(nombre) as f:
+            df = pd.read_csv(
+                f,
+                encoding=fuente["encoding"],
+                skipinitialspace=True,
+                usecols=lambda c: _canonica(c) in deseadas,
+                dtype=str,
+            )
+
+    df.columns = [_canonica(c) for c in df.columns]
+    for col in COLS_NOMBRE:
+        df[col] = df[col].str.strip().astype("category")
+    for col in COLS_CLAVE:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(-1).astype("int16")
+    # "*" (confidencial) y "N/D" quedan como nulos
+    for col in cols_pob:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int32")
+    return df[COLS_CLAVE + COLS_NOMBRE + cols_pob]
+
+
+def construir_iter(anio, forzar: bool = False):
+    """Descarga el ITER del año indicado y lo guarda como Parquet tipado. Devuelve la ruta.
+
+    El ZIP se baja con descargas_utils (por bloques, reanudable y validado).
+    El censo no cambia: sin `forzar`, un Parquet existente no se vuelve a armar
+    ni se revisa la fuente.
+    """
+    destino = ruta_iter(anio)
+    if not forzar and destino.exists():
+        return destino
+    return almacen_utils.construir(
+        destino, lambda zip_path: _leer_csv_iter(zip_path, anio),
+        origen=lambda: descargas_utils.descargar_archivo(FUENTES_ITER[anio]["url"], timeout=60),
+        forzar=forzar)
+
+
+def construir_iter_2020(forzar: bool = False):
+    return construir_iter(2020, forzar=forzar)
+
+
+# ==========================================
+# LECTURA
+# ==========================================
+def _leer_parquet(ruta, anio):
+    df = pd.read_parquet(ruta, memory_map=True)
+    cols_pob = columnas_poblacion(anio)
+    df[cols_pob] = df[cols_pob].astype("float64")
+    return df
+
+
+def cargar_iter(anio, columnas=None):
+    """Devuelve el ITER del año indicado (construyéndolo si no existe).
+
+    Las columnas de población se entregan como float64 (NaN = dato reservado).
+    El DataFrame se comparte dentro del proceso: no modificarlo en sitio.
+    """
+    df = almacen_utils.cargar_parquet(construir_iter(anio), lambda ruta: _leer_parquet(ruta, anio))
+    if columnas is not None:
+        return df[list(columnas)]
+    return df
+
+
+def cargar_iter_2020(columnas=None):
+    return cargar_iter(2020, columnas)
+
+
+if __name__ == "__main__":
+    # Ingesta manual: python censo_utils.py
+    for _anio in FUENTES_ITER:
+        print(f"Almacén ITER {_anio} listo en: {construir_iter(_anio, forzar=True)}")
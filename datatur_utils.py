@@ -0,0 +1,401 @@
+import codecs
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+import almacen_utils
+import candados_utils
+import descargas_utils
+import rutas_utils
+
+# ==========================================
+# CONFIGURACIÓN: CSV DE DATATUR (ACTIVIDAD HOTELERA)
+# ==========================================
+# Los CSV de DataTur (p. ej. Base70centros.csv) se leen una sola vez con el
+# motor C, por bloques y con tipos explícitos, y se guardan como Parquet
+# tipado en DATA_DIR/datatur. Los notebooks solo leen esa tabla compacta.
+TAM_MUESTRA = 64 * 1024          # bytes para detectar codificación y separador
+FILAS_POR_BLOQUE = 200_000
+SEPARADORES = [";", ",", "\t", "|"]
+
+COLS_NUMERICAS = {
+    "anio": "Int16",
+    "mes": "Int8",
+    "cuartos_disponibles_pd": "float64",
+    "cuartos_ocupados_pd": "float64",
+    "porc_ocupacion": "float64",
+}
+
+MESES = {'ene': 1, 'enero': 1, 'feb': 2, 'febrero': 2, 'mar': 3, 'marzo': 3, 'abr': 4, 'abril': 4,
+         'may': 5, 'mayo': 5, 'jun': 6, 'junio': 6, 'jul': 7, 'julio': 7, 'ago': 8, 'agosto': 8,
+         'sep': 9, 'sept': 9, 'septiembre': 9, 'oct': 10, 'octubre': 10, 'nov': 11, 'noviembre': 11,
+         'dic': 12, 'diciembre': 12}
+
+# Libros Excel dentro de ZIPs (cuadros de llegadas aéreas, conectividad...):
+# cada miembro se lee en un proceso aparte con openpyxl en modo solo lectura
+# y solo valores; las hojas cuyo encabezado no pasa la sonda no se leen
+# completas. La tabla que el notebook arma con esas hojas se guarda por hash
+# del ZIP, así que un ZIP ya visto no se vuelve a parsear.
+EXCEL_WORKERS = int(os.environ.get("AEDM_EXCEL_WORKERS", min(4, os.cpu_count() or 1)))
+FILAS_SONDA = 60
+EXTENSIONES_EXCEL = (".xlsx", ".xlsm", ".xls")
+
+_LOCK = threading.Lock()
+_POOL = None
+_SHA_ZIP = {}    # (ruta, mtime_ns, size) -> sha256
+
+
+def ruta_tabla(url: str):
+    nombre = re.sub(r"[^\w.-]", "_", url.rsplit("/", 1)[-1]) or "datatur"
+    sha = hashlib.sha256(url.encode("utf-8")).hexdigest()[:12]
+    return rutas_utils.subdir("datatur") / f"{sha}_{nombre}.parquet"
+
+
+# ==========================================
+# DETECCIÓN DE FORMATO (SOLO UNA MUESTRA)
+# ==========================================
+def detectar_formato(ruta, tam_muestra: int = TAM_MUESTRA):
+    """(codificación, separador) a partir de los primeros `tam_muestra` bytes."""
+    with open(ruta, "rb") as f:
+        muestra = f.read(tam_muestra)
+
+    if muestra.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encoding = "utf-16"
+    elif muestra.startswith(codecs.BOM_UTF8):
+        encoding = "utf-8-sig"
+    else:
+        # La muestra puede cortar un carácter multibyte: se valida hasta el último salto de línea
+        corte = muestra.rfind(b"\n")
+        try:
+            muestra[:corte if corte > 0 else len(muestra)].decode("utf-8")
+            encoding = "utf-8"
+        except UnicodeDecodeError:
+            encoding = "cp1252"
+
+    texto = muestra.decode(encoding, errors="ignore")
+    primera = next((ln for ln in texto.splitlines() if ln.strip()), "")
+    conteos = {sep: primera.count(sep) for sep in SEPARADORES}
+    sep = max(conteos, key=conteos.get) if any(conteos.values()) else ","
+    return encoding, sep
+
+
+# ==========================================
+# NOMBRES DE COLUMNA
+# ==========================================
+def nombre_canonico(col) -> str:
+    """Nombre normalizado de una columna de DataTur (anio, mes, cuartos_*, categoria...)."""
+    lc = re.sub(r"\s+", " ", str(col).strip()).lower() or "col"
+    if lc in ['año', 'ano'] or lc.startswith('año'): return 'anio'
+    if lc == 'periodo': return 'periodo'
+    if ('cuartos' in lc and 'dispon' in lc) or 'disponibles pr' in lc or 'disp_prom' in lc: return 'cuartos_disponibles_pd'
+    if ('cuartos' in lc and 'ocup' in lc) or 'ocupados pr' in lc or 'ocup_prom' in lc: return 'cuartos_ocupados_pd'
+    if ('porc' in lc and 'ocup' in lc) or 'porcentaje de ocupación' in lc or lc in ['% ocupacion', '% ocupación']: return 'porc_ocupacion'
+    if ('categoria' in lc) or ('categoría' in lc) or ('estrella' in lc) or ('clasificacion' in lc): return 'categoria'
+    if ('tipo centro' in lc) or ('tipo_centro' in lc): return 'tipo_centro'
+    if ('centro turístico' in lc) or ('centro_turistico' in lc) or lc == 'centro' or ('destino' in lc): return 'centro_turistico'
+    if lc == 'mes' or re.search(r'\bmes\b', lc): return 'mes'
+    if ('entidad' in lc) or ('estado' in lc): return 'entidad'
+    return lc
+
+
+# ==========================================
+# INGESTA POR BLOQUES
+# ==========================================
+def _a_numero(s: pd.Series) -> pd.Series:
+    """Número a partir de texto; solo se limpian (comas, %, espacios) los valores que fallan."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype("float64")
+    num = pd.to_numeric(s, errors="coerce")
+    malos = num.isna() & s.notna()
+    if malos.any():
+        limpio = s[malos].astype(str).str.strip().str.replace(",", "", regex=False).str.rstrip("%")
+        num[malos] = pd.to_numeric(limpio, errors="coerce")
+    return num
+
+
+def _por_valor(s: pd.Series, func) -> pd.Series:
+    """Aplica `func` a cada valor distinto (no a cada fila) y devuelve la serie mapeada."""
+    valores = s.cat.categories if isinstance(s.dtype, pd.CategoricalDtype) else s.dropna().unique()
+    return s.map({v: func(v) for v in valores}).astype(object)
+
+
+def _texto(v):
+    v = str(v).strip()
+    return v or None
+
+
+def _mes(v):
+    v = str(v).strip()
+    if v.lower() in MESES:
+        return MESES[v.lower()]
+    try:
+        return float(v.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _limpiar_bloque(bloque: pd.DataFrame, grupos: dict) -> pd.DataFrame:
+    out = {}
+    for nombre, fuentes in grupos.items():
+        s = bloque[fuentes[0]]
+        # Columnas repetidas: primer valor no vacío de izquierda a derecha
+        for extra in fuentes[1:]:
+            s = s.astype(object).where(s.notna(), bloque[extra].astype(object))
+        if nombre == "mes":
+            s = pd.to_numeric(_por_valor(s, _mes), errors="coerce")
+        elif nombre in COLS_NUMERICAS:
+            s = _a_numero(s)
+        else:
+            s = _por_valor(s, _texto).astype("category")
+        out[nombre] = s
+
+    df = pd.DataFrame(out)
+    for col, tipo in COLS_NUMERICAS.items():
+        if col in df.columns:
+            if tipo.startswith("Int"):
+                df[col] = df[col].round().astype(tipo)
+            else:
+                df[col] = df[col].astype(tipo)
+    if "anio" in df.columns:
+        df = df[df["anio"].notna()]
+    return df
+
+
+def _unir_bloques(bloques):
+    if not bloques:
+        return pd.DataFrame()
+    if len(bloques) == 1:
+        return bloques[0].reset_index(drop=True)
+    df = pd.concat(bloques, ignore_index=True)
+    for col in bloques[0].columns:
+        if isinstance(bloques[0][col].dtype, pd.CategoricalDtype):
+            try:
+                df[col] = union_categoricals([b[col] for b in bloques])
+            except TypeError:
+                df[col] = df[col].astype(object).astype("category")
+    return df
+
+
+def leer_csv(ruta, encoding=None, sep=None) -> pd.DataFrame:
+    """Lee un CSV de DataTur con el motor C, por bloques, a columnas canónicas tipadas."""
+    if encoding is None or sep is None:
+        enc_detectado, sep_detectado = detectar_formato(ruta)
+        encoding, sep = encoding or enc_detectado, sep or sep_detectado
+
+    opciones = dict(sep=sep, encoding=encoding, keep_default_na=False,
+                    na_values=["", "N/D", "n/d", "NA", "-"], on_bad_lines="skip", engine="c")
+    if sep != ",":
+        opciones["thousands"] = ","
+    encabezado = pd.read_csv(ruta, nrows=0, **opciones).columns
+    grupos = {}
+    for original in encabezado:
+        grupos.setdefault(nombre_canonico(original), []).append(original)
+    numericas = {o for c, fs in grupos.items() if c in COLS_NUMERICAS and c != "mes" for o in fs}
+
+    def _leer(tipo_numerico):
+        tipos = {o: (tipo_numerico if o in numericas else "category") for o in encabezado}
+        bloques = []
+        with pd.read_csv(ruta, chunksize=FILAS_POR_BLOQUE, dtype=tipos, **opciones) as lector:
+            for bloque in lector:
+                bloque.columns = encabezado
+                bloques.append(_limpiar_bloque(bloque, grupos))
+        return bloques
+
+    try:
+        # Rápido: el parser C convierte directo a float64
+        bloques = _leer("float64")
+    except ValueError:
+        # Alguna celda numérica trae texto ("12%", "s/d"...): leer como texto y limpiar
+        bloques = _leer(str)
+    return _unir_bloques(bloques)
+
+
+def construir_tabla(url: str, headers=None, forzar: bool = False):
+    """Descarga el CSV (por bloques, con TTL) y guarda la tabla Parquet tipada. Devuelve la ruta."""
+    def _armar(csv_path):
+        df = leer_csv(csv_path)
+        if df.shape[1] <= 1:
+            raise ValueError("No se pudo interpretar el CSV de DataTur (una sola columna).")
+        return df
+
+    return almacen_utils.construir(
+        ruta_tabla(url), _armar, origen=lambda: descargas_utils.descargar_archivo(url, headers=headers),
+        forzar=forzar)
+
+
+# ==========================================
+# LECTURA
+# ==========================================
+def cargar_tabla(url: str, headers=None) -> pd.DataFrame:
+    """Tabla limpia del CSV de DataTur (construyéndola si hace falta).
+
+    El DataFrame se comparte dentro del proceso: no modificarlo en sitio.
+    """
+    return almacen_utils.cargar_parquet(construir_tabla(url, headers))
+
+
+# ==========================================
+# LIBROS EXCEL DENTRO DE ZIP (EN PARALELO)
+# ==========================================
+def _celda(v):
+    # Igual que pandas.read_excel: los flotantes enteros se entregan como int
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def _marco(filas) -> pd.DataFrame:
+    """DataFrame sin encabezado (como read_excel(header=None)) sin filas/columnas vacías al final."""
+    filas = [list(f) for f in filas]
+    while filas and all(v is None or v == "" for v in filas[-1]):
+        filas.pop()
+    ancho = max((max((i + 1 for i, v in enumerate(f) if v is not None and v != ""), default=0)
+                 for f in filas), default=0)
+    df = pd.DataFrame([[_celda(v) for v in f[:ancho]] + [None] * (ancho - len(f[:ancho])) for f in filas])
+    return df.where(df.notna(), float("nan")) if len(df) else df
+
+
+def _pasa_sonda(filas, sonda) -> bool:
+    if not sonda:
+        return True
+    patron = re.compile(sonda, re.IGNORECASE)
+    return any(isinstance(v, str) and patron.search(v) for f in filas for v in f)
+
+
+def _hojas_xlsx(datos: bytes, sonda, filas_sonda):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(io.BytesIO(datos), read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            ws.reset_dimensions()   # algunas hojas traen mal la dimensión declarada
+            filas = ws.iter_rows(values_only=True)
+            cabeza = [f for _, f in zip(range(filas_sonda), filas)]
+            if not _pasa_sonda(cabeza, sonda):
+                continue
+            yield ws.title, _marco(cabeza + list(filas))
+    finally:
+        wb.close()
+
+
+def _hojas_xls(datos: bytes, sonda, filas_sonda):
+    hojas = pd.read_excel(io.BytesIO(datos), sheet_name=None, header=None)
+    for nombre, df in hojas.items():
+        cabeza = df.head(filas_sonda).itertuples(index=False, name=None)
+        if _pasa_sonda(cabeza, sonda):
+            yield nombre, df
+
+
+def leer_miembro_excel(zip_path, miembro, sonda=None, filas_sonda=FILAS_SONDA):
+    """[(hoja, DataFrame)] de un Excel dentro del ZIP; solo hojas que pasan la sonda.
+
+    `sonda` es una expresión regular: la hoja se lee completa solo si alguna
+    celda de texto de sus primeras `filas_sonda` filas coincide.
+    """
+    with zipfile.ZipFile(zip_path) as zf:
+        datos = zf.read(miembro)
+    leer = _hojas_xls if miembro.lower().endswith(".xls") else _hojas_xlsx
+    try:
+        return list(leer(datos, sonda, filas_sonda))
+    except Exception:
+        # Libro dañado o protegido: se ignora como antes
+        return []
+
+
+def _pool():
+    global _POOL
+    with _LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=EXCEL_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _POOL
+
+
+def hojas_excel_zip(zip_path, sonda=None, excluir=(), filas_sonda=FILAS_SONDA):
+    """Genera (miembro, hoja, DataFrame) de los Excel del ZIP, en el orden del ZIP.
+
+    Los miembros se leen en paralelo (procesos); si quien consume se detiene
+    antes de terminar, los pendientes se cancelan. `excluir` son textos que,
+    si aparecen en el nombre del miembro, lo descartan.
+    """
+    global _POOL
+    with zipfile.ZipFile(zip_path) as zf:
+        miembros = [n for n in zf.namelist()
+                    if n.lower().endswith(EXTENSIONES_EXCEL)
+                    and not any(x in n.lower() for x in excluir)]
+    if not miembros:
+        return
+
+    zip_path = str(zip_path)
+    futuros = None
+    if EXCEL_WORKERS > 1 and len(miembros) > 1:
+        try:
+            pool = _pool()
+            futuros = [pool.submit(leer_miembro_excel, zip_path, m, sonda, filas_sonda) for m in miembros]
+        except (BrokenProcessPool, OSError, RuntimeError):
+            with _LOCK:
+                _POOL = None
+            futuros = None
+
+    try:
+        for i, m in enumerate(miembros):
+            hojas = None
+            if futuros is not None:
+                try:
+                    hojas = futuros[i].result()
+                except BrokenProcessPool:
+                    with _LOCK:
+                        _POOL = None
+                    futuros = None
+            if hojas is None:
+                hojas = leer_miembro_excel(zip_path, m, sonda, filas_sonda)
+            for hoja, df in hojas:
+                yield m, hoja, df
+    finally:
+        for f in futuros or []:
+            f.cancel()
+
+
+def _sha256(ruta) -> str:
+    # Memo por (ruta, mtime, tamaño): el ZIP descargado no se vuelve a hashear
+    st = os.stat(ruta)
+    llave = (str(ruta), st.st_mtime_ns, st.st_size)
+    with _LOCK:
+        sha = _SHA_ZIP.get(llave)
+    if sha is None:
+        h = hashlib.sha256()
+        with open(ruta, "rb") as f:
+            for bloque in iter(lambda: f.read(descargas_utils.TAM_BLOQUE), b""):
+                h.update(bloque)
+        sha = h.hexdigest()
+        with _LOCK:
+            _SHA_ZIP[llave] = sha
+    return sha
+
+
+def tabla_por_zip(zip_path, nombre: str, construir):
+    """Tabla que `construir()` arma a partir del ZIP, guardada por hash del ZIP.
+
+    `construir` devuelve un DataFrame (o None si el ZIP no sirve, lo que no
+    se guarda). `df.attrs` se conserva en el Parquet. El DataFrame se
+    comparte dentro del proceso: no modificarlo en sitio.
+    """
+    sha = _sha256(zip_path)
+    destino = rutas_utils.subdir("datatur") / f"{nombre}_{sha[:16]}.parquet"
+    if not destino.exists():
+        with candados_utils.candado(str(destino)):
+            if not destino.exists():
+                df = construir()
+                if df is None:
+                    return None
+                almacen_utils.guardar_parquet(df, destino)
+    return almacen_utils.cargar_parquet(destino)
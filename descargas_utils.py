@@ -0,0 +1,267 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import zipfile
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import requests
+
+import candados_utils
+import http_utils
+import rutas_utils
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Descargas grandes (ZIP de DataTur, etc.): se escriben por bloques a disco
+# y nunca se cargan completas en memoria. Si la conexión se corta a medio
+# camino se reanuda con HTTP Range desde el último byte recibido.
+TAM_BLOQUE = 1 << 20       # 1 MiB
+REINTENTOS = 5
+TIMEOUT = 120
+
+
+
+def dir_artefactos(*partes) -> Path:
+    """Directorio compartido de artefactos descargados/extraídos."""
+    ruta = rutas_utils.subdir("artefactos").joinpath(*partes)
+    ruta.mkdir(parents=True, exist_ok=True)
+    return ruta
+
+
+def _ruta_destino(url: str) -> Path:
+    nombre = unquote(Path(urlsplit(url).path).name) or "descarga"
+    sha = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+    return dir_artefactos("descargas") / f"{sha}_{nombre}"
+
+
+def _sha256_archivo(ruta) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(TAM_BLOQUE), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _leer_meta(destino: Path):
+    try:
+        meta = json.loads(destino.with_name(destino.name + ".json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return meta if destino.exists() else None
+
+
+def _escribir_meta(destino: Path, meta: dict):
+    ruta = destino.with_name(destino.name + ".json")
+    tmp = ruta.with_name(f"{ruta.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(tmp, ruta)
+
+
+# ==========================================
+# DESCARGA POR BLOQUES CON REANUDACIÓN
+# ==========================================
+def _total_de(resp) -> int:
+    """Tamaño total anunciado por el servidor (Content-Range o Content-Length)."""
+    rango = resp.headers.get("Content-Range", "")
+    if "/" in rango and not rango.endswith("/*"):
+        return int(rango.rsplit("/", 1)[1])
+    largo = resp.headers.get("Content-Length")
+    return int(largo) if largo and largo.isdigit() else -1
+
+
+def _transferir(url, parcial: Path, headers, timeout, reintentos, condicional=None):
+    """Descarga a `parcial`, reanudando con Range tras cada corte.
+
+    El validador (ETag / Last-Modified) se guarda junto al parcial para que
+    un proceso posterior también pueda reanudar con If-Range. Devuelve los
+    encabezados de la respuesta final, o None si el servidor respondió 304
+    a los encabezados `condicional`.
+
+    Se pide el archivo sin compresión (Accept-Encoding: identity). Si el
+    servidor aun así lo comprime, Content-Length y los rangos se refieren a
+    los bytes comprimidos y no a los que se escriben: esa respuesta no se
+    reanuda ni se compara contra el tamaño anunciado.
+    """
+    s = http_utils.sesion(url)
+    ruta_validador = parcial.with_name(parcial.name + ".validador")
+    try:
+        validador = ruta_validador.read_text(encoding="utf-8") or None
+    except OSError:
+        validador = None
+    ultimo_error = None
+
+    for intento in range(reintentos):
+        recibidos = parcial.stat().st_size if parcial.exists() else 0
+        h = {"Accept-Encoding": "identity", **(headers or {})}
+        if recibidos and validador:
+            h["Range"] = f"bytes={recibidos}-"
+            h["If-Range"] = validador
+        elif condicional:
+            h.update(condicional)
+        try:
+            with s.get(url, headers=h, stream=True, timeout=timeout) as resp:
+                if resp.status_code == 304:
+                    return None
+                if resp.status_code == 416:
+                    # El parcial ya no corresponde al archivo remoto: empezar de cero
+                    parcial.unlink(missing_ok=True)
+                    validador = None
+                    continue
+                resp.raise_for_status()
+                codificado = resp.headers.get("Content-Encoding", "identity").lower() not in ("", "identity")
+                reanuda = resp.status_code == 206
+                if codificado and reanuda:
+                    # Rango sobre bytes comprimidos: no se puede pegar al parcial
+                    parcial.unlink(missing_ok=True)
+                    validador = None
+                    continue
+                validador = None if codificado else (resp.headers.get("ETag") or resp.headers.get("Last-Modified"))
+                ruta_validador.write_text(validador or "", encoding="utf-8")
+                total = -1 if codificado else _total_de(resp)
+                with open(parcial, "ab" if reanuda else "wb") as f:
+                    for bloque in resp.iter_content(chunk_size=TAM_BLOQUE):
+                        f.write(bloque)
+                tamano = parcial.stat().st_size
+                if total < 0 or tamano == total:
+                    ruta_validador.unlink(missing_ok=True)
+                    return resp.headers
+                ultimo_error = IOError(f"Descarga incompleta: {tamano} de {total} bytes")
+        except (requests.ConnectionError, requests.Timeout,
+                requests.exceptions.ChunkedEncodingError) as e:
+            ultimo_error = e
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code not in http_utils.ESTADOS_REINTENTO:
+                raise
+            ultimo_error = e
+        if intento < reintentos - 1:
+            time.sleep(min(http_utils.BACKOFF * (2 ** intento), http_utils.MAX_ESPERA))
+    raise ultimo_error or IOError(f"No se pudo descargar {url}")
+
+
+def descargar_archivo(url: str, headers=None, timeout=TIMEOUT, ttl=None, sha256=None,
+                      tamano=None, reintentos=REINTENTOS) -> Path:
+    """Descarga `url` al directorio de artefactos y devuelve la ruta local.
+
+    - Se escribe por bloques en `<destino>.part` (sin cargarlo en memoria).
+    - Si la conexión se corta, se reanuda con `Range` (validado con If-Range).
+    - Se verifica el tamaño anunciado y, si se indican, `tamano`/`sha256`.
+    - Los ZIP se validan con `zipfile.is_zipfile` (atrapa páginas de error).
+    - Dentro del TTL de la fuente (ver http_utils) no se toca la red; una
+      copia vencida se revalida con ETag/Last-Modified y, si la red falla,
+      se devuelve la copia.
+    """
+    destino = _ruta_destino(url)
+    ttl = http_utils.ttl_para(url) if ttl is None else ttl
+
+    # Una sola descarga por URL en todo el equipo; quien espera encuentra la copia vigente
+    with candados_utils.candado(str(destino)):
+        meta = _leer_meta(destino)
+        if meta is not None and http_utils.vigente(url, meta["obtenido"], ttl):
+            return destino
+
+        condicional = {}
+        if meta is not None:
+            if meta.get("etag"):
+                condicional["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                condicional["If-Modified-Since"] = meta["last_modified"]
+
+        parcial = destino.with_name(destino.name + ".part")
+        try:
+            # Si falla la red el parcial se conserva para reanudarlo después
+            resp_headers = _transferir(url, parcial, headers, timeout, reintentos, condicional)
+        except Exception:
+            if meta is not None:
+                return destino
+            raise
+        if resp_headers is None:
+            _escribir_meta(destino, dict(meta, obtenido=time.time()))
+            return destino
+
+        try:
+            tamano_real = parcial.stat().st_size
+            if tamano is not None and tamano_real != tamano:
+                raise IOError(f"Tamaño inesperado: {tamano_real} bytes (se esperaban {tamano})")
+            sha_real = _sha256_archivo(parcial)
+            if sha256 is not None and sha_real != sha256.lower():
+                raise IOError("El hash SHA-256 del archivo descargado no coincide")
+            if destino.suffix.lower() == ".zip" and not zipfile.is_zipfile(parcial):
+                raise IOError("El archivo descargado no es un ZIP válido")
+        except Exception:
+            # Contenido inválido: no debe reanudarse
+            parcial.unlink(missing_ok=True)
+            if meta is not None:
+                return destino
+            raise
+
+        os.replace(parcial, destino)
+        _escribir_meta(destino, {
+            "url": url,
+            "bytes": tamano_real,
+            "sha256": sha_real,
+            "etag": resp_headers.get("ETag"),
+            "last_modified": resp_headers.get("Last-Modified"),
+            "obtenido": time.time(),
+        })
+    return destino
+
+
+# ==========================================
+# EXTRACCIÓN DE UN SOLO MIEMBRO DEL ZIP
+# ==========================================
+def _como_filtro(coincide):
+    if callable(coincide):
+        return coincide
+    patron = str(coincide).lower()
+    return lambda n: patron in n.lower()
+
+
+def buscar_miembro(zip_path, coincide):
+    """Nombre del primer miembro del ZIP que cumple `coincide` (texto o función)."""
+    filtro = _como_filtro(coincide)
+    with zipfile.ZipFile(zip_path) as zf:
+        return next((n for n in zf.namelist() if not n.endswith("/") and filtro(n)), None)
+
+
+def extraer_miembro(zip_path, coincide, destino=None):
+    """Extrae por bloques solo el miembro pedido y devuelve su ruta (o None).
+
+    Por defecto se guarda en artefactos/extraidos/<zip>/<nombre>, dentro del
+    presupuesto de disco de artefactos_utils (si se desaloja, se vuelve a
+    extraer); si ya está extraído y es más nuevo que el ZIP, no se vuelve a
+    extraer.
+    """
+    zip_path = Path(zip_path)
+    miembro = buscar_miembro(zip_path, coincide)
+    if miembro is None:
+        return None
+
+    en_almacen = destino is None
+    if en_almacen:
+        destino = dir_artefactos("extraidos", zip_path.stem) / Path(miembro).name
+    destino = Path(destino)
+
+    with candados_utils.candado(str(destino)):
+        if destino.exists() and destino.stat().st_mtime >= zip_path.stat().st_mtime:
+            if en_almacen:
+                os.utime(destino)   # marca de uso para el LRU de disco
+            return destino
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        tmp = destino.with_name(f"{destino.name}.{os.getpid()}.tmp")
+        with zipfile.ZipFile(zip_path) as zf, zf.open(miembro) as origen, open(tmp, "wb") as f:
+            shutil.copyfileobj(origen, f, TAM_BLOQUE)
+        os.replace(tmp, destino)
+    if en_almacen:
+        # Import aquí: artefactos_utils importa de este módulo
+        import artefactos_utils
+        artefactos_utils.aplicar_presupuesto_disco(proteger=destino)
+    return destino
+
+
+def obtener_miembro_zip(url, coincide, destino=None, **kw):
+    """Atajo: `descargar_archivo` + `extraer_miembro`."""
+    return extraer_miembro(descargar_archivo(url, **kw), coincide, destino)
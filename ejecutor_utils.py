@@ -0,0 +1,437 @@
+import ctypes
+import io
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import traceback
+from multiprocessing.connection import wait
+from pathlib import Path
+
+import notebook_utils
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Tiempo máximo de pared por ejecución de notebook (s) y memoria residente
+# máxima (MB) de cada proceso del pool; 0 desactiva el límite de memoria.
+TIMEOUT = float(os.environ.get("AEDM_NOTEBOOK_TIMEOUT", 300))
+MEMORIA_MB = float(os.environ.get("AEDM_NOTEBOOK_MEMORIA_MB", 2048))
+# Cada cuánto se revisan plazos y memoria mientras se espera (s)
+INTERVALO = 0.5
+# Cuánto se espera a que un notebook cancelado termine antes de desconectarlo (s)
+GRACIA = float(os.environ.get("AEDM_NOTEBOOK_GRACIA", 5))
+
+
+class TiempoAgotado(Exception):
+    """La ejecución del notebook superó su tiempo máximo."""
+
+
+class MemoriaExcedida(Exception):
+    """La ejecución del notebook superó su memoria máxima."""
+
+
+class Cancelado(BaseException):
+    """La ejecución del notebook se canceló (p. ej. el usuario cambió la selección).
+
+    Hereda de BaseException (como KeyboardInterrupt) para que los
+    `except Exception` del notebook no la atrapen y para que nadie la
+    confunda con un error de los datos (ver candados_utils.unico).
+    """
+
+
+# ==========================================
+# E/S POR HILO
+# ==========================================
+class FlujoPorHilo(io.TextIOBase):
+    """stdin/stdout que redirige a un buffer propio de cada hilo.
+
+    Los notebooks usan print() e input(); con varias sesiones ejecutando a
+    la vez no se puede reemplazar sys.stdout/sys.stdin de forma global.
+    """
+
+    def __init__(self, original):
+        self._original = original
+        self._local = threading.local()
+
+    def asignar(self, buffer):
+        self._local.buffer = buffer
+
+    def _actual(self):
+        return getattr(self._local, "buffer", None) or self._original
+
+    def write(self, s):
+        return self._actual().write(s)
+
+    def flush(self):
+        return self._actual().flush()
+
+    def read(self, n=-1):
+        return self._actual().read(n)
+
+    def readline(self, limit=-1):
+        return self._actual().readline(limit)
+
+
+_FLUJOS = None
+_LOCK_FLUJOS = threading.Lock()
+
+
+def flujos():
+    """(stdout, stdin) por hilo; se instalan una sola vez en `sys` para todo el proceso."""
+    global _FLUJOS
+    with _LOCK_FLUJOS:
+        if _FLUJOS is None:
+            _FLUJOS = (FlujoPorHilo(sys.stdout), FlujoPorHilo(sys.stdin))
+            sys.stdout, sys.stdin = _FLUJOS
+    return _FLUJOS
+
+
+def texto_entradas(entradas) -> str:
+    """Texto de stdin a partir de NOTEBOOK_INPUTS (lista o valor suelto)."""
+    if isinstance(entradas, list):
+        return "".join(f"{x}\n" for x in entradas)
+    if isinstance(entradas, (str, int, float)):
+        return f"{entradas}\n"
+    return ""
+
+
+# ==========================================
+# EJECUCIÓN EN UN HILO DE LA SESIÓN
+# ==========================================
+def _interrumpir(hilo, excepcion):
+    """Lanza `excepcion` dentro de `hilo` en su siguiente instrucción de Python."""
+    if hilo.ident is not None and hilo.is_alive():
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(hilo.ident), ctypes.py_object(excepcion))
+
+
+def _contexto_streamlit():
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    except ImportError:
+        return None, None
+    return get_script_run_ctx(), add_script_run_ctx
+
+
+def _desconectar(hilo):
+    """Quita a `hilo` el contexto de Streamlit: sus `st.*` dejan de llegar a la página."""
+    try:
+        from streamlit.runtime.scriptrunner.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+    except ImportError:
+        return
+    setattr(hilo, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+
+
+def _detener(hilo, espera=0.0) -> bool:
+    """Cancela `hilo` y espera hasta `espera` s; True si terminó.
+
+    Si sigue vivo (bloqueado en código C: time.sleep, lectura de un socket
+    sin timeout...) se desconecta de la página y se abandona.
+    """
+    _interrumpir(hilo, Cancelado)
+    hilo.join(espera)
+    if hilo.is_alive():
+        _desconectar(hilo)
+        return False
+    return True
+
+
+def ejecutar_en_hilo(code, contexto: dict, entradas=None, timeout=TIMEOUT, latido=None,
+                     memoria_mb=MEMORIA_MB):
+    """Ejecuta `code` en un hilo propio y devuelve lo que imprimió.
+
+    - stdout/stdin son del hilo (ver `flujos`), así que la salida de una
+      sesión nunca se mezcla con la de otra.
+    - El hilo hereda el contexto de Streamlit de la sesión, de modo que los
+      `st.*` del notebook se dibujan en la página como antes.
+    - Mientras espera se llama `latido(segundos)` cada INTERVALO; si en ese
+      momento Streamlit interrumpe la corrida (el usuario cambió la
+      selección), el notebook se cancela.
+    - Si pasa de `timeout` segundos se cancela y se lanza `TiempoAgotado`.
+    - Si durante la corrida la memoria residente del proceso crece más de
+      `memoria_mb` MB (0 = sin límite) se cancela y se lanza
+      `MemoriaExcedida`.
+
+    El aislamiento es menor que el de `PoolNotebooks` (que sí corre cada
+    notebook en su propio proceso, pero no puede dibujar en la página):
+
+    - La cancelación se inyecta como excepción en el hilo, así que solo
+      surte efecto en la siguiente instrucción de Python: una llamada
+      bloqueante en C (time.sleep, un socket sin timeout) no se interrumpe.
+      Por eso las descargas de los notebooks deben llevar timeout
+      (http_utils y descargas_utils siempre lo usan). Un hilo que no
+      termina tras GRACIA segundos se desconecta de la página y se reporta
+      como abandonado, no como cancelado; sigue ocupando su memoria hasta
+      que termine.
+    - La memoria no se puede medir por hilo: se mide el crecimiento de todo
+      el proceso, que incluye lo que otras sesiones asignen a la vez.
+
+    Las excepciones del notebook (incluida la de `st.stop()`) se relanzan
+    en el hilo que llamó.
+    """
+    salida_hilo, entrada_hilo = flujos()
+    salida = io.StringIO()
+    estado = {}
+
+    def _correr():
+        salida_hilo.asignar(salida)
+        entrada_hilo.asignar(io.StringIO(texto_entradas(entradas)))
+        try:
+            exec(code, contexto)
+        except BaseException as e:
+            estado["error"] = e
+        finally:
+            salida_hilo.asignar(None)
+            entrada_hilo.asignar(None)
+
+    hilo = threading.Thread(target=_correr, name="notebook", daemon=True)
+    ctx, agregar_ctx = _contexto_streamlit()
+    if ctx is not None:
+        agregar_ctx(hilo, ctx)
+
+    rss_inicial = _rss_mb(os.getpid()) if memoria_mb else None
+    t0 = time.perf_counter()
+    hilo.start()
+    agotado = False
+    excedido = None
+    try:
+        while hilo.is_alive():
+            hilo.join(INTERVALO)
+            transcurrido = time.perf_counter() - t0
+            if hilo.is_alive() and timeout and transcurrido > timeout:
+                agotado = True
+                break
+            if hilo.is_alive() and rss_inicial is not None:
+                crecimiento = (_rss_mb(os.getpid()) or rss_inicial) - rss_inicial
+                if crecimiento > memoria_mb:
+                    excedido = crecimiento
+                    break
+            if hilo.is_alive() and latido is not None:
+                latido(transcurrido)
+    except BaseException:
+        # Rerun/Stop de Streamlit o Ctrl+C: el notebook no debe seguir
+        _detener(hilo)
+        raise
+
+    if agotado:
+        if _detener(hilo, GRACIA):
+            raise TiempoAgotado(f"El notebook excedió {timeout:.0f} s y se canceló")
+        raise TiempoAgotado(f"El notebook excedió {timeout:.0f} s y sigue bloqueado esperando datos; "
+                            "se desconectó de la página")
+    if excedido is not None:
+        detalle = f"El notebook hizo crecer la memoria {excedido:.0f} MB (límite {memoria_mb:.0f} MB)"
+        if _detener(hilo, GRACIA):
+            raise MemoriaExcedida(f"{detalle} y se canceló")
+        raise MemoriaExcedida(f"{detalle} y sigue bloqueado; se desconectó de la página")
+
+    if "error" in estado:
+        raise estado["error"]
+    return salida.getvalue()
+
+
+# ==========================================
+# EJECUCIÓN SIN INTERFAZ (PROCESO TRABAJADOR)
+# ==========================================
+def ejecutar_notebook(ruta, contexto: dict, entradas=None) -> dict:
+    """Ejecuta un notebook sin interfaz y devuelve un dict con el resultado.
+
+    Reemplaza sys.stdout/sys.stdin del proceso: usar solo donde corre un
+    notebook a la vez (los procesos del pool). Igual que en app.py, el
+    notebook puede importar los módulos .py de su carpeta (p. ej.
+    scripts/turismo_backend.py).
+    """
+    res = {"resultado": "ok", "detalle": "", "salida": "", "segundos": 0.0}
+    carpeta = str(Path(ruta).parent)
+    if carpeta not in sys.path:
+        sys.path.insert(0, carpeta)
+    salida = io.StringIO()
+    original_out, original_in = sys.stdout, sys.stdin
+    sys.stdout, sys.stdin = salida, io.StringIO(texto_entradas(entradas))
+
+    t0 = time.perf_counter()
+    try:
+        code = notebook_utils.obtener_codigo_compilado(ruta)
+        exec(code, {"__name__": "__notebook__", "__builtins__": __builtins__, **contexto})
+    except KeyboardInterrupt:
+        raise
+    except BaseException as e:
+        # st.stop() lanza StopException (BaseException): el notebook se detuvo a propósito
+        if type(e).__name__ == "StopException":
+            res["resultado"] = "detenido"
+        else:
+            res["resultado"] = "error"
+            res["detalle"] = f"{type(e).__name__}: {e}"
+            res["traza"] = traceback.format_exc(limit=5)
+    finally:
+        sys.stdout, sys.stdin = original_out, original_in
+        res["segundos"] = time.perf_counter() - t0
+        res["salida"] = salida.getvalue()
+        notebook_utils.registrar_tiempo(ruta, "exec", res["segundos"])
+    return res
+
+
+def _bucle_trabajador(conn):
+    """Proceso del pool: importa lo pesado una vez y atiende notebooks uno a uno."""
+    for modulo in ("pandas", "numpy", "plotly.graph_objects", "plotly.express", "requests", "streamlit"):
+        try:
+            __import__(modulo)
+        except ImportError:
+            pass
+    while True:
+        try:
+            trabajo = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if trabajo is None:
+            return
+        clave, ruta, contexto, entradas = trabajo
+        conn.send((clave, ejecutar_notebook(ruta, contexto, entradas)))
+
+
+def _rss_mb(pid):
+    """Memoria residente de un proceso en MB (Linux /proc); None si no se puede leer."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Trabajador:
+    def __init__(self, mp):
+        self.conn, extremo = mp.Pipe()
+        self.proceso = mp.Process(target=_bucle_trabajador, args=(extremo,), daemon=True)
+        self.proceso.start()
+        extremo.close()
+        self.clave = None
+        self.inicio = None
+
+    def terminar(self):
+        if self.proceso.is_alive():
+            self.proceso.kill()
+        self.proceso.join(5)
+        self.conn.close()
+
+
+class PoolNotebooks:
+    """Pool de procesos "tibios" para ejecutar notebooks sin interfaz.
+
+    Cada proceso ejecuta un notebook a la vez; si uno excede `timeout`
+    segundos o `memoria_mb` de memoria residente, o si se cancela su
+    trabajo, el proceso se mata y se reemplaza por otro. stdout de cada
+    notebook se devuelve en el resultado (`salida`).
+    """
+
+    def __init__(self, workers=4, timeout=TIMEOUT, memoria_mb=MEMORIA_MB):
+        self.workers = max(1, int(workers))
+        self.timeout = timeout
+        self.memoria_mb = memoria_mb
+        self._mp = multiprocessing.get_context("spawn")
+        self._trabajadores = []
+        self._cancelados = set()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _asegurar_trabajadores(self):
+        self._trabajadores = [t for t in self._trabajadores if t.proceso.is_alive()]
+        while len(self._trabajadores) < self.workers:
+            self._trabajadores.append(_Trabajador(self._mp))
+
+    def _reemplazar(self, t):
+        t.terminar()
+        self._trabajadores.remove(t)
+        self._trabajadores.append(_Trabajador(self._mp))
+
+    def cancelar(self, clave):
+        """Cancela un trabajo (pendiente o en curso) por su clave."""
+        with self._lock:
+            self._cancelados.add(clave)
+
+    def ejecutar(self, trabajos, al_terminar=None):
+        """Ejecuta `trabajos` [(clave, ruta, contexto, entradas)] y devuelve
+        [(clave, resultado)] en orden de término.
+        """
+        self._asegurar_trabajadores()
+        pendientes = list(trabajos)[::-1]
+        total = len(pendientes)
+        hechos = []
+
+        def _terminar(clave, res):
+            hechos.append((clave, res))
+            if al_terminar:
+                al_terminar(clave, res, len(hechos), total)
+
+        def _fallo(tipo, detalle, segundos=0.0):
+            return {"resultado": tipo, "detalle": detalle, "salida": "", "segundos": segundos}
+
+        try:
+            while pendientes or any(t.clave is not None for t in self._trabajadores):
+                # Asignar trabajo a los procesos libres
+                for t in self._trabajadores:
+                    while t.clave is None and pendientes:
+                        clave, ruta, contexto, entradas = pendientes.pop()
+                        with self._lock:
+                            cancelado = clave in self._cancelados
+                        if cancelado:
+                            _terminar(clave, _fallo("cancelado", "Cancelado antes de iniciar"))
+                            continue
+                        t.conn.send((clave, str(ruta), contexto, entradas))
+                        t.clave, t.inicio = clave, time.perf_counter()
+
+                ocupados = [t for t in self._trabajadores if t.clave is not None]
+                listos = wait([t.conn for t in ocupados], timeout=INTERVALO)
+                for t in ocupados:
+                    if t.conn in listos:
+                        try:
+                            clave, res = t.conn.recv()
+                        except (EOFError, OSError):
+                            # El proceso murió (p. ej. el sistema lo mató por memoria)
+                            clave = t.clave
+                            res = _fallo("error", "El proceso del notebook terminó inesperadamente",
+                                         time.perf_counter() - t.inicio)
+                            self._reemplazar(t)
+                        t.clave = None
+                        _terminar(clave, res)
+                        continue
+
+                    transcurrido = time.perf_counter() - t.inicio
+                    rss = _rss_mb(t.proceso.pid) if self.memoria_mb else None
+                    with self._lock:
+                        cancelado = t.clave in self._cancelados
+                    if cancelado:
+                        motivo = _fallo("cancelado", "Cancelado durante la ejecución", transcurrido)
+                    elif self.timeout and transcurrido > self.timeout:
+                        motivo = _fallo("tiempo", f"Excedió {self.timeout:.0f} s", transcurrido)
+                    elif rss is not None and rss > self.memoria_mb:
+                        motivo = _fallo("memoria", f"Usó {rss:.0f} MB (límite {self.memoria_mb:.0f} MB)",
+                                        transcurrido)
+                    else:
+                        continue
+                    clave, t.clave = t.clave, None
+                    self._reemplazar(t)
+                    _terminar(clave, motivo)
+        except BaseException:
+            # Ctrl+C o error del llamador: no dejar notebooks corriendo
+            for t in self._trabajadores:
+                if t.clave is not None:
+                    t.clave = None
+                    t.terminar()
+            raise
+        return hechos
+
+    def cerrar(self):
+        for t in self._trabajadores:
+            try:
+                t.conn.send(None)
+            except OSError:
+                pass
+        for t in self._trabajadores:
+            t.proceso.join(2)
+            t.terminar()
+        self._trabajadores = []
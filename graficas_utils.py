@@ -0,0 +1,274 @@
+import base64
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+from cache_utils import huella
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Las series diarias largas (p. ej. ~6,500 puntos del FIX) se reducen antes de
+# mandarlas al navegador: más puntos que píxeles no cambian el trazo, solo
+# inflan el JSON que viaja por el websocket.
+ANCHO_DEFAULT = int(os.environ.get("AEDM_ANCHO_GRAFICA", 1200))   # px
+PUNTOS_POR_PX = float(os.environ.get("AEDM_PUNTOS_POR_PX", 1.5))
+MIN_PUNTOS = 200
+
+# Caché de figuras ya construidas (JSON serializado), compartida por sesiones.
+MAX_FIGURAS_MB = float(os.environ.get("AEDM_FIGURAS_MB", 128))
+
+# Atributos de una traza que son "por punto" y deben recortarse junto con x/y
+_ATRIBUTOS_POR_PUNTO = ("x", "y", "text", "hovertext", "customdata", "ids")
+
+
+def presupuesto_puntos(ancho_px=None) -> int:
+    """Máximo de puntos por traza para una gráfica de `ancho_px` píxeles."""
+    ancho = ancho_px or ANCHO_DEFAULT
+    return max(MIN_PUNTOS, int(ancho * PUNTOS_POR_PX))
+
+
+def _valores(v):
+    """Arreglo de una propiedad por punto (decodifica los {"dtype", "bdata"} de plotly)."""
+    if isinstance(v, dict) and "bdata" in v:
+        arr = np.frombuffer(base64.b64decode(v["bdata"]), dtype=np.dtype(v.get("dtype", "f8")))
+        forma = v.get("shape")
+        if isinstance(forma, str):   # "3, 4"
+            forma = tuple(int(d) for d in forma.split(",") if d.strip())
+        return arr.reshape(forma) if forma else arr
+    return v
+
+
+def _a_numerico(x) -> np.ndarray:
+    """Eje x como float64 (fechas -> ns; categorías -> posición)."""
+    arr = np.asarray(x)
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype("datetime64[ns]").astype("int64").astype("float64")
+    if np.issubdtype(arr.dtype, np.number):
+        return arr.astype("float64")
+    try:
+        return np.asarray(arr, dtype="datetime64[ns]").astype("int64").astype("float64")
+    except (TypeError, ValueError):
+        return np.arange(len(arr), dtype="float64")
+
+
+def _rellenar_huecos(y: np.ndarray) -> np.ndarray:
+    """`y` con los NaN interpolados linealmente (para medir áreas, no para dibujar)."""
+    finitos = np.isfinite(y)
+    if finitos.all() or not finitos.any():
+        return y
+    pos = np.arange(len(y))
+    return np.interp(pos, pos[finitos], y[finitos])
+
+
+# ==========================================
+# ALGORITMOS DE DECIMACIÓN
+# ==========================================
+def indices_lttb(x, y, n: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: índices de `n` puntos representativos.
+
+    Los huecos (NaN) se interpolan solo para comparar áreas; una cubeta
+    dentro de un hueco conserva un índice NaN, así la línea sigue cortada.
+    """
+    y = np.asarray(y, dtype="float64")
+    total = len(y)
+    if n >= total or n < 3:
+        return np.arange(total)
+    x = _a_numerico(x)
+    if not np.isfinite(y).any():
+        return np.linspace(0, total - 1, n).astype(np.int64)
+    y = _rellenar_huecos(y)
+
+    bordes = np.linspace(1, total - 1, n - 1).astype(np.int64)   # n-2 cubetas interiores
+    salida = np.empty(n, dtype=np.int64)
+    salida[0], salida[-1] = 0, total - 1
+    a = 0
+    for i in range(n - 2):
+        ini, fin = bordes[i], bordes[i + 1]
+        # Promedio de la cubeta siguiente (o el último punto)
+        sig_ini, sig_fin = fin, (bordes[i + 2] if i + 2 < len(bordes) else total)
+        mx = x[sig_ini:sig_fin].mean()
+        my = y[sig_ini:sig_fin].mean()
+        xs, ys = x[ini:fin], y[ini:fin]
+        area = np.abs((x[a] - mx) * (ys - y[a]) - (x[a] - xs) * (my - y[a]))
+        a = ini + int(np.nanargmax(area)) if np.isfinite(area).any() else ini
+        salida[i + 1] = a
+    return salida
+
+
+def indices_minmax(y, n: int) -> np.ndarray:
+    """Cubetas de igual tamaño conservando el mínimo y el máximo de cada una.
+
+    Devuelve a lo más `n` índices (primero y último incluidos); una cubeta
+    sin datos conserva su primer índice para que el hueco siga visible.
+    """
+    y = np.asarray(y, dtype="float64")
+    total = len(y)
+    if n >= total or n < 4:
+        return np.arange(total)
+    cubetas = max(1, (n - 2) // 2)
+    bordes = np.linspace(0, total, cubetas + 1).astype(np.int64)
+    idx = [0, total - 1]
+    for ini, fin in zip(bordes[:-1], bordes[1:]):
+        seg = y[ini:fin]
+        if not len(seg):
+            continue
+        if np.isfinite(seg).any():
+            idx.append(ini + int(np.nanargmin(seg)))
+            idx.append(ini + int(np.nanargmax(seg)))
+        else:
+            idx.append(ini)
+    return np.unique(idx)
+
+
+def indices_decimacion(x, y, max_puntos: int, metodo: str = "lttb") -> np.ndarray:
+    """A lo más `max_puntos` índices; siempre incluye extremos (primero, último, mín, máx)."""
+    y = np.asarray(y, dtype="float64")
+    if len(y) <= max_puntos:
+        return np.arange(len(y))
+    if metodo == "minmax":
+        idx = indices_minmax(y, max_puntos)
+    else:
+        # Dos lugares quedan para el mínimo y el máximo globales
+        idx = indices_lttb(x, y, max_puntos - 2)
+    if np.isfinite(y).any():
+        idx = np.union1d(idx, [int(np.nanargmin(y)), int(np.nanargmax(y))])
+    return idx
+
+
+# ==========================================
+# FIGURAS PLOTLY
+# ==========================================
+def _es_linea(traza) -> bool:
+    if traza.type not in ("scatter", "scattergl"):
+        return False
+    modo = traza.mode or "lines"
+    return "lines" in modo
+
+
+def decimar_figura(fig, max_puntos=None, ancho_px=None, metodo: str = "lttb"):
+    """Reduce en sitio los puntos de cada traza de línea de `fig` y la devuelve.
+
+    El presupuesto sale de `max_puntos` o del ancho de la gráfica
+    (`ancho_px`, `fig.layout.width` o ANCHO_DEFAULT). Las barras y las
+    trazas cortas no se tocan.
+    """
+    limite = max_puntos or presupuesto_puntos(ancho_px or fig.layout.width)
+    for traza in fig.data:
+        y = _valores(traza.y)
+        if not _es_linea(traza) or y is None or len(y) <= limite:
+            continue
+        n = len(y)
+        x = _valores(traza.x) if traza.x is not None else np.arange(n)
+        idx = indices_decimacion(x, y, limite, metodo)
+        cambios = {}
+        for attr in _ATRIBUTOS_POR_PUNTO:
+            valor = _valores(getattr(traza, attr, None))
+            if valor is None or isinstance(valor, str):
+                continue
+            arr = np.asarray(valor, dtype=object) if not isinstance(valor, np.ndarray) else valor
+            if len(arr) == n:
+                cambios[attr] = arr[idx]
+        traza.update(cambios)
+    return fig
+
+
+# ==========================================
+# CACHÉ DE FIGURAS
+# ==========================================
+# Cada interacción de Streamlit vuelve a ejecutar las tres pestañas; si la
+# gráfica no cambió (mismo indicador, geografía, paleta, fuente y datos) se
+# reconstruye desde su JSON en lugar de volver a armarla con pandas/plotly.
+_FIGURAS = OrderedDict()   # llave -> (JSON, bytes) (LRU)
+_BYTES_FIGURAS = 0
+_LOCK_FIGURAS = threading.Lock()
+_ACIERTOS = {"aciertos": 0, "fallos": 0}
+
+
+def llave_figura(indicador, estado=None, municipio=None, localidad=None,
+                 paleta=None, fuente=None, datos=None) -> tuple:
+    """Llave de caché de una figura.
+
+    `datos` es cualquier cosa de la que dependa la figura además de la
+    geografía (DataFrames, parámetros, fecha de corte...); entra a la llave
+    como huella SHA-256, así un dato nuevo invalida la figura por sí solo.
+    """
+    h = hashlib.sha256()
+    huella(datos, h)
+    return (indicador, estado, municipio, localidad,
+            tuple(paleta) if paleta is not None else None, fuente, h.hexdigest())
+
+
+def llave_contexto(indicador, contexto, datos=None) -> tuple:
+    """`llave_figura` con la geografía/paleta/fuente que app.py inyecta al notebook."""
+    return llave_figura(
+        indicador,
+        estado=contexto.get("ESTADO_SELECCIONADO"),
+        municipio=contexto.get("MUNICIPIO_SELECCIONADO"),
+        localidad=contexto.get("LOCALIDAD_SELECCIONADA"),
+        paleta=contexto.get("active_palette"),
+        fuente=contexto.get("active_font"),
+        datos=datos,
+    )
+
+
+def figura_en_cache(llave, construir):
+    """Figura de la caché para `llave`; si no está, la arma con `construir()`.
+
+    Se guarda el JSON de la figura (no el objeto) para que cada sesión reciba
+    una copia propia que puede modificar sin afectar a las demás. Las
+    entradas menos usadas se desalojan al pasar de `MAX_FIGURAS_MB`.
+    """
+    global _BYTES_FIGURAS
+    with _LOCK_FIGURAS:
+        entrada = _FIGURAS.get(llave)
+        if entrada is not None:
+            _FIGURAS.move_to_end(llave)
+            _ACIERTOS["aciertos"] += 1
+        else:
+            _ACIERTOS["fallos"] += 1
+    if entrada is not None:
+        return pio.from_json(entrada[0], skip_invalid=True)
+
+    fig = construir()
+    if fig is None:
+        return None
+    texto = pio.to_json(fig, validate=False)
+    tam = len(texto.encode("utf-8"))
+
+    limite = MAX_FIGURAS_MB * 1024 * 1024
+    if tam <= limite:
+        with _LOCK_FIGURAS:
+            previo = _FIGURAS.pop(llave, None)
+            if previo is not None:
+                _BYTES_FIGURAS -= previo[1]
+            _FIGURAS[llave] = (texto, tam)
+            _BYTES_FIGURAS += tam
+            while _BYTES_FIGURAS > limite and _FIGURAS:
+                _, (_, viejo) = _FIGURAS.popitem(last=False)
+                _BYTES_FIGURAS -= viejo
+    return fig
+
+
+def limpiar_figuras():
+    """Vacía la caché de figuras."""
+    global _BYTES_FIGURAS
+    with _LOCK_FIGURAS:
+        _FIGURAS.clear()
+        _BYTES_FIGURAS = 0
+
+
+def uso_figuras() -> dict:
+    """Resumen de la caché de figuras: entradas, bytes, aciertos y fallos."""
+    with _LOCK_FIGURAS:
+        return {
+            "entradas": len(_FIGURAS),
+            "bytes": _BYTES_FIGURAS,
+            "max_mb": MAX_FIGURAS_MB,
+            **_ACIERTOS,
+        }
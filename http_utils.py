@@ -0,0 +1,357 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+import candados_utils
+import rutas_utils
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# TTL (segundos) por fuente. Se busca por sufijo del host; lo que no
+# aparezca aquí usa TTL_DEFAULT. Dentro del TTL la respuesta se sirve desde
+# disco sin tocar la red (compartido entre procesos y reinicios).
+TTL_POR_FUENTE = {
+    "inegi.org.mx": 12 * 3600,          # BIE / BISE / datos abiertos
+    "banxico.org.mx": 6 * 3600,         # SIE
+    "worldbank.org": 24 * 3600,         # API v2
+    "datos.gob.mx": 24 * 3600,          # CKAN
+    "datatur.sectur.gob.mx": 24 * 3600,
+}
+TTL_DEFAULT = 6 * 3600
+
+REINTENTOS = 3
+BACKOFF = 0.8               # segundos, se duplica en cada intento
+MAX_ESPERA = 10             # tope para Retry-After / backoff
+ESTADOS_REINTENTO = {429, 500, 502, 503, 504}
+TIMEOUT_DEFAULT = 30
+
+# Encabezados que no cambian el contenido y no deben partir la llave de caché
+_HEADERS_IGNORADOS = {"user-agent", "accept-encoding", "connection"}
+
+# Credenciales que no deben quedar en los .json del disco: parámetros con
+# estos nombres y segmentos de ruta con forma de token (INEGI pone el suyo,
+# un UUID, como último segmento de la ruta)
+_PARAMS_SECRETOS = {"token", "apikey", "api_key", "key", "access_token", "secret", "password"}
+_SEGMENTO_SECRETO = re.compile(r"^(?:[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}|[0-9a-fA-F]{32,})$")
+
+_SESIONES = {}
+_LOCK = threading.Lock()
+
+
+# ==========================================
+# SESIONES POR HOST (CONEXIONES REUTILIZADAS)
+# ==========================================
+def sesion(url: str) -> requests.Session:
+    """Sesión con pool de conexiones, una por host."""
+    host = urlsplit(url).netloc.lower()
+    with _LOCK:
+        s = _SESIONES.get(host)
+        if s is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers.update({"User-Agent": "Mozilla/5.0 (PhiQus-AEDM)"})
+            _SESIONES[host] = s
+    return s
+
+
+def ttl_para(url: str) -> int:
+    host = urlsplit(url).netloc.lower()
+    for sufijo, ttl in TTL_POR_FUENTE.items():
+        if host == sufijo or host.endswith("." + sufijo):
+            return ttl
+    return TTL_DEFAULT
+
+
+# ==========================================
+# ALMACÉN EN DISCO (DIRECCIONADO POR CONTENIDO)
+# ==========================================
+# meta/<llave>.json  -> estado, encabezados, ETag/Last-Modified, sha del cuerpo
+# blobs/ab/<sha256>  -> cuerpo (respuestas idénticas comparten archivo); cuando
+#                       una URL cambia de cuerpo, el anterior se borra si ya
+#                       ninguna otra lo usa
+def _dir_cache():
+    return rutas_utils.subdir("http_cache")
+
+
+def _url_sin_secretos(url: str) -> str:
+    """`url` con tokens y llaves de API reemplazados por ***."""
+    p = urlsplit(url)
+    ruta = "/".join("***" if _SEGMENTO_SECRETO.match(seg) else seg for seg in p.path.split("/"))
+    query = urlencode([(k, "***" if k.lower() in _PARAMS_SECRETOS else v)
+                       for k, v in parse_qsl(p.query, keep_blank_values=True)])
+    return urlunsplit((p.scheme, p.netloc, ruta, query, p.fragment))
+
+
+def _llave(url, params, headers) -> str:
+    partes = [url]
+    if params:
+        partes.append(urlencode(sorted(params.items()), doseq=True))
+    if headers:
+        partes.extend(
+            f"{k.lower()}:{v}" for k, v in sorted(headers.items())
+            if k.lower() not in _HEADERS_IGNORADOS
+        )
+    return hashlib.sha256("\n".join(partes).encode("utf-8")).hexdigest()
+
+
+def _escribir_atomico(ruta, datos: bytes):
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ruta.with_name(f"{ruta.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(datos)
+    os.replace(tmp, ruta)
+
+
+def _ruta_blob(sha: str):
+    return _dir_cache() / "blobs" / sha[:2] / sha
+
+
+def _leer_meta(llave):
+    ruta = _dir_cache() / "meta" / f"{llave}.json"
+    try:
+        meta = json.loads(ruta.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not _ruta_blob(meta["sha256"]).exists():
+        return None
+    # Los servidores no coinciden en mayúsculas (ETag / etag / Etag)
+    meta["headers"] = CaseInsensitiveDict(meta.get("headers") or {})
+    return meta
+
+
+def _escribir_meta(llave, meta):
+    datos = json.dumps(dict(meta, headers=dict(meta["headers"]))).encode("utf-8")
+    _escribir_atomico(_dir_cache() / "meta" / f"{llave}.json", datos)
+
+
+def _borrar_si_huerfano(sha: str):
+    """Borra el blob `sha` si ya ningún meta lo referencia.
+
+    Si otro proceso acaba de escribir ese mismo cuerpo y aún no guarda su
+    meta, su siguiente lectura no encuentra el blob y vuelve a la red.
+    """
+    for ruta in (_dir_cache() / "meta").glob("*.json"):
+        try:
+            if sha in ruta.read_text(encoding="utf-8"):
+                return
+        except OSError:
+            continue
+    try:
+        _ruta_blob(sha).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _guardar(llave, resp: requests.Response, anterior=None):
+    sha = hashlib.sha256(resp.content).hexdigest()
+    blob = _ruta_blob(sha)
+    if not blob.exists():
+        _escribir_atomico(blob, resp.content)
+    meta = {
+        "url": _url_sin_secretos(resp.url),
+        "status": resp.status_code,
+        "headers": CaseInsensitiveDict(
+            {k: v for k, v in resp.headers.items()
+             if k.lower() in ("content-type", "etag", "last-modified", "content-disposition")}),
+        "encoding": resp.encoding,
+        "sha256": sha,
+        "obtenido": time.time(),
+    }
+    _escribir_meta(llave, meta)
+    if anterior is not None and anterior["sha256"] != sha:
+        _borrar_si_huerfano(anterior["sha256"])
+    return meta
+
+
+def _tocar(llave, meta):
+    meta = dict(meta, url=_url_sin_secretos(meta["url"]), obtenido=time.time())
+    _escribir_meta(llave, meta)
+    return meta
+
+
+def _respuesta_desde_cache(meta, url) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = meta["status"]
+    resp.url = url
+    resp.headers = CaseInsensitiveDict(meta["headers"])
+    resp.encoding = meta.get("encoding")
+    resp._content = _ruta_blob(meta["sha256"]).read_bytes()
+    resp.from_cache = True
+    return resp
+
+
+# ==========================================
+# REVALIDACIÓN FORZADA ("RECARGAR DATOS")
+# ==========================================
+# revalidar.json guarda {prefijo de URL: desde}: las copias en disco de esas
+# URLs obtenidas antes de `desde` se tratan como vencidas (la siguiente
+# consulta hace un GET condicional). Vive en DATA_DIR, así que la marca vale
+# para todos los procesos y réplicas; cada proceso la relee cada
+# REVISION_MARCAS segundos.
+REVISION_MARCAS = 5.0
+# Las marcas más viejas que esto ya no afectan a ninguna copia vigente
+VIDA_MARCAS = 7 * 24 * 3600
+
+_MARCAS = None           # (firma del archivo, {prefijo: desde})
+_MARCAS_REVISADO = 0.0
+
+
+def _ruta_marcas():
+    return _dir_cache() / "revalidar.json"
+
+
+def _leer_marcas():
+    ruta = _ruta_marcas()
+    try:
+        st_ = ruta.stat()
+        firma = (st_.st_mtime_ns, st_.st_size)
+    except OSError:
+        return None, {}
+    if _MARCAS is not None and _MARCAS[0] == firma:
+        return _MARCAS
+    try:
+        return firma, json.loads(ruta.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return firma, {}
+
+
+def _marcas() -> dict:
+    global _MARCAS, _MARCAS_REVISADO
+    if _MARCAS is not None and time.monotonic() - _MARCAS_REVISADO < REVISION_MARCAS:
+        return _MARCAS[1]
+    marcas = _leer_marcas()
+    with _LOCK:
+        _MARCAS, _MARCAS_REVISADO = marcas, time.monotonic()
+    return marcas[1]
+
+
+def revalidar(*prefijos):
+    """Da por vencidas las copias en disco de las URLs que empiezan con algún `prefijo`.
+
+    No borra nada: la siguiente consulta de cada URL hace un GET
+    condicional (ETag/Last-Modified) y, si la red falla, se sigue sirviendo
+    la copia. Lo usan los botones "Recargar datos" de los notebooks.
+    """
+    global _MARCAS, _MARCAS_REVISADO
+    ahora = time.time()
+    with candados_utils.candado("http_revalidar"):
+        marcas = {p: d for p, d in _leer_marcas()[1].items() if ahora - d < VIDA_MARCAS}
+        marcas.update({p: ahora for p in prefijos})
+        _escribir_atomico(_ruta_marcas(), json.dumps(marcas).encode("utf-8"))
+        with _LOCK:
+            _MARCAS, _MARCAS_REVISADO = _leer_marcas(), time.monotonic()
+
+
+def vigente(url: str, obtenido: float, ttl) -> bool:
+    """¿Una copia de `url` obtenida en `obtenido` sigue dentro de `ttl` y sin marca de revalidación?"""
+    if time.time() - obtenido >= ttl:
+        return False
+    return not any(obtenido < desde and url.startswith(p) for p, desde in _marcas().items())
+
+
+# ==========================================
+# DESCARGA CON REINTENTOS
+# ==========================================
+def _get_con_reintentos(url, params, headers, timeout, reintentos, antes_de_red=None, **kw):
+    s = sesion(url)
+    ultimo_error = None
+    for intento in range(reintentos):
+        if antes_de_red is not None:
+            antes_de_red()
+        try:
+            resp = s.get(url, params=params, headers=headers, timeout=timeout, **kw)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            ultimo_error = e
+        else:
+            if resp.status_code not in ESTADOS_REINTENTO or intento == reintentos - 1:
+                return resp
+            ultimo_error = requests.HTTPError(f"HTTP {resp.status_code}", response=resp)
+            retry_after = resp.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                time.sleep(min(int(retry_after), MAX_ESPERA))
+                continue
+        if intento < reintentos - 1:
+            time.sleep(min(BACKOFF * (2 ** intento), MAX_ESPERA))
+    raise ultimo_error
+
+
+def get(url: str, params=None, headers=None, timeout=TIMEOUT_DEFAULT, ttl=None,
+        reintentos=REINTENTOS, cache=True, antes_de_red=None, **kw) -> requests.Response:
+    """GET compartido: sesión por host, caché en disco con TTL por fuente,
+    revalidación con ETag/Last-Modified y reintentos acotados.
+
+    Devuelve un `requests.Response` (las respuestas servidas desde disco
+    traen `from_cache = True`). Si la red falla y existe una copia vencida,
+    se devuelve la copia en lugar de lanzar la excepción. Con caché no se
+    admite `stream=True` (el cuerpo se guarda completo); para archivos
+    grandes use descargas_utils.descargar_archivo.
+
+    `antes_de_red()` se llama antes de cada intento que sale a la red (no en
+    los aciertos de disco); sirve para limitar el ritmo por fuente.
+    """
+    if reintentos < 1:
+        raise ValueError(f"reintentos debe ser al menos 1 (se recibió {reintentos})")
+    if not cache:
+        return _get_con_reintentos(url, params, headers, timeout, reintentos, antes_de_red, **kw)
+
+    if kw.get("stream"):
+        raise ValueError("stream=True no es compatible con la caché en disco; use cache=False")
+
+    ttl = ttl_para(url) if ttl is None else ttl
+    llave = _llave(url, params, headers)
+    url_completa = requests.Request("GET", url, params=params).prepare().url
+    meta = _leer_meta(llave)
+
+    # 1. Copia fresca: sin red
+    if meta is not None and vigente(url, meta["obtenido"], ttl):
+        return _respuesta_desde_cache(meta, url_completa)
+
+    # 2. Copia vencida: GET condicional
+    headers_req = dict(headers or {})
+    if meta is not None:
+        etag = meta["headers"].get("ETag")
+        last_mod = meta["headers"].get("Last-Modified")
+        if etag:
+            headers_req["If-None-Match"] = etag
+        if last_mod:
+            headers_req["If-Modified-Since"] = last_mod
+
+    try:
+        resp = _get_con_reintentos(url, params, headers_req, timeout, reintentos, antes_de_red, **kw)
+    except requests.RequestException:
+        if meta is not None:
+            return _respuesta_desde_cache(meta, url_completa)
+        raise
+
+    if resp.status_code == 304 and meta is not None:
+        return _respuesta_desde_cache(_tocar(llave, meta), url_completa)
+    if resp.status_code == 200:
+        _guardar(llave, resp, anterior=meta)
+        resp.from_cache = False
+        return resp
+    if meta is not None and resp.status_code >= 500:
+        return _respuesta_desde_cache(meta, url_completa)
+    return resp
+
+
+def get_json(url: str, params=None, headers=None, **kw):
+    r = get(url, params=params, headers=headers, **kw)
+    r.raise_for_status()
+    return r.json()
+
+
+def get_bytes(url: str, params=None, headers=None, **kw) -> bytes:
+    r = get(url, params=params, headers=headers, **kw)
+    r.raise_for_status()
+    return r.content
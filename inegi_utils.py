@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import http_utils
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+BASE_URL = "https://www.inegi.org.mx/app/api/indicadores/desarrolladores/jsonxml"
+IDIOMA = "es"
+VERSION = "2.0"
+TIMEOUT = 30
+
+# Límite de peticiones por segundo hacia INEGI (compartido por todo el proceso)
+# y número de hilos para repartir las consultas que no se pueden agrupar.
+MAX_RPS = float(os.environ.get("AEDM_INEGI_RPS", 5))
+MAX_WORKERS = int(os.environ.get("AEDM_INEGI_WORKERS", 4))
+# Máximo de IDs por llamada agrupada (la API acepta "id1,id2,...")
+TAM_LOTE = 25
+
+
+class _Limitador:
+    """Reparte turnos espaciados 1/rps segundos entre todos los hilos."""
+
+    def __init__(self, rps: float):
+        self.intervalo = 1.0 / rps if rps > 0 else 0.0
+        self._siguiente = 0.0
+        self._lock = threading.Lock()
+
+    def esperar(self):
+        if not self.intervalo:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._siguiente)
+            self._siguiente = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+_LIMITADOR = _Limitador(MAX_RPS)
+
+
+# ==========================================
+# PETICIONES
+# ==========================================
+def url_indicador(ids, token, area="00", reciente=False, banco="BISE"):
+    ids_str = ",".join(str(i) for i in ids) if not isinstance(ids, str) else ids
+    return (f"{BASE_URL}/INDICATOR/{ids_str}/{IDIOMA}/{area}/"
+            f"{'true' if reciente else 'false'}/{banco}/{VERSION}/{token}?type=json")
+
+
+def get_json(url, timeout=TIMEOUT):
+    """GET a la API de INEGI respetando el límite de peticiones por segundo.
+
+    El límite solo aplica a lo que sale a la red: las respuestas servidas
+    desde la caché en disco no esperan turno.
+    """
+    r = http_utils.get(url, timeout=timeout, antes_de_red=_LIMITADOR.esperar)
+    r.raise_for_status()
+    return r.json()
+
+
+def en_paralelo(func, items, max_workers=None):
+    """Aplica `func` a cada item con un pool de hilos; conserva el orden.
+
+    Las excepciones se devuelven en la posición del item (no se propagan).
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def _seguro(x):
+        try:
+            return func(x)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=min(max_workers or MAX_WORKERS, len(items))) as ex:
+        return list(ex.map(_seguro, items))
+
+
+def _series_validas(js):
+    return [s for s in (js or {}).get("Series", []) if s.get("OBSERVATIONS")]
+
+
+def obtener_series(ids, token, area="00", reciente=False, banco="BISE", timeout=TIMEOUT):
+    """Descarga varias series en el menor número de llamadas posible.
+
+    Primero pide los IDs agrupados (una llamada por lote). Si el lote falla o
+    faltan IDs en la respuesta, los faltantes se piden uno por uno en
+    paralelo. Devuelve la lista de objetos `Series` crudos del JSON de INEGI
+    (solo los que traen observaciones), en el orden de `ids`.
+    """
+    ids = [str(i) for i in ids]
+    encontradas = {}
+
+    lotes = [ids[i:i + TAM_LOTE] for i in range(0, len(ids), TAM_LOTE)]
+    if len(ids) > 1:
+        urls = [url_indicador(l, token, area, reciente, banco) for l in lotes]
+        for res in en_paralelo(lambda u: get_json(u, timeout), urls):
+            if isinstance(res, Exception):
+                continue
+            for s in _series_validas(res):
+                encontradas.setdefault(str(s.get("INDICADOR")), s)
+
+    faltantes = [i for i in ids if i not in encontradas]
+    if faltantes:
+        urls = [url_indicador([i], token, area, reciente, banco) for i in faltantes]
+        for i, res in zip(faltantes, en_paralelo(lambda u: get_json(u, timeout), urls)):
+            if isinstance(res, Exception):
+                continue
+            series = _series_validas(res)
+            if series:
+                encontradas[i] = series[0]
+
+    return [encontradas[i] for i in ids if i in encontradas]
+
+
+def series_a_df(series) -> pd.DataFrame:
+    """Convierte objetos `Series` de INEGI en una tabla larga.
+
+    Columnas: indicador, periodo, anio, subperiodo, valor.
+    """
+    filas = [
+        (str(s.get("INDICADOR")), o.get("TIME_PERIOD", ""), o.get("OBS_VALUE"))
+        for s in series
+        for o in s.get("OBSERVATIONS", [])
+    ]
+    df = pd.DataFrame(filas, columns=["indicador", "periodo", "valor"])
+    if df.empty:
+        return df.assign(anio=pd.Series(dtype="Int64"), subperiodo=pd.Series(dtype="Int64"))[
+            ["indicador", "periodo", "anio", "subperiodo", "valor"]]
+    df["valor"] = pd.to_numeric(df["valor"].astype(str).str.replace(",", "", regex=False), errors="coerce")
+    partes = df["periodo"].astype(str).str.split("/", n=1, expand=True)
+    df["anio"] = pd.to_numeric(partes[0], errors="coerce").astype("Int64")
+    df["subperiodo"] = (pd.to_numeric(partes[1], errors="coerce").astype("Int64")
+                        if partes.shape[1] > 1 else pd.Series(pd.NA, index=df.index, dtype="Int64"))
+    df = df.dropna(subset=["valor", "anio"])
+    return df[["indicador", "periodo", "anio", "subperiodo", "valor"]].reset_index(drop=True)
+
+
+def obtener_df(ids, token, area="00", reciente=False, banco="BISE", timeout=TIMEOUT) -> pd.DataFrame:
+    """Atajo: `obtener_series` + `series_a_df`."""
+    return series_a_df(obtener_series(ids, token, area, reciente, banco, timeout))
+
+
+def primera_respuesta_valida(urls, es_valida, timeout=TIMEOUT):
+    """Lanza todas las URLs candidatas a la vez y devuelve (indice, json) de la
+    primera válida según el orden de prioridad de `urls`.
+
+    Si ninguna sirve devuelve (None, errores) con errores = [(indice, motivo)].
+    """
+    resultados = en_paralelo(lambda u: get_json(u, timeout), urls)
+    errores = []
+    for i, res in enumerate(resultados):
+        if isinstance(res, Exception):
+            errores.append((i, f"Excepción {res}"))
+        elif es_valida(res):
+            return i, res
+        else:
+            errores.append((i, "respuesta sin observaciones"))
+    return None, errores
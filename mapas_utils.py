@@ -0,0 +1,243 @@
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PathCollection
+from matplotlib.figure import Figure
+from matplotlib.patches import PathPatch
+from matplotlib.path import Path as Trazo
+
+import http_utils
+import rutas_utils
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Geometrías simplificadas de las 32 entidades, convertidas a arreglos de
+# vértices + códigos de trazo de matplotlib. El repo no trae el archivo: se
+# construye la primera vez a partir del GeoJSON de INEGI y se guarda en
+# DATA_DIR/geo. Si se genera en recursos/ (`python mapas_utils.py`), se usa
+# ese y la app no necesita red para el mapa.
+GEOJSON_URL = "https://raw.githubusercontent.com/pato-gg/INEGI-GeoJSON/main/Entidades_M%C3%A9xico.json"
+ARCHIVO = "entidades_mx.npz"
+RUTA_EMPAQUETADA = rutas_utils.BASE_DIR / "recursos" / ARCHIVO
+# Tolerancia de simplificación (grados, ~500 m): invisible a tamaño de pantalla
+TOLERANCIA = 0.005
+# Resolución de la capa base rasterizada (px de ancho)
+ANCHO_BASE_PX = 2400
+
+_MOVETO, _LINETO, _CLOSEPOLY = Trazo.MOVETO, Trazo.LINETO, Trazo.CLOSEPOLY
+
+_NOMBRES_PROP = ['NOMGEO', 'NOM_ENT', 'nom_ent', 'nomgeo', 'nombre', 'state_name',
+                 'Entidad', 'ENTIDAD', 'Name', 'name']
+
+_LOCK = threading.Lock()
+_GEOMETRIAS = None
+_CAPAS_BASE = {}   # (relleno, borde, grosor, ancho_px) -> RGBA uint8
+
+
+# ==========================================
+# CONSTRUCCIÓN DEL ARCHIVO DE GEOMETRÍAS
+# ==========================================
+def _simplificar(anillo: np.ndarray, tol: float) -> np.ndarray:
+    """Douglas-Peucker iterativo; conserva el primer y el último vértice."""
+    n = len(anillo)
+    if n <= 4 or tol <= 0:
+        return anillo
+    conservar = np.zeros(n, dtype=bool)
+    conservar[[0, n - 1]] = True
+    pila = [(0, n - 1)]
+    while pila:
+        i, j = pila.pop()
+        if j - i < 2:
+            continue
+        a, b = anillo[i], anillo[j]
+        seg = anillo[i + 1:j]
+        d = b - a
+        largo = np.hypot(*d)
+        if largo == 0:
+            dist = np.hypot(*(seg - a).T)
+        else:
+            dist = np.abs(d[0] * (seg[:, 1] - a[1]) - d[1] * (seg[:, 0] - a[0])) / largo
+        k = int(np.argmax(dist))
+        if dist[k] > tol:
+            m = i + 1 + k
+            conservar[m] = True
+            pila.extend([(i, m), (m, j)])
+    salida = anillo[conservar]
+    return salida if len(salida) >= 4 else anillo
+
+
+def _anillos(geometria):
+    tipo = geometria.get('type')
+    coords = geometria.get('coordinates', [])
+    if tipo == 'Polygon':
+        yield from coords
+    elif tipo == 'MultiPolygon':
+        for poligono in coords:
+            yield from poligono
+
+
+def _nombre_prop(props: dict):
+    for k in _NOMBRES_PROP:
+        if k in props:
+            return k
+    return next((k for k, v in props.items() if isinstance(v, str) and 3 <= len(v) <= 40), None)
+
+
+def geometrias_desde_geojson(geojson: dict, tol: float = TOLERANCIA) -> dict:
+    """Convierte un GeoJSON de entidades en arreglos listos para matplotlib.
+
+    Devuelve {"nombres", "inicios", "vertices", "codigos"}: los vértices de
+    todas las entidades van concatenados y `inicios[i]:inicios[i+1]` marca
+    los de la entidad i.
+    """
+    feats = geojson.get('features', [])
+    if not feats:
+        raise ValueError("GeoJSON sin 'features'.")
+    clave = _nombre_prop(feats[0].get('properties', {}))
+    if not clave:
+        raise ValueError("No pude detectar el campo de nombre de las entidades.")
+
+    nombres, inicios, vertices, codigos = [], [0], [], []
+    for f in feats:
+        pts, cods = [], []
+        for anillo in _anillos(f.get('geometry') or {}):
+            arr = _simplificar(np.asarray(anillo, dtype='float64')[:, :2], tol)
+            if len(arr) < 3:
+                continue
+            c = np.full(len(arr), _LINETO, dtype='uint8')
+            c[0], c[-1] = _MOVETO, _CLOSEPOLY
+            pts.append(arr)
+            cods.append(c)
+        if not pts:
+            continue
+        nombres.append(str(f.get('properties', {}).get(clave, '')))
+        vertices.append(np.concatenate(pts))
+        codigos.append(np.concatenate(cods))
+        inicios.append(inicios[-1] + len(vertices[-1]))
+
+    return {
+        "nombres": np.array(nombres),
+        "inicios": np.array(inicios, dtype='int64'),
+        "vertices": np.concatenate(vertices).astype('float32'),
+        "codigos": np.concatenate(codigos),
+    }
+
+
+def construir_geometrias(destino=None, url: str = GEOJSON_URL, tol: float = TOLERANCIA):
+    """Descarga el GeoJSON, lo simplifica y guarda el .npz. Devuelve la ruta."""
+    destino = destino or rutas_utils.subdir("geo") / ARCHIVO
+    r = http_utils.get(url, timeout=30)
+    r.raise_for_status()
+    datos = geometrias_desde_geojson(r.json(), tol)
+    tmp = destino.with_name(destino.name + ".tmp.npz")
+    np.savez_compressed(tmp, **datos)
+    tmp.replace(destino)
+    return destino
+
+
+# ==========================================
+# LECTURA
+# ==========================================
+class Geometrias:
+    """Trazos (matplotlib Path) de cada entidad y la extensión del país."""
+
+    def __init__(self, datos):
+        self.nombres = [str(n) for n in datos["nombres"]]
+        inicios, vertices, codigos = datos["inicios"], datos["vertices"], datos["codigos"]
+        self.trazos = {
+            n: Trazo(vertices[a:b], codigos[a:b])
+            for n, a, b in zip(self.nombres, inicios[:-1], inicios[1:])
+        }
+        xmin, ymin = vertices.min(axis=0)
+        xmax, ymax = vertices.max(axis=0)
+        self.extension = (float(xmin), float(xmax), float(ymin), float(ymax))
+
+    def buscar(self, nombre, normalizar=None):
+        """Nombre tal como viene en las geometrías (o None), comparando con `normalizar`."""
+        normalizar = normalizar or (lambda s: s)
+        objetivo = normalizar(nombre)
+        return next((n for n in self.nombres if normalizar(n) == objetivo), None)
+
+
+def cargar_geometrias(url: str = GEOJSON_URL) -> Geometrias:
+    """Geometrías de las entidades (una sola vez por proceso)."""
+    global _GEOMETRIAS
+    with _LOCK:
+        if _GEOMETRIAS is None:
+            ruta = RUTA_EMPAQUETADA
+            if not ruta.exists():
+                ruta = rutas_utils.subdir("geo") / ARCHIVO
+                if not ruta.exists():
+                    construir_geometrias(ruta, url)
+            with np.load(ruta) as datos:
+                _GEOMETRIAS = Geometrias({k: datos[k] for k in datos.files})
+        return _GEOMETRIAS
+
+
+# ==========================================
+# RENDER
+# ==========================================
+def limites(geo: Geometrias, margen: float = 0.02):
+    xmin, xmax, ymin, ymax = geo.extension
+    dx, dy = xmax - xmin, ymax - ymin
+    return xmin - margen * dx, xmax + margen * dx, ymin - margen * dy, ymax + margen * dy
+
+
+def capa_base(geo: Geometrias, relleno, borde, grosor=0.6, ancho_px=ANCHO_BASE_PX) -> np.ndarray:
+    """Las 32 entidades rasterizadas una vez (RGBA) con una sola colección de trazos."""
+    llave = (relleno, borde, grosor, ancho_px)
+    with _LOCK:
+        img = _CAPAS_BASE.get(llave)
+    if img is not None:
+        return img
+
+    x0, x1, y0, y1 = limites(geo)
+    dpi = 100
+    alto_px = int(round(ancho_px * (y1 - y0) / (x1 - x0)))
+    fig = Figure(figsize=(ancho_px / dpi, alto_px / dpi), dpi=dpi)
+    fig.patch.set_alpha(0)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.axis('off')
+    # El grosor se da en puntos a la escala de la figura final (~1200 px)
+    escala = ancho_px / 1200
+    ax.add_collection(PathCollection(list(geo.trazos.values()), facecolors=relleno,
+                                     edgecolors=borde, linewidths=grosor * escala))
+    ax.set_xlim(x0, x1)
+    ax.set_ylim(y0, y1)
+    canvas.draw()
+    img = np.asarray(canvas.buffer_rgba()).copy()
+
+    with _LOCK:
+        _CAPAS_BASE[llave] = img
+    return img
+
+
+def mapa_resaltado(ax, nombre, color, relleno, borde, grosor_base=0.6, grosor=0.8, geo=None):
+    """Dibuja en `ax` la capa base (cacheada) y encima solo la entidad `nombre`.
+
+    Lanza ValueError si la entidad no está en las geometrías.
+    """
+    geo = geo or cargar_geometrias()
+    trazo = geo.trazos.get(nombre)
+    if trazo is None:
+        raise ValueError(f"No pude ubicar '{nombre}' en las geometrías.")
+
+    x0, x1, y0, y1 = limites(geo)
+    ax.imshow(capa_base(geo, relleno, borde, grosor_base), extent=(x0, x1, y0, y1),
+              interpolation='antialiased', zorder=1)
+    ax.add_patch(PathPatch(trazo, facecolor=color, edgecolor=color, linewidth=grosor, zorder=2))
+    ax.set_xlim(x0, x1)
+    ax.set_ylim(y0, y1)
+    ax.set_aspect('equal', adjustable='box')
+    return ax
+
+
+if __name__ == "__main__":
+    # Genera el archivo empaquetado: python mapas_utils.py [destino]
+    _destino = Path(sys.argv[1]) if len(sys.argv) > 1 else RUTA_EMPAQUETADA
+    print(f"Geometrías listas en: {construir_geometrias(_destino)}")
@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+# ==========================================
+# CACHÉ DE CÓDIGO COMPILADO (POR PROCESO)
+# ==========================================
+# Streamlit vuelve a ejecutar app.py en cada interacción, pero los módulos
+# importados viven mientras viva el proceso. Aquí guardamos el código ya
+# compilado de cada notebook para no releer ni recompilar el .ipynb en cada
+# rerun; la llave incluye mtime y tamaño, así que editar el archivo invalida
+# la entrada automáticamente.
+_CACHE_CODIGO = {}   # ruta -> ((mtime_ns, size), code)
+_METRICAS = {}       # ruta -> {"parse": s, "compile": s, "exec": s, ...}
+_LOCK = threading.Lock()
+
+
+def _firma(p: Path):
+    st_ = p.stat()
+    return (st_.st_mtime_ns, st_.st_size)
+
+
+def leer_codigo_fuente(p: Path) -> str:
+    """Devuelve el código fuente ejecutable de un .ipynb o .py."""
+    if p.suffix == '.ipynb':
+        with p.open('r', encoding='utf-8') as f:
+            notebook = json.load(f)
+        return "".join(
+            "".join(cell.get('source', [])) + "\n\n"
+            for cell in notebook.get('cells', []) if cell.get('cell_type') == 'code'
+        )
+    if p.suffix == '.py':
+        return p.read_text(encoding='utf-8')
+    raise ValueError(f"Formato no soportado: {p.suffix}")
+
+
+def registrar_tiempo(ruta, etapa: str, segundos: float):
+    """Acumula el último tiempo medido de una etapa (parse/compile/exec)."""
+    with _LOCK:
+        m = _METRICAS.setdefault(str(ruta), {"ejecuciones": 0})
+        m[etapa] = segundos
+        if etapa == "exec":
+            m["ejecuciones"] += 1
+
+
+def obtener_codigo_compilado(notebook_path):
+    """Devuelve el `code` compilado del notebook, recompilando solo si cambió.
+
+    Lanza las excepciones de lectura (JSON/IO) y `SyntaxError` tal cual para
+    que el llamador decida cómo mostrarlas.
+    """
+    p = Path(notebook_path)
+    ruta = str(p)
+    firma = _firma(p)
+
+    with _LOCK:
+        entrada = _CACHE_CODIGO.get(ruta)
+    if entrada is not None and entrada[0] == firma:
+        return entrada[1]
+
+    t0 = time.perf_counter()
+    fuente = leer_codigo_fuente(p)
+    t1 = time.perf_counter()
+    code = compile(fuente, ruta, 'exec')
+    t2 = time.perf_counter()
+
+    with _LOCK:
+        _CACHE_CODIGO[ruta] = (firma, code)
+    registrar_tiempo(ruta, "parse", t1 - t0)
+    registrar_tiempo(ruta, "compile", t2 - t1)
+    return code
+
+
+def obtener_metricas() -> dict:
+    """Copia de los tiempos registrados por notebook (segundos)."""
+    with _LOCK:
+        return {k: dict(v) for k, v in _METRICAS.items()}
+
+
+def limpiar_cache_codigo():
+    with _LOCK:
+        _CACHE_CODIGO.clear()
@@ -0,0 +1,190 @@
+"""
+Nombres de países en español sin servicios externos.
+
+La tabla empaquetada recursos/paises_es.csv (ISO3 → nombre en español, más
+el nombre en inglés del Banco Mundial y alias) se carga una vez en
+diccionarios; las búsquedas por código o por nombre son O(1). Las
+correcciones locales van en <DATA_DIR>/paises/nombres_es.csv (columnas
+iso3,nombre_es) o en el archivo que indique AEDM_PAISES_OVERRIDE, y tienen
+prioridad sobre la tabla empaquetada.
+
+Si un código no está en ninguna de las dos, se usa el nombre de respaldo
+(p. ej. el del Banco Mundial, en inglés) y, si `deep_translator` está
+instalado y AEDM_PAISES_TRADUCIR no es "0", se traduce en segundo plano y
+se guarda en el archivo de correcciones para la siguiente ejecución.
+"""
+import csv
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+import rutas_utils
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+RUTA_TABLA = rutas_utils.BASE_DIR / "recursos" / "paises_es.csv"
+TRADUCIR = os.environ.get("AEDM_PAISES_TRADUCIR", "1") == "1"
+# Cada cuántos segundos se revisa si cambió el archivo de correcciones
+REVISION = 5.0
+
+log = logging.getLogger("paises_utils")
+
+_LOCK = threading.Lock()
+_TABLA = None        # (firma de correcciones, {iso3: nombre_es}, {clave: iso3})
+_REVISADO = 0.0
+_PENDIENTES = {}     # iso3 -> nombre de respaldo por traducir
+_HILO = None
+
+
+def ruta_correcciones() -> Path:
+    ruta = os.environ.get("AEDM_PAISES_OVERRIDE")
+    return Path(ruta) if ruta else rutas_utils.subdir("paises") / "nombres_es.csv"
+
+
+def clave(texto) -> str:
+    """Forma normalizada de un nombre: sin acentos, minúsculas, sin puntuación."""
+    s = unicodedata.normalize("NFD", str(texto))
+    s = "".join(c for c in s if unicodedata.category(c) != "Mn").lower()
+    s = re.sub(r"[^a-z0-9]+", " ", s)
+    return s.strip()
+
+
+def _leer_csv(ruta):
+    with open(ruta, encoding="utf-8", newline="") as fh:
+        return list(csv.DictReader(fh))
+
+
+def _firma(ruta):
+    try:
+        st_ = ruta.stat()
+        return (st_.st_mtime_ns, st_.st_size)
+    except OSError:
+        return None
+
+
+def _tabla():
+    """Diccionarios de búsqueda; se reconstruyen solo si cambió el archivo de correcciones."""
+    global _TABLA, _REVISADO
+    tabla = _TABLA
+    if tabla is not None and time.monotonic() - _REVISADO < REVISION:
+        return tabla[1:]
+    ruta = ruta_correcciones()
+    firma = _firma(ruta)
+    with _LOCK:
+        _REVISADO = time.monotonic()
+        if _TABLA is not None and _TABLA[0] == firma:
+            return _TABLA[1:]
+        nombres, por_clave = {}, {}
+        for fila in _leer_csv(RUTA_TABLA):
+            iso3 = fila["iso3"]
+            nombres[iso3] = fila["nombre_es"]
+            for texto in [iso3, fila["nombre_es"], fila["nombre_en"], *fila["alias"].split(";")]:
+                if texto.strip():
+                    por_clave.setdefault(clave(texto), iso3)
+        if firma is not None:
+            for fila in _leer_csv(ruta):
+                iso3 = (fila.get("iso3") or "").strip().upper()
+                if iso3 and (fila.get("nombre_es") or "").strip():
+                    nombres[iso3] = fila["nombre_es"].strip()
+                    por_clave[clave(iso3)] = iso3
+                    por_clave[clave(nombres[iso3])] = iso3
+        _TABLA = (firma, nombres, por_clave)
+        return nombres, por_clave
+
+
+# ==========================================
+# TRADUCCIÓN EN SEGUNDO PLANO (OPCIONAL)
+# ==========================================
+def guardar_correccion(iso3: str, nombre: str):
+    """Agrega o reemplaza el nombre en español de `iso3` en el archivo de correcciones."""
+    global _TABLA
+    ruta = ruta_correcciones()
+    with _LOCK:
+        filas = {f["iso3"]: f["nombre_es"] for f in _leer_csv(ruta)} if ruta.exists() else {}
+        filas[iso3.upper()] = nombre
+        tmp = ruta.with_name(f"{ruta.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8", newline="") as fh:
+            w = csv.writer(fh, lineterminator="\n")
+            w.writerow(["iso3", "nombre_es"])
+            w.writerows(sorted(filas.items()))
+        os.replace(tmp, ruta)
+        _TABLA = None
+
+
+def _traducir_pendientes():
+    global _HILO
+    try:
+        from deep_translator import GoogleTranslator
+    except ImportError:
+        with _LOCK:
+            _PENDIENTES.clear()
+            _HILO = None
+        return
+    while True:
+        with _LOCK:
+            if not _PENDIENTES:
+                _HILO = None
+                return
+            lote = dict(_PENDIENTES)
+        try:
+            traducidos = GoogleTranslator(source="en", target="es").translate_batch(list(lote.values()))
+            for iso3, nombre in zip(lote, traducidos):
+                if nombre:
+                    guardar_correccion(iso3, nombre)
+        except Exception as e:
+            log.warning("No se pudieron traducir %s (%s)", ", ".join(lote), e)
+        with _LOCK:
+            for iso3 in lote:
+                _PENDIENTES.pop(iso3, None)
+
+
+def _encolar(iso3, respaldo):
+    global _HILO
+    if not TRADUCIR:
+        return
+    with _LOCK:
+        _PENDIENTES.setdefault(iso3, respaldo)
+        if _HILO is None:
+            _HILO = threading.Thread(target=_traducir_pendientes, name="traduccion-paises", daemon=True)
+            _HILO.start()
+
+
+# ==========================================
+# CONSULTAS
+# ==========================================
+def nombre_es(iso3: str, respaldo=None) -> str:
+    """Nombre en español de un código ISO3.
+
+    Si el código no está en la tabla se devuelve `respaldo` (o el código) y,
+    cuando hay respaldo, se encola su traducción en segundo plano.
+    """
+    nombres, _ = _tabla()
+    nombre = nombres.get(str(iso3).upper())
+    if nombre is not None:
+        return nombre
+    if respaldo:
+        _encolar(str(iso3).upper(), respaldo)
+        return respaldo
+    return str(iso3)
+
+
+def iso3_de(nombre):
+    """Código ISO3 de un nombre en español o inglés (o de un código); None si no se reconoce."""
+    return _tabla()[1].get(clave(nombre))
+
+
+def a_espanol(nombre):
+    """Nombre canónico en español de un país escrito de cualquier forma reconocida; si no, el original."""
+    nombres, por_clave = _tabla()
+    iso3 = por_clave.get(clave(nombre))
+    return nombres[iso3] if iso3 else nombre
+
+
+def serie_a_espanol(serie):
+    """`a_espanol` sobre una Serie de pandas (una búsqueda por valor distinto)."""
+    return serie.map({v: a_espanol(v) for v in serie.dropna().unique()})
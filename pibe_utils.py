@@ -0,0 +1,155 @@
+import csv
+import io
+import re
+import zipfile
+from pathlib import PurePosixPath
+
+import pandas as pd
+
+import almacen_utils
+import descargas_utils
+import rutas_utils
+
+# ==========================================
+# CONFIGURACIÓN: PIB POR ENTIDAD FEDERATIVA (PIBE, BASE 2018)
+# ==========================================
+ZIP_URL = "https://www.inegi.org.mx/contenidos/programas/pibent/2018/datosabiertos/conjunto_de_datos_piber_csv.zip"
+ENCODING = "latin-1"
+
+# Clave del nombre de archivo (…entidad_<clave>20…) -> nombre oficial
+ENTIDADES = {
+    'ags': 'Aguascalientes', 'bc': 'Baja California', 'bcs': 'Baja California Sur', 'camp': 'Campeche',
+    'coah': 'Coahuila de Zaragoza', 'col': 'Colima', 'chis': 'Chiapas', 'chih': 'Chihuahua',
+    'cdmx': 'Ciudad de México', 'dgo': 'Durango', 'gto': 'Guanajuato', 'gro': 'Guerrero',
+    'hgo': 'Hidalgo', 'jal': 'Jalisco', 'mex': 'México', 'mich': 'Michoacán de Ocampo',
+    'mor': 'Morelos', 'nay': 'Nayarit', 'nl': 'Nuevo León', 'oax': 'Oaxaca', 'pue': 'Puebla',
+    'qro': 'Querétaro', 'qr': 'Quintana Roo', 'slp': 'San Luis Potosí', 'sin': 'Sinaloa',
+    'son': 'Sonora', 'tab': 'Tabasco', 'tamps': 'Tamaulipas', 'tlax': 'Tlaxcala',
+    'ver': 'Veracruz de Ignacio de la Llave', 'yuc': 'Yucatán', 'zac': 'Zacatecas',
+    'nac': 'Estados Unidos Mexicanos',
+}
+
+_PATRON_ENTIDAD = re.compile(r"entidad_([a-z]+)20")
+_PATRON_INDICE = re.compile(r"i[íi]?ndice\.csv$", re.I)
+_PATRON_ANIO = re.compile(r"(19|20)\d{2}")
+
+COLUMNAS = ["clave", "entidad", "orden", "actividad", "anio", "valor"]
+
+
+def ruta_pibe():
+    return rutas_utils.subdir("pibe") / "pibe_entidades.parquet"
+
+
+# ==========================================
+# INGESTA (UNA PASADA POR EL ZIP)
+# ==========================================
+def _archivos_indice(zf):
+    """Nombres de archivo listados en el índice del ZIP (vacío si no hay índice)."""
+    nombre = next((n for n in zf.namelist() if _PATRON_INDICE.search(n)), None)
+    if nombre is None:
+        return set()
+    with zf.open(nombre) as f:
+        filas = csv.reader(io.TextIOWrapper(f, encoding=ENCODING, newline=""))
+        return {PurePosixPath(r[0].strip()).name for r in filas if len(r) >= 2 and r[0].strip()}
+
+
+def _miembros_por_entidad(zf):
+    """{clave: miembro} con el primer CSV de datos de cada entidad."""
+    en_indice = _archivos_indice(zf)
+    miembros = {}
+    for n in zf.namelist():
+        base = PurePosixPath(n).name
+        if not base.lower().endswith(".csv") or (en_indice and base not in en_indice):
+            continue
+        m = _PATRON_ENTIDAD.search(base.lower())
+        if m and m.group(1) in ENTIDADES:
+            miembros.setdefault(m.group(1), n)
+    return miembros
+
+
+def _leer_entidad(zf, miembro, clave) -> pd.DataFrame:
+    """CSV de una entidad (actividades × años) en formato largo."""
+    with zf.open(miembro) as f:
+        df = pd.read_csv(f, encoding=ENCODING, dtype=str)
+
+    # Primera columna con cada año (las siguientes con el mismo año se ignoran)
+    cols_anio = {}
+    for c in df.columns[1:]:
+        m = _PATRON_ANIO.search(str(c))
+        if m:
+            cols_anio.setdefault(int(m.group(0)), c)
+    if not cols_anio:
+        return pd.DataFrame(columns=COLUMNAS)
+
+    ancho = pd.DataFrame({
+        "actividad": df.iloc[:, 0].astype(str).str.strip(),
+        "orden": range(len(df)),
+    })
+    for anio, c in cols_anio.items():
+        ancho[anio] = pd.to_numeric(df[c].astype(str).str.strip().str.replace(",", "", regex=False),
+                                    errors="coerce")
+    largo = ancho.melt(id_vars=["orden", "actividad"], var_name="anio", value_name="valor")
+    largo["clave"] = clave
+    largo["entidad"] = ENTIDADES[clave]
+    return largo.dropna(subset=["valor"])[COLUMNAS]
+
+
+def _leer_zip(zip_path) -> pd.DataFrame:
+    with zipfile.ZipFile(zip_path) as zf:
+        miembros = _miembros_por_entidad(zf)
+        if not miembros:
+            raise FileNotFoundError("No se encontraron CSV por entidad en el ZIP del PIBE.")
+        partes = [_leer_entidad(zf, m, clave) for clave, m in sorted(miembros.items())]
+
+    df = pd.concat(partes, ignore_index=True)
+    for col in ("clave", "entidad", "actividad"):
+        df[col] = df[col].astype("category")
+    df["orden"] = df["orden"].astype("int16")
+    df["anio"] = df["anio"].astype("int16")
+    df["valor"] = df["valor"].astype("float64")
+    return df.sort_values(["clave", "orden", "anio"]).reset_index(drop=True)
+
+
+def construir_pibe(url: str = ZIP_URL, forzar: bool = False):
+    """Convierte el ZIP del PIBE en una sola tabla Parquet (entidad × actividad × año).
+
+    El ZIP se descarga con `descargas_utils` (TTL de INEGI, revalidación
+    condicional); la tabla solo se reconstruye cuando el ZIP local es más
+    nuevo que ella. Devuelve la ruta del Parquet.
+    """
+    return almacen_utils.construir(
+        ruta_pibe(), _leer_zip, origen=lambda: descargas_utils.descargar_archivo(url, timeout=180),
+        forzar=forzar)
+
+
+# ==========================================
+# LECTURA
+# ==========================================
+def cargar_pibe(url: str = ZIP_URL) -> pd.DataFrame:
+    """Tabla completa del PIBE (construyéndola si hace falta).
+
+    El DataFrame se comparte dentro del proceso: no modificarlo en sitio.
+    """
+    return almacen_utils.cargar_parquet(construir_pibe(url))
+
+
+def serie_entidad(entidad: str, actividad=r"Producto\s*interno\s*bruto", url: str = ZIP_URL) -> pd.Series:
+    """Serie anual (índice = año) de la primera actividad de `entidad` que coincide con `actividad`.
+
+    `entidad` es el nombre oficial (ver ENTIDADES) o su clave. Serie vacía
+    si la entidad o la actividad no existen.
+    """
+    df = cargar_pibe(url)
+    clave = entidad if entidad in ENTIDADES else next(
+        (k for k, v in ENTIDADES.items() if v == entidad), None)
+    sel = df[df["clave"] == clave]
+    sel = sel[sel["actividad"].astype(str).str.contains(actividad, case=False, regex=True, na=False)]
+    if sel.empty:
+        return pd.Series(dtype="float64", name="valor")
+    sel = sel[sel["orden"] == sel["orden"].min()]
+    return sel.set_index("anio")["valor"].sort_index()
+
+
+if __name__ == "__main__":
+    # Ingesta manual: python pibe_utils.py
+    print(f"Almacén PIBE listo en: {construir_pibe(forzar=True)}")
@@ -0,0 +1,176 @@
+"""
+Precarga de datos en disco: ejecuta sin interfaz todos los reportes fijos
+(19 nacionales + 32 estados × 7 reportes estatales) para dejar listos los
+almacenes compartidos en disco (caché HTTP, descargas, tablas Parquet y la
+caché compartida de las regiones con `compartida=True`).
+
+No calienta st.cache_data ni la memoria de los procesos de Streamlit (corre
+fuera de ellos): la primera consulta de cada proceso de la app sigue armando
+su caché en memoria, pero a partir de estos archivos y sin tocar la red.
+
+Uso (por ejemplo desde cron, antes del horario de oficina):
+
+    python precargar_datos.py                     # todo
+    python precargar_datos.py --nivel estado --estado "Nuevo León"
+    python precargar_datos.py --indicador "PIB por sectores" --workers 8
+
+Al terminar imprime, por indicador, el tiempo total/máximo y las fallas, y
+guarda el detalle en <DATA_DIR>/precarga/ultimo_reporte.json.
+"""
+import argparse
+import json
+import sys
+import time
+
+import catalogo_utils
+import ejecutor_utils
+import rutas_utils
+
+NOTEBOOK_DIR = rutas_utils.BASE_DIR / "scripts"
+WORKERS = 4
+PALETA_DEFAULT = ["#0576F3", "#36F48C", "#F47806", "#F479F4", "#F3F40B"]
+FUENTE_DEFAULT = "Aptos Light"
+
+
+# ==========================================
+# TAREAS
+# ==========================================
+def construir_tareas(nivel="todos", estados=None, indicadores=None):
+    """Lista de tareas (nivel, indicador, estado, archivo, contexto)."""
+    estados = estados or catalogo_utils.ESTADOS_MEXICANOS
+    base = {"active_palette": PALETA_DEFAULT, "active_font": FUENTE_DEFAULT}
+    tareas = []
+
+    if nivel in ("todos", "pais"):
+        for ind in catalogo_utils.OPCIONES_PAIS_ORDENADAS:
+            if indicadores and ind not in indicadores:
+                continue
+            ctx = dict(base)
+            if ind == "Flujo de inversión extranjera para un Estado":
+                ctx.update(NOTEBOOK_INPUTS=[estados[0]], ESTADO_RESALTADO=estados[0])
+            tareas.append(("pais", ind, None, catalogo_utils.RUTAS_PAIS[ind], ctx))
+
+    if nivel in ("todos", "estado"):
+        for ind in catalogo_utils.OPCIONES_ESTADO_ORDENADAS:
+            if indicadores and ind not in indicadores:
+                continue
+            for edo in estados:
+                ctx = dict(base, ESTADO_SELECCIONADO=edo)
+                tareas.append(("estado", ind, edo, catalogo_utils.RUTAS_ESTADO[ind], ctx))
+    return tareas
+
+
+def precargar(tareas, workers=WORKERS, al_terminar=None, timeout=ejecutor_utils.TIMEOUT,
+                memoria_mb=ejecutor_utils.MEMORIA_MB):
+    """Ejecuta las tareas en un pool de procesos y devuelve la lista de resultados.
+
+    Cada notebook corre en un proceso aparte con tiempo y memoria acotados
+    (ver `ejecutor_utils.PoolNotebooks`): uno que se cuelga o se dispara en
+    memoria se cancela sin tumbar a los demás.
+    """
+    trabajos = []
+    for i, (nivel, indicador, estado, archivo, contexto) in enumerate(tareas):
+        contexto = dict(contexto)
+        entradas = contexto.pop("NOTEBOOK_INPUTS", None) or []
+        trabajos.append((i, NOTEBOOK_DIR / archivo, contexto, entradas))
+
+    resultados = []
+
+    def _terminar(i, res, hechas, total):
+        nivel, indicador, estado, archivo, _ = tareas[i]
+        res = {"nivel": nivel, "indicador": indicador, "estado": estado, "notebook": archivo, **res}
+        res.pop("salida", None)
+        resultados.append(res)
+        if al_terminar:
+            al_terminar(res, hechas, total)
+
+    with ejecutor_utils.PoolNotebooks(workers, timeout=timeout, memoria_mb=memoria_mb) as pool:
+        pool.ejecutar(trabajos, al_terminar=_terminar)
+    return resultados
+
+
+# ==========================================
+# REPORTE
+# ==========================================
+def resumir(resultados):
+    """Agrupa por indicador: corridas, fallas, segundos totales y máximos."""
+    resumen = {}
+    for r in resultados:
+        m = resumen.setdefault(r["indicador"], {
+            "nivel": r["nivel"], "corridas": 0, "fallas": 0,
+            "segundos_total": 0.0, "segundos_max": 0.0, "errores": [],
+        })
+        m["corridas"] += 1
+        m["segundos_total"] += r["segundos"]
+        m["segundos_max"] = max(m["segundos_max"], r["segundos"])
+        if r["resultado"] not in ("ok", "detenido"):
+            m["fallas"] += 1
+            m["errores"].append({"estado": r["estado"], "detalle": r["detalle"]})
+    return resumen
+
+
+def imprimir_resumen(resumen, total_segundos, salida=sys.stdout):
+    print(f"\n{'Indicador':<60} {'Corridas':>8} {'Fallas':>7} {'Total s':>9} {'Máx s':>8}", file=salida)
+    print("-" * 96, file=salida)
+    for ind, m in sorted(resumen.items(), key=lambda kv: -kv[1]["segundos_total"]):
+        print(f"{ind[:60]:<60} {m['corridas']:>8} {m['fallas']:>7} "
+              f"{m['segundos_total']:>9.1f} {m['segundos_max']:>8.1f}", file=salida)
+        for err in m["errores"][:3]:
+            print(f"    ✗ {err['estado'] or 'nacional'}: {err['detalle'][:120]}", file=salida)
+        if len(m["errores"]) > 3:
+            print(f"    … y {len(m['errores']) - 3} fallas más", file=salida)
+    print(f"\nTiempo total de pared: {total_segundos:.1f} s", file=salida)
+
+
+def guardar_reporte(resultados, resumen, total_segundos, ruta=None):
+    ruta = ruta or rutas_utils.subdir("precarga") / "ultimo_reporte.json"
+    datos = {
+        "generado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "segundos_pared": total_segundos,
+        "resumen": resumen,
+        "tareas": resultados,
+    }
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, indent=1)
+    return ruta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precarga en disco los datos de todos los reportes fijos.")
+    parser.add_argument("--nivel", choices=["todos", "pais", "estado"], default="todos")
+    parser.add_argument("--estado", action="append", help="Solo estos estados (repetible).")
+    parser.add_argument("--indicador", action="append", help="Solo estos indicadores (repetible).")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--timeout", type=float, default=ejecutor_utils.TIMEOUT,
+                        help="Segundos máximos por notebook (por defecto AEDM_NOTEBOOK_TIMEOUT).")
+    parser.add_argument("--memoria-mb", type=float, default=ejecutor_utils.MEMORIA_MB,
+                        help="Memoria máxima por proceso en MB; 0 sin límite (AEDM_NOTEBOOK_MEMORIA_MB).")
+    parser.add_argument("--reporte", help="Ruta del reporte JSON (por defecto en DATA_DIR/precarga).")
+    args = parser.parse_args(argv)
+
+    desconocidos = set(args.estado or []) - set(catalogo_utils.ESTADOS_MEXICANOS)
+    if desconocidos:
+        parser.error(f"Estados no reconocidos: {', '.join(sorted(desconocidos))}")
+
+    tareas = construir_tareas(args.nivel, args.estado, args.indicador)
+    if not tareas:
+        parser.error("No hay reportes que precargar con esos filtros.")
+
+    def _progreso(res, hechas, total):
+        etiqueta = f"{res['indicador']}" + (f" / {res['estado']}" if res["estado"] else "")
+        print(f"[{hechas}/{total}] {res['resultado']:<8} {res['segundos']:6.1f}s  {etiqueta}",
+              flush=True)
+
+    t0 = time.perf_counter()
+    resultados = precargar(tareas, workers=args.workers, al_terminar=_progreso,
+                             timeout=args.timeout, memoria_mb=args.memoria_mb)
+    total = time.perf_counter() - t0
+
+    resumen = resumir(resultados)
+    imprimir_resumen(resumen, total)
+    print(f"Reporte: {guardar_reporte(resultados, resumen, total, args.reporte)}")
+    return 1 if any(r["resultado"] not in ("ok", "detenido") for r in resultados) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
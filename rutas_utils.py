@@ -0,0 +1,18 @@
+import os
+from pathlib import Path
+
+# ==========================================
+# RUTAS DE DATOS LOCALES COMPARTIDOS
+# ==========================================
+# Todos los almacenes en disco (censos, caché HTTP, series, etc.) cuelgan de
+# DATA_DIR. En despliegues con varios procesos basta con apuntar la variable
+# de entorno AEDM_DATA_DIR a un volumen compartido.
+BASE_DIR = Path(__file__).parent.resolve()
+DATA_DIR = Path(os.environ.get("AEDM_DATA_DIR", BASE_DIR / "datos_locales"))
+
+
+def subdir(nombre: str) -> Path:
+    """Devuelve (y crea si hace falta) un subdirectorio de DATA_DIR."""
+    p = DATA_DIR / nombre
+    p.mkdir(parents=True, exist_ok=True)
+    return p
@@ -3,11 +3,9 @@ import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 from pathlib import Path
-import urllib.request
-import zipfile
-import shutil
-import tempfile
-import io
+import cache_utils
+import descargas_utils
+import graficas_utils
 
 # Intento de importar win32 solo si es necesario y está disponible
 try:
@@ -33,40 +31,42 @@ def obtener_datos_turismo(base_dir: str):
     if out_path.exists():
         return out_path
 
-    # Descarga
+    # Descarga por bloques a disco (reanudable) y extracción de un solo miembro
     try:
-        req = urllib.request.Request(ZIP_URL, headers={"User-Agent": "Mozilla/5.0"})
-        with urllib.request.urlopen(req, timeout=120) as resp:
-            zip_bytes = resp.read()
-            
-        with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
-            # Buscar el archivo sin importar mayúsculas/minúsculas
-            target = next((n for n in zf.namelist() if TARGET_FILE.lower() in n.lower()), None)
-            
-            if not target:
-                st.error("Archivo Excel no encontrado en el ZIP de Sectur.")
-                return None
-            
-            # Extraer directamente al destino final (sin abrir Excel)
-            with zf.open(target) as source, open(out_path, "wb") as dest:
-                shutil.copyfileobj(source, dest)
-                
+        zip_path = descargas_utils.descargar_archivo(ZIP_URL, timeout=120)
+
+        # Buscar el archivo sin importar mayúsculas/minúsculas y extraerlo
+        # directamente al destino final (sin abrir Excel)
+        extraido = descargas_utils.extraer_miembro(zip_path, TARGET_FILE, destino=out_path)
+        if extraido is None:
+            st.error("Archivo Excel no encontrado en el ZIP de Sectur.")
+            return None
+
         return out_path
 
     except Exception as e:
         st.error(f"Error en descarga/extracción: {e}")
         return None
 
-@st.cache_data
+# Las hojas leídas se comparten entre réplicas (ver cache_compartida_utils);
+# la llave incluye mtime y tamaño del Excel, así que uno nuevo no se sirve viejo
+CACHE_REGION = "turismo_backend"
+
+@cache_utils.cacheado(CACHE_REGION, ttl=24 * 3600, compartida=True)
+def leer_vistas_ocupacion(file_path, firma):
+    xls = pd.ExcelFile(file_path, engine='openpyxl')
+    return {
+        "Vista05": pd.read_excel(xls, "Vista05", header=12),
+        "Vista06a": pd.read_excel(xls, "Vista06a", header=12),
+        "Vista09a": pd.read_excel(xls, "Vista09a", header=12),
+        "origen": (file_path, *firma),
+    }
+
 def cargar_dfs_ocupacion(file_path):
-    """Carga los DataFrames en memoria rápida."""
+    """Carga los DataFrames en memoria rápida (los errores no se guardan en caché)."""
     try:
-        xls = pd.ExcelFile(file_path, engine='openpyxl')
-        return {
-            "Vista05": pd.read_excel(xls, "Vista05", header=12),
-            "Vista06a": pd.read_excel(xls, "Vista06a", header=12),
-            "Vista09a": pd.read_excel(xls, "Vista09a", header=12)
-        }
+        st_ = Path(file_path).stat()
+        return leer_vistas_ocupacion(str(file_path), (st_.st_mtime_ns, st_.st_size))
     except Exception as e:
         st.error(f"Error leyendo Excel: {e}")
         return {}
@@ -79,7 +79,15 @@ def normalizar(s):
                    if unicodedata.category(c) != 'Mn')
 
 def get_grafica_ocupacion(dfs, estado, palette, font_family):
-    """Genera la figura Plotly usando los estilos de la App."""
+    """Genera la figura Plotly usando los estilos de la App (con caché de figuras)."""
+    # El Excel de origen (ruta, mtime, tamaño) identifica las hojas sin recorrerlas
+    datos = dfs.get("origen") or {k: dfs[k] for k in ("Vista05", "Vista06a", "Vista09a")}
+    llave = graficas_utils.llave_figura("turismo/ocupacion", estado=estado, paleta=palette,
+                                        fuente=font_family, datos=datos)
+    return graficas_utils.figura_en_cache(
+        llave, lambda: _construir_grafica_ocupacion(dfs, estado, palette, font_family))
+
+def _construir_grafica_ocupacion(dfs, estado, palette, font_family):
     
     # Lógica de extracción (igual que tu script previo)
     v05, v06, v09 = dfs["Vista05"], dfs["Vista06a"], dfs["Vista09a"]
@@ -164,4 +172,4 @@ def get_grafica_ocupacion(dfs, estado, palette, font_family):
         font=dict(size=11, color="gray", family=font_family)
     )
     
-    return fig
\ No newline at end of file
+    return graficas_utils.decimar_figura(fig)
\ No newline at end of file
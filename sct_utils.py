@@ -0,0 +1,225 @@
+"""
+Mapas carreteros de la SCT (Datos Viales 2016) pre-rasterizados.
+
+Cada PDF estatal se rasteriza una sola vez (PyMuPDF) y se guarda en
+<DATA_DIR>/sct_mapas/<clave>/ en varias resoluciones; la app solo lee la
+imagen del tamaño que necesita. Para construir los 32 estados de una vez:
+
+    python sct_utils.py                  # PNG
+    python sct_utils.py --webp --workers 4
+
+Con AEDM_SCT_OFFLINE=1 la app nunca descarga ni rasteriza PDFs: sirve lo que
+haya en el almacén.
+"""
+import argparse
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import almacen_utils
+import candados_utils
+import descargas_utils
+import rutas_utils
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+URL_PDF = "https://micrs.sct.gob.mx/images/DireccionesGrales/DGST/Datos-Viales-2016/{clave}_{nombre}.pdf"
+
+# Diccionario de claves para la API de la SCT (Datos Viales)
+ESTADOS = {
+    "Aguascalientes": ("01", "AGUASCALIENTES"),
+    "Baja California": ("02", "BAJA_CALIFORNIA"),
+    "Baja California Sur": ("03", "BAJA_CALIFORNIA_SUR"),
+    "Campeche": ("04", "CAMPECHE"),
+    "Coahuila": ("05", "COAHUILA"),
+    "Colima": ("06", "COLIMA"),
+    "Chiapas": ("07", "CHIAPAS"),
+    "Chihuahua": ("08", "CHIHUAHUA"),
+    "Ciudad de México": ("09", "CIUDAD_DE_MEXICO"),
+    "Durango": ("10", "DURANGO"),
+    "Guanajuato": ("11", "GUANAJUATO"),
+    "Guerrero": ("12", "GUERRERO"),
+    "Hidalgo": ("13", "HIDALGO"),
+    "Jalisco": ("14", "JALISCO"),
+    "México": ("15", "MEXICO"),
+    "Michoacán": ("16", "MICHOACAN"),
+    "Morelos": ("17", "MORELOS"),
+    "Nayarit": ("18", "NAYARIT"),
+    "Nuevo León": ("19", "NUEVO_LEON"),
+    "Oaxaca": ("20", "OAXACA"),
+    "Puebla": ("21", "PUEBLA"),
+    "Querétaro": ("22", "QUERETARO"),
+    "Quintana Roo": ("23", "QUINTANA_ROO"),
+    "San Luis Potosí": ("24", "SAN_LUIS_POTOSI"),
+    "Sinaloa": ("25", "SINALOA"),
+    "Sonora": ("26", "SONORA"),
+    "Tabasco": ("27", "TABASCO"),
+    "Tamaulipas": ("28", "TAMAULIPAS"),
+    "Tlaxcala": ("29", "TLAXCALA"),
+    "Veracruz": ("30", "VERACRUZ"),
+    "Yucatán": ("31", "YUCATAN"),
+    "Zacatecas": ("32", "ZACATECAS"),
+}
+
+# Escalera de resoluciones: ancho máximo en px (None = tamaño completo del
+# rasterizado, zoom ZOOM sobre la página del PDF).
+NIVELES = {"miniatura": 480, "pantalla": 1600, "impresion": None}
+ZOOM = 2.0
+CALIDAD_WEBP = 85
+
+OFFLINE = os.environ.get("AEDM_SCT_OFFLINE", "0") == "1"
+WEBP = os.environ.get("AEDM_SCT_WEBP", "0") == "1"
+
+
+def url_pdf(estado: str) -> str:
+    clave, nombre = ESTADOS[estado]
+    return URL_PDF.format(clave=clave, nombre=nombre)
+
+
+def _dir_estado(estado: str):
+    ruta = rutas_utils.subdir("sct_mapas") / ESTADOS[estado][0]
+    ruta.mkdir(parents=True, exist_ok=True)
+    return ruta
+
+
+def _existentes(estado: str, nivel: str):
+    base = _dir_estado(estado)
+    return [p for p in (base / f"{nivel}.webp", base / f"{nivel}.png") if p.exists()]
+
+
+def nivel_para(ancho_px) -> str:
+    """El nivel más chico cuyo ancho cubre `ancho_px` (o el de impresión)."""
+    for nivel, ancho in sorted(((n, a) for n, a in NIVELES.items() if a), key=lambda x: x[1]):
+        if ancho_px <= ancho:
+            return nivel
+    return "impresion"
+
+
+# ==========================================
+# RASTERIZADO (UNA VEZ POR PDF)
+# ==========================================
+def _codificar(img, webp: bool):
+    buf = io.BytesIO()
+    if webp:
+        img.save(buf, format="WEBP", quality=CALIDAD_WEBP, method=4)
+    else:
+        img.save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def construir_mapa(estado: str, webp: bool = WEBP, forzar: bool = False):
+    """Descarga el PDF del estado y guarda todas sus resoluciones. Devuelve el directorio.
+
+    Solo se rasteriza si falta algún nivel o el PDF local es más nuevo que
+    las imágenes. La página se rasteriza una vez a ZOOM y los niveles
+    menores se obtienen reduciendo esa imagen.
+    """
+    # PyMuPDF/Pillow solo hacen falta al construir (no en modo offline)
+    import fitz
+    from PIL import Image
+
+    base = _dir_estado(estado)
+    ext = "webp" if webp else "png"
+    # construir_todos usa procesos: el candado también los coordina
+    with candados_utils.candado(f"sct_mapa:{estado}"):
+        pdf = descargas_utils.descargar_archivo(url_pdf(estado), timeout=45)
+        destinos = {n: base / f"{n}.{ext}" for n in NIVELES}
+        if not forzar and all(p.exists() and p.stat().st_mtime >= pdf.stat().st_mtime
+                              for p in destinos.values()):
+            return base
+
+        with fitz.open(pdf) as doc:
+            if doc.page_count < 1:
+                raise ValueError("El PDF descargado está vacío.")
+            pix = doc.load_page(0).get_pixmap(matrix=fitz.Matrix(ZOOM, ZOOM), alpha=False)
+            completa = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+        for nivel, ancho in NIVELES.items():
+            img = completa
+            if ancho and completa.width > ancho:
+                img = completa.resize((ancho, round(completa.height * ancho / completa.width)),
+                                      Image.LANCZOS)
+            datos = _codificar(img, webp)
+            almacen_utils.escribir_atomico(destinos[nivel], lambda tmp: tmp.write_bytes(datos))
+            # Un formato a la vez: quitar el del otro formato si quedó de una corrida previa
+            otro = destinos[nivel].with_suffix(".png" if webp else ".webp")
+            otro.unlink(missing_ok=True)
+    return base
+
+
+def construir_todos(workers: int = 4, webp: bool = WEBP, forzar: bool = False, al_terminar=None):
+    """Rasteriza los 32 estados en procesos separados. Devuelve {estado: error o None}."""
+    errores = {}
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futuros = {ex.submit(construir_mapa, e, webp, forzar): e for e in ESTADOS}
+        for fut in as_completed(futuros):
+            estado = futuros[fut]
+            try:
+                fut.result()
+                errores[estado] = None
+            except Exception as e:
+                errores[estado] = f"{type(e).__name__}: {e}"
+            if al_terminar:
+                al_terminar(estado, errores[estado], len(errores), len(futuros))
+    return errores
+
+
+# ==========================================
+# LECTURA
+# ==========================================
+def obtener_mapa(estado: str, nivel: str = "pantalla", offline: bool = OFFLINE):
+    """(bytes, mime) de la imagen del estado en el nivel pedido.
+
+    Si no está en el almacén se construye en ese momento, salvo en modo
+    offline, donde se lanza FileNotFoundError.
+    """
+    if estado not in ESTADOS:
+        raise KeyError(f"Estado no encontrado en el catálogo de mapas: {estado}")
+    if nivel not in NIVELES:
+        raise ValueError(f"Nivel desconocido: {nivel}")
+
+    rutas = _existentes(estado, nivel)
+    if not rutas and not offline:
+        construir_mapa(estado)
+        rutas = _existentes(estado, nivel)
+    if not rutas:
+        raise FileNotFoundError(f"No hay mapa pre-rasterizado de {estado} ({nivel}).")
+    ruta = rutas[0]
+    return ruta.read_bytes(), "image/webp" if ruta.suffix == ".webp" else "image/png"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-rasteriza los mapas carreteros de la SCT.")
+    parser.add_argument("--estado", action="append", help="Solo estos estados (repetible).")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--webp", action="store_true", default=WEBP, help="Guardar en WebP en lugar de PNG.")
+    parser.add_argument("--forzar", action="store_true", help="Rasterizar aunque ya estén al día.")
+    args = parser.parse_args(argv)
+
+    if args.estado:
+        desconocidos = set(args.estado) - set(ESTADOS)
+        if desconocidos:
+            parser.error(f"Estados no reconocidos: {', '.join(sorted(desconocidos))}")
+
+    def _progreso(estado, error, hechos, total):
+        print(f"[{hechos}/{total}] {'error' if error else 'ok':<6} {estado}" + (f"  {error}" if error else ""),
+              flush=True)
+
+    if args.estado:
+        errores = {}
+        for i, estado in enumerate(args.estado, 1):
+            try:
+                construir_mapa(estado, args.webp, args.forzar)
+                errores[estado] = None
+            except Exception as e:
+                errores[estado] = f"{type(e).__name__}: {e}"
+            _progreso(estado, errores[estado], i, len(args.estado))
+    else:
+        errores = construir_todos(args.workers, args.webp, args.forzar, _progreso)
+    return 1 if any(errores.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Los módulos leen AEDM_DATA_DIR al importarse: las pruebas nunca tocan datos_locales/
+os.environ["AEDM_DATA_DIR"] = tempfile.mkdtemp(prefix="aedm_pruebas_")
+os.environ.setdefault("AEDM_CACHE_COMPARTIDA", "0")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
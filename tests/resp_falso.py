@@ -0,0 +1,86 @@
+"""Servidor mínimo que habla el protocolo de Redis (RESP), para las pruebas.
+
+Entiende AUTH, SELECT, PING, GET, SET (con PX), DEL y SCAN ... MATCH; las
+claves con PX vencen como en Redis. Cualquier otro comando responde -ERR.
+"""
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class _Manejador(socketserver.StreamRequestHandler):
+    def _leer_comando(self):
+        linea = self.rfile.readline()
+        if not linea:
+            return None
+        args = []
+        for _ in range(int(linea[1:-2])):
+            n = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(n + 2)[:-2])
+        return args
+
+    @staticmethod
+    def _bulk(valor):
+        return b"$-1\r\n" if valor is None else b"$%d\r\n%s\r\n" % (len(valor), valor)
+
+    def handle(self):
+        srv = self.server
+        autenticado = srv.clave is None
+        while True:
+            args = self._leer_comando()
+            if args is None:
+                return
+            cmd = args[0].upper()
+            srv.comandos.append(cmd.decode())
+            with srv.lock:
+                ahora = time.time()
+                for k in [k for k, e in srv.vence.items() if e <= ahora]:
+                    srv.datos.pop(k, None)
+                    srv.vence.pop(k)
+                if cmd == b"AUTH":
+                    autenticado = args[-1].decode() == srv.clave
+                    resp = b"+OK\r\n" if autenticado else b"-WRONGPASS invalid password\r\n"
+                elif not autenticado:
+                    resp = b"-NOAUTH Authentication required.\r\n"
+                elif cmd in (b"SELECT", b"PING"):
+                    resp = b"+OK\r\n"
+                elif cmd == b"GET":
+                    resp = self._bulk(srv.datos.get(args[1]))
+                elif cmd == b"SET":
+                    srv.datos[args[1]] = args[2]
+                    srv.vence.pop(args[1], None)
+                    if len(args) > 4 and args[3].upper() == b"PX":
+                        srv.vence[args[1]] = ahora + int(args[4]) / 1000
+                    resp = b"+OK\r\n"
+                elif cmd == b"DEL":
+                    resp = b":%d\r\n" % sum(srv.datos.pop(k, None) is not None for k in args[1:])
+                elif cmd == b"SCAN":
+                    patron = args[args.index(b"MATCH") + 1].decode()
+                    claves = [k for k in srv.datos if fnmatch.fnmatchcase(k.decode(), patron)]
+                    resp = (b"*2\r\n" + self._bulk(b"0") + b"*%d\r\n" % len(claves)
+                            + b"".join(self._bulk(k) for k in claves))
+                else:
+                    resp = b"-ERR unknown command\r\n"
+            self.wfile.write(resp)
+
+
+class ServidorRESP(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, clave=None):
+        super().__init__(("127.0.0.1", 0), _Manejador)
+        self.clave = clave
+        self.datos, self.vence, self.comandos = {}, {}, []
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        auth = f":{self.clave}@" if self.clave else ""
+        return f"redis://{auth}127.0.0.1:{self.server_address[1]}/2"
+
+    def cerrar(self):
+        self.shutdown()
+        self.server_close()
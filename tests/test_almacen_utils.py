@@ -0,0 +1,72 @@
+import os
+
+import pandas as pd
+import pytest
+
+import almacen_utils
+import rutas_utils
+
+
+@pytest.fixture
+def fuente(tmp_path):
+    ruta = tmp_path / "fuente.csv"
+    ruta.write_text("a\n1\n2\n")
+    return ruta
+
+
+def test_construir_solo_rehace_con_fuente_nueva(fuente):
+    destino = rutas_utils.subdir("pruebas_almacen") / "tabla.parquet"
+    armados = []
+
+    def armar(ruta):
+        armados.append(ruta)
+        return pd.read_csv(ruta)
+
+    for _ in range(2):
+        almacen_utils.construir(destino, armar, origen=lambda: fuente)
+    assert len(armados) == 1
+
+    fuente.write_text("a\n1\n2\n3\n")
+    os.utime(fuente, (destino.stat().st_mtime + 5,) * 2)
+    almacen_utils.construir(destino, armar, origen=lambda: fuente)
+    assert len(armados) == 2
+    assert almacen_utils.cargar_parquet(destino)["a"].tolist() == [1, 2, 3]
+
+
+def test_construir_sin_red_sirve_la_tabla_existente(fuente):
+    destino = rutas_utils.subdir("pruebas_almacen") / "sin_red.parquet"
+
+    def sin_red():
+        raise ConnectionError("sin red")
+
+    with pytest.raises(ConnectionError):
+        almacen_utils.construir(destino, pd.read_csv, origen=sin_red)
+    almacen_utils.construir(destino, pd.read_csv, origen=lambda: fuente)
+    assert almacen_utils.construir(destino, pd.read_csv, origen=sin_red) == destino
+
+
+def test_error_al_armar_no_deja_temporales(fuente):
+    carpeta = rutas_utils.subdir("pruebas_almacen_error")
+
+    def falla(_):
+        raise ValueError("formato desconocido")
+
+    with pytest.raises(ValueError):
+        almacen_utils.construir(carpeta / "tabla.parquet", falla, origen=lambda: fuente)
+    assert list(carpeta.iterdir()) == []
+
+
+def test_cargar_parquet_relee_solo_si_cambia():
+    destino = rutas_utils.subdir("pruebas_almacen") / "lectura.parquet"
+    almacen_utils.guardar_parquet(pd.DataFrame({"a": [1]}), destino)
+    lecturas = []
+
+    def leer(ruta):
+        lecturas.append(ruta)
+        return pd.read_parquet(ruta)
+
+    primero = almacen_utils.cargar_parquet(destino, leer)
+    assert almacen_utils.cargar_parquet(destino, leer) is primero
+    almacen_utils.guardar_parquet(pd.DataFrame({"a": [1, 2]}), destino)
+    assert len(almacen_utils.cargar_parquet(destino, leer)) == 2
+    assert len(lecturas) == 2
@@ -0,0 +1,100 @@
+import os
+import zipfile
+from collections import OrderedDict
+
+import pytest
+
+import artefactos_utils
+import descargas_utils
+import rutas_utils
+
+
+@pytest.fixture(autouse=True)
+def almacen(tmp_path, monkeypatch):
+    monkeypatch.setattr(rutas_utils, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(artefactos_utils, "_MEMORIA", OrderedDict())
+    monkeypatch.setattr(artefactos_utils, "_BYTES_MEMORIA", 0)
+    return tmp_path
+
+
+def _envejecer(ruta, segundos):
+    t = os.stat(ruta).st_mtime - segundos
+    os.utime(ruta, (t, t))
+
+
+def test_memoria_lru(monkeypatch):
+    monkeypatch.setattr(artefactos_utils, "MAX_MEMORIA_MB", 2500 / 2**20)
+    a, b, c = (artefactos_utils.guardar_bytes(bytes([i]) * 1000) for i in range(3))
+    datos_a = artefactos_utils.leer(a)
+    # Las sesiones comparten el mismo objeto
+    assert artefactos_utils.leer(a) is datos_a
+    artefactos_utils.leer(b)
+    artefactos_utils.leer(a)        # `a` pasa a ser el más reciente
+    artefactos_utils.leer(c)        # desaloja `b`
+    assert list(artefactos_utils._MEMORIA) == [a, c]
+    assert artefactos_utils._BYTES_MEMORIA == 2000
+    # Lo desalojado de memoria se relee de disco
+    assert artefactos_utils.leer(b) == bytes([1]) * 1000
+
+    # Más grande que todo el presupuesto: se sirve sin quedarse en memoria
+    grande = artefactos_utils.guardar_bytes(b"g" * 3000)
+    assert artefactos_utils.leer(grande) == b"g" * 3000
+    assert grande not in artefactos_utils._MEMORIA
+
+
+def test_presupuesto_de_disco_desaloja_lo_menos_usado(monkeypatch):
+    monkeypatch.setattr(artefactos_utils, "MAX_DISCO_MB", 2500 / 2**20)
+    viejo = artefactos_utils.guardar_bytes(b"v" * 1000)
+    usado = artefactos_utils.guardar_bytes(b"u" * 1000)
+    artefactos_utils.leer(viejo)
+    _envejecer(artefactos_utils.ruta(viejo), 100)
+    _envejecer(artefactos_utils._ruta_blob(usado), 50)
+    artefactos_utils.ruta(usado)    # marca de uso
+
+    nuevo = artefactos_utils.guardar_bytes(b"n" * 1000)
+    assert artefactos_utils.leer(viejo) is None
+    assert viejo not in artefactos_utils._MEMORIA
+    assert artefactos_utils.leer(usado) == b"u" * 1000
+    assert artefactos_utils.leer(nuevo) == b"n" * 1000
+    assert artefactos_utils.uso()["bytes_disco"] == 2000
+
+    # El recién guardado se conserva aunque por sí solo rebase el presupuesto
+    enorme = artefactos_utils.guardar_bytes(b"e" * 3000)
+    assert artefactos_utils.leer(enorme) == b"e" * 3000
+    assert artefactos_utils.uso()["archivos"] == 1
+
+
+def test_copias_extraidas_cuentan_en_el_presupuesto(tmp_path, monkeypatch):
+    monkeypatch.setattr(artefactos_utils, "MAX_DISCO_MB", 2500 / 2**20)
+    zip_path = tmp_path / "CETM.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("CETM/6_2.xlsx", b"x" * 1500)
+    _envejecer(zip_path, 1000)
+
+    extraido = descargas_utils.extraer_miembro(zip_path, "6_2")
+    assert extraido.parent.parent == descargas_utils.dir_artefactos("extraidos")
+    uso = artefactos_utils.uso()
+    assert (uso["archivos"], uso["extraidos"], uso["bytes_disco"]) == (1, 1, 1500)
+    _envejecer(extraido, 100)
+
+    # Un artefacto nuevo no cabe con la copia extraída: se desaloja la copia (más vieja)
+    sha = artefactos_utils.guardar_bytes(b"a" * 1500)
+    assert not extraido.exists() and not extraido.parent.exists()
+    assert artefactos_utils.leer(sha) == b"a" * 1500
+
+    # Se vuelve a extraer al pedirla, y ahora el desalojado es el artefacto
+    _envejecer(artefactos_utils._ruta_blob(sha), 100)
+    assert descargas_utils.extraer_miembro(zip_path, "6_2").read_bytes() == b"x" * 1500
+    assert artefactos_utils.leer(sha) is None
+    assert artefactos_utils.uso()["extraidos"] == 1
+
+
+def test_destino_explicito_fuera_del_presupuesto(tmp_path, monkeypatch):
+    monkeypatch.setattr(artefactos_utils, "MAX_DISCO_MB", 1000 / 2**20)
+    zip_path = tmp_path / "datos.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("tabla.csv", b"c" * 1500)
+    _envejecer(zip_path, 1000)
+    destino = descargas_utils.extraer_miembro(zip_path, "tabla", destino=tmp_path / "fuera" / "tabla.csv")
+    assert destino.read_bytes() == b"c" * 1500
+    assert artefactos_utils.uso()["archivos"] == 0
@@ -0,0 +1,30 @@
+import threading
+
+import pandas as pd
+
+import bancomundial_utils
+import candados_utils
+
+
+def test_descarga_sin_retener_el_candado_del_almacen(monkeypatch):
+    libre_durante_descarga = []
+
+    def descargar(indicadores):
+        otro = threading.Thread(target=lambda: libre_durante_descarga.append(_probar_candado()))
+        otro.start()
+        otro.join(5)
+        return pd.DataFrame({"iso3": ["MEX"] * len(indicadores), "indicador": indicadores,
+                             "anio": pd.Series([2020] * len(indicadores), dtype="int16"),
+                             "valor": [1.0] * len(indicadores)})
+
+    monkeypatch.setattr(bancomundial_utils, "_lastupdated", lambda i: "2024-01-01")
+    monkeypatch.setattr(bancomundial_utils, "_descargar", descargar)
+    bancomundial_utils.asegurar(["SP.POP.TOTL", "NY.GDP.MKTP.CD"])
+    assert libre_durante_descarga == [True]
+    serie = bancomundial_utils.serie("SP.POP.TOTL")
+    assert serie["valor"].tolist() == [1.0]
+
+
+def _probar_candado():
+    with candados_utils.candado("bancomundial", espera=1):
+        return True
@@ -0,0 +1,87 @@
+import datetime as dt
+import json
+
+import pandas as pd
+import pytest
+import requests
+
+import banxico_utils
+
+HOY = dt.date.today()
+
+
+class _ApiFalsa:
+    """SIE de pruebas: una observación diaria en `fechas`; registra las ventanas pedidas."""
+
+    def __init__(self, fechas):
+        self.fechas = list(fechas)
+        self.pedidos = []
+        self.caida = False
+
+    def get(self, url, headers=None, **kw):
+        assert headers == {"Bmx-Token": "tok"}
+        if self.caida:
+            raise requests.ConnectionError("sin red")
+        partes = url.split("/datos")[1].strip("/").split("/")
+        ventana = tuple(dt.date.fromisoformat(p) for p in partes) if partes != [""] else None
+        self.pedidos.append(ventana)
+        fechas = [f for f in self.fechas if ventana is None or ventana[0] <= f <= ventana[1]]
+        datos = [{"fecha": f"{f:%d/%m/%Y}", "dato": f"{1000 + f.toordinal() % 1000:,}.5"} for f in fechas]
+        datos.append({"fecha": f"{HOY:%d/%m/%Y}", "dato": "N/E"})
+        r = requests.Response()
+        r.status_code = 200
+        r._content = json.dumps({"bmx": {"series": [{"datos": datos}]}}).encode()
+        return r
+
+
+@pytest.fixture
+def api(monkeypatch):
+    api = _ApiFalsa(HOY - dt.timedelta(days=d) for d in range(40, 4, -1))
+    monkeypatch.setattr(banxico_utils.http_utils, "get", api.get)
+    return api
+
+
+def test_delta_solo_pide_fechas_nuevas(api, monkeypatch):
+    df = banxico_utils.obtener_serie("SP_DELTA", "tok")
+    assert len(df) == 36 and df["fecha"].is_monotonic_increasing
+    assert df["dato"].iloc[0] == 1000 + (HOY - dt.timedelta(days=40)).toordinal() % 1000 + 0.5
+    assert api.pedidos == [None]
+
+    # Dentro del intervalo no se consulta la API
+    banxico_utils.obtener_serie("SP_DELTA", "tok")
+    assert len(api.pedidos) == 1
+
+    # Pasado el intervalo se pide solo lo posterior a la última observación
+    api.fechas += [HOY - dt.timedelta(days=d) for d in (4, 3)]
+    monkeypatch.setattr(banxico_utils, "INTERVALO", 0)
+    df = banxico_utils.obtener_serie("SP_DELTA", "tok")
+    assert api.pedidos[1] == (HOY - dt.timedelta(days=4), HOY)
+    assert len(df) == 38 and df["fecha"].is_unique
+    assert banxico_utils.ultimo_dato("SP_DELTA", "tok")[0] == pd.Timestamp(HOY - dt.timedelta(days=3))
+
+
+def test_backfill_completa_el_tramo_anterior(api):
+    inicio = HOY - dt.timedelta(days=10)
+    df = banxico_utils.obtener_serie("SP_BACKFILL", "tok", inicio=inicio)
+    assert api.pedidos == [(inicio, HOY)] and len(df) == 6
+
+    antes = HOY - dt.timedelta(days=20)
+    df = banxico_utils.obtener_serie("SP_BACKFILL", "tok", inicio=antes, fin=HOY - dt.timedelta(days=8))
+    assert api.pedidos[1] == (antes, inicio - dt.timedelta(days=1))
+    assert df["fecha"].min() == pd.Timestamp(antes) and df["fecha"].max() == pd.Timestamp(HOY - dt.timedelta(days=8))
+    assert len(df) == 13
+
+    # La historia completa pide lo anterior a lo cubierto sin ventana
+    df = banxico_utils.obtener_serie("SP_BACKFILL", "tok")
+    assert api.pedidos[2] is None and len(df) == 36
+
+
+def test_sin_red_usa_lo_guardado(api, monkeypatch):
+    guardado = banxico_utils.obtener_serie("SP_OFFLINE", "tok")
+    api.caida = True
+    df = banxico_utils.obtener_serie("SP_OFFLINE", "tok", forzar=True)
+    pd.testing.assert_frame_equal(df, guardado)
+
+    # Sin datos guardados el error llega al notebook
+    with pytest.raises(requests.ConnectionError):
+        banxico_utils.obtener_serie("SP_NUEVA", "tok")
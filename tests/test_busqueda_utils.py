@@ -0,0 +1,52 @@
+import threading
+
+import pandas as pd
+
+import busqueda_utils
+
+
+def _indice():
+    df = pd.DataFrame({
+        "NOM_LOC": ["Monterrey", "San Pedro Garza García", "Ampliación Polanco", None, "Montemorelos"],
+        "POBTOT": [1_100_000, 130_000, 5_000, 10, 60_000],
+        "NOM_ENT": ["Nuevo León", "Nuevo León", "Ciudad de México", "Jalisco", "Nuevo León"],
+    })
+    return busqueda_utils.IndiceNombres(df, "NOM_LOC", "POBTOT", "NOM_ENT")
+
+
+def test_tipos_de_coincidencia():
+    indice = _indice()
+    assert [(r["nombre"], r["tipo"]) for r in indice.buscar("mont")] == [
+        ("Monterrey", "prefijo"), ("Montemorelos", "prefijo")]
+    assert indice.buscar("polanco")[0]["tipo"] == "palabra"
+    assert indice.buscar("monterrey")[0]["tipo"] == "exacta"
+    assert indice.buscar("Garcia")[0]["nombre"] == "San Pedro Garza García"
+
+
+def test_subcadena_a_media_palabra_como_str_contains():
+    indice = _indice()
+    r = indice.buscar("terrey", limite=None, difuso=False)
+    assert [(x["nombre"], x["tipo"]) for x in r] == [("Monterrey", "subcadena")]
+    assert {x["nombre"] for x in indice.buscar("an", limite=None, difuso=False)} == {
+        "San Pedro Garza García", "Ampliación Polanco"}
+
+
+def test_nombres_nulos_no_se_indexan():
+    indice = _indice()
+    assert len(indice) == 4
+    assert indice.buscar("none") == [] and indice.buscar("nan", difuso=False) == []
+
+
+def test_sugerir_no_bloquea_mientras_se_construye(monkeypatch):
+    listo = threading.Event()
+
+    def construir(anio, nivel):
+        listo.wait(5)
+        return _indice()
+
+    monkeypatch.setattr(busqueda_utils, "_construir", construir)
+    monkeypatch.setattr(busqueda_utils, "_INDICES", {})
+    assert busqueda_utils.sugerir("localidad", "monte") == []
+    listo.set()
+    busqueda_utils._HILOS[(2020, "localidad")].join(5)
+    assert busqueda_utils.sugerir("localidad", "monte")[0]["nombre"] == "Monterrey"
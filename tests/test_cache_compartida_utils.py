@@ -0,0 +1,144 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cache_compartida_utils as cc
+import cache_utils
+from resp_falso import ServidorRESP
+
+
+@pytest.fixture
+def servidor():
+    srv = ServidorRESP(clave="secreta")
+    yield srv
+    srv.cerrar()
+
+
+@pytest.fixture(params=["archivos", "redis"])
+def backend(request, tmp_path):
+    if request.param == "archivos":
+        b = cc.BackendArchivos(tmp_path / "compartida")
+        cc.configurar(b)
+        yield b
+    else:
+        srv = ServidorRESP(clave="secreta")
+        cc.configurar(srv.url)
+        yield cc.backend()
+        srv.cerrar()
+    cc.configurar(None)
+
+
+def _df():
+    df = pd.DataFrame({"a": [1, 2, 3], "b": pd.Categorical(["x", "y", "x"]), "c": [1.5, np.nan, 2.0]},
+                      index=[10, 20, 30])
+    df.attrs["latest_year"] = 2024
+    return df
+
+
+# ==========================================
+# SERIALIZACIÓN
+# ==========================================
+def test_dataframes_como_arrow_ipc_con_attrs():
+    df = _df()
+    mixto = pd.DataFrame({"m": [1, "a", None]})
+    valor = {"df": df, "tupla": (df, 5), "mixto": mixto, "serie": pd.Series([1, 2])}
+    datos = cc.serializar(valor)
+    # Un solo bloque Arrow: el mismo DataFrame repetido se guarda una vez y el
+    # de tipos mezclados se queda en pickle
+    assert datos.startswith(cc.MAGIA)
+    assert int.from_bytes(datos[len(cc.MAGIA):len(cc.MAGIA) + 4], "little") == 1
+
+    r = cc.deserializar(datos)
+    pd.testing.assert_frame_equal(r["df"], df)
+    assert r["df"].attrs == {"latest_year": 2024}
+    assert isinstance(r["df"]["b"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(r["tupla"][0], df)
+    pd.testing.assert_frame_equal(r["mixto"], mixto)
+    pd.testing.assert_series_equal(r["serie"], valor["serie"])
+
+
+def test_formato_desconocido():
+    with pytest.raises(ValueError):
+        cc.deserializar(b"pickle cualquiera")
+
+
+# ==========================================
+# CLIENTE RESP
+# ==========================================
+def test_cliente_resp_contra_servidor_falso(servidor):
+    b = cc.BackendRedis(servidor.url)
+    assert b.leer("r", "k") is None
+    b.escribir("r", "k", b"\x00datos\r\nbinarios")
+    assert b.leer("r", "k") == b"\x00datos\r\nbinarios"
+    b.escribir("r", "k2", b"x")
+    b.escribir("otra", "k", b"y")
+    b.borrar_region("r")
+    assert b.leer("r", "k") is None and b.leer("r", "k2") is None
+    assert b.leer("otra", "k") == b"y"
+    assert servidor.comandos[:2] == ["AUTH", "SELECT"]
+    # Las conexiones se reutilizan: un solo AUTH para todos los comandos
+    assert servidor.comandos.count("AUTH") == 1
+    with pytest.raises(cc.ErrorRedis):
+        b._comando("FLUSHALL")
+
+
+def test_clave_incorrecta(servidor):
+    with pytest.raises(cc.ErrorRedis):
+        cc.BackendRedis(servidor.url.replace("secreta", "otra")).leer("r", "k")
+
+
+# ==========================================
+# API CON CUALQUIER BACKEND
+# ==========================================
+def test_obtener_construye_una_vez_y_respeta_ttl(backend):
+    llamadas = []
+
+    def construir():
+        llamadas.append(1)
+        return _df()
+
+    pd.testing.assert_frame_equal(cc.obtener("reg", "k", construir, ttl=0.3), _df())
+    pd.testing.assert_frame_equal(cc.obtener("reg", "k", construir, ttl=0.3), _df())
+    assert len(llamadas) == 1
+    time.sleep(0.4)
+    cc.obtener("reg", "k", construir, ttl=0.3)
+    assert len(llamadas) == 2
+
+
+def test_leer_distingue_none_guardado_e_invalidar(backend):
+    cc.escribir("reg", "nada", None)
+    assert cc.leer("reg", "nada", "defecto") is None
+    assert cc.leer("reg", "falta", "defecto") == "defecto"
+    cc.invalidar("reg")
+    assert cc.leer("reg", "nada", "defecto") == "defecto"
+
+
+def test_region_compartida_sobrevive_a_la_memoria(backend):
+    llamadas = []
+
+    @cache_utils.cacheado("prueba_compartida", ttl=60, compartida=True)
+    def cargar(x):
+        llamadas.append(x)
+        return _df().assign(a=lambda d: d["a"] * x)
+
+    cargar(2)
+    cache_utils.region("prueba_compartida")._entradas.clear()   # "reinicio" del proceso
+    assert cargar(2)["a"].tolist() == [2, 4, 6]
+    assert llamadas == [2]
+    cargar.clear()
+    cargar(2)
+    assert llamadas == [2, 2]
+
+
+def test_backend_caido_construye_localmente():
+    cc.configurar("redis://127.0.0.1:1/0")
+    try:
+        assert cc.obtener("r", "k", lambda: 7) == 7
+        # En pausa: ya no se intenta conectar
+        t0 = time.perf_counter()
+        assert cc.obtener("r", "k", lambda: 8) == 8
+        assert time.perf_counter() - t0 < 0.5
+    finally:
+        cc.configurar(None)
@@ -0,0 +1,98 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cache_utils
+
+
+def _huella(obj):
+    h = hashlib.sha256()
+    cache_utils.huella(obj, h)
+    return h.hexdigest()
+
+
+def test_huella_estable_para_datos():
+    datos = (pd.DataFrame({"a": [1, 2]}), pd.Series([1.5], name="x"), np.arange(3),
+             pd.Timestamp("2024-01-01"), np.int64(7), {"b": [1, None]}, {2, 1}, "texto")
+    assert _huella(datos) == _huella(datos)
+    assert _huella(pd.DataFrame({"a": [1, 2]})) != _huella(pd.DataFrame({"a": [1, 3]}))
+
+
+def test_huella_rechaza_objetos_sin_repr_estable():
+    with pytest.raises(TypeError):
+        _huella({"cliente": object()})
+
+
+def test_memo_por_argumentos_e_invalidacion():
+    llamadas = []
+
+    @cache_utils.cacheado("prueba_memo", ttl=60)
+    def doble(x):
+        llamadas.append(x)
+        return [x * 2]
+
+    assert doble(2) == [4] and doble(2) == [4] and doble(3) == [6]
+    assert llamadas == [2, 3]
+    # Cada llamada recibe su propia copia
+    doble(2).append("modificado")
+    assert doble(2) == [4]
+
+    cache_utils.invalidar("prueba_memo")
+    doble(2)
+    assert llamadas == [2, 3, 2]
+
+
+def test_memo_con_llave_explicita():
+    class Cliente:
+        url = "https://ejemplo"
+
+    @cache_utils.cacheado("prueba_llave", llave=lambda cliente, n: (cliente.url, n))
+    def consultar(cliente, n):
+        return n
+
+    assert consultar(Cliente(), 1) == 1
+    assert cache_utils.region("prueba_llave").uso()["entradas"] == 1
+    consultar(Cliente(), 1)
+    assert cache_utils.region("prueba_llave").aciertos == 1
+
+
+def test_region_respeta_tope_de_memoria():
+    reg = cache_utils.Region("prueba_tope", max_mb=0.01)
+    for i in range(10):
+        reg.obtener(i, lambda: b"x" * 4000)
+    assert reg.uso()["bytes"] <= 0.01 * 1024 * 1024
+    assert reg.uso()["entradas"] < 10
+
+
+def test_huella_con_celdas_no_hashables():
+    df = pd.DataFrame({"a": [[1], [2]]})
+    assert _huella(df) == _huella(pd.DataFrame({"a": [[1], [2]]}))
+    assert _huella(df) != _huella(pd.DataFrame({"a": [[1], [3]]}))
+
+
+def test_regiones_disco_sin_directorios_internos(monkeypatch, tmp_path):
+    monkeypatch.setattr(cache_utils.rutas_utils, "DATA_DIR", tmp_path)
+    for d in ("candados", "censo", "http_cache"):
+        (tmp_path / d).mkdir()
+    assert [p.name for p in cache_utils.regiones_disco()] == ["censo", "http_cache"]
+    with pytest.raises(ValueError):
+        cache_utils.vaciar_disco("candados")
+    with pytest.raises(ValueError):
+        cache_utils.vaciar_disco("../fuera")
+
+
+def test_vaciar_disco_conserva_archivos_en_vuelo(monkeypatch, tmp_path):
+    monkeypatch.setattr(cache_utils.rutas_utils, "DATA_DIR", tmp_path)
+    blobs = tmp_path / "http_cache" / "blobs"
+    (blobs / "ab").mkdir(parents=True)
+    (blobs / "cd").mkdir()
+    (blobs / "ab" / "abc").write_bytes(b"x")
+    (blobs / "ab" / "abd.123.456.tmp").write_bytes(b"x")
+    (blobs / "cd" / "cde").write_bytes(b"x")
+    (tmp_path / "http_cache" / "grande.zip.part").write_bytes(b"x")
+    cache_utils.vaciar_disco("http_cache")
+    restantes = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*") if p.is_file())
+    assert restantes == ["http_cache/blobs/ab/abd.123.456.tmp", "http_cache/grande.zip.part"]
+    assert not (blobs / "cd").exists()
@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import candados_utils
+
+
+class _Interrumpido(BaseException):
+    pass
+
+
+def _en_paralelo(n, func):
+    with ThreadPoolExecutor(n) as ex:
+        return [ex.submit(func) for _ in range(n)]
+
+
+def test_lider_construye_una_vez_y_las_esperas_comparten_el_valor():
+    llamadas = []
+
+    def cargar():
+        llamadas.append(1)
+        time.sleep(0.2)
+        return object()
+
+    futuros = _en_paralelo(6, lambda: candados_utils.unico("valor", cargar))
+    valores = [f.result() for f in futuros]
+    assert len(llamadas) == 1
+    assert len({id(v) for v in valores}) == 1
+    assert candados_utils.en_vuelo() == 0
+
+
+def test_error_ordinario_se_comparte_como_copia_por_espera():
+    llamadas = []
+
+    def falla():
+        llamadas.append(1)
+        time.sleep(0.2)
+        raise ValueError("sin datos")
+
+    futuros = _en_paralelo(4, lambda: candados_utils.unico("error", falla))
+    errores = [f.exception() for f in futuros]
+    assert len(llamadas) == 1
+    assert all(isinstance(e, ValueError) and str(e) == "sin datos" for e in errores)
+    # Cada hilo recibe su propia instancia; las copias apuntan al original
+    assert len({id(e) for e in errores}) == 4
+    originales = [e for e in errores if e.__cause__ is None]
+    assert len(originales) == 1
+    assert all(e.__cause__ is originales[0] for e in errores if e is not originales[0])
+
+
+def test_baseexception_del_lider_no_se_propaga_a_las_esperas():
+    entro = threading.Event()
+    llamadas = []
+
+    def lider():
+        llamadas.append("lider")
+        entro.set()
+        time.sleep(0.2)
+        raise _Interrumpido()
+
+    def espera():
+        entro.wait()
+        return candados_utils.unico("cancelable", lambda: llamadas.append("espera") or 42)
+
+    with ThreadPoolExecutor(2) as ex:
+        f_lider = ex.submit(candados_utils.unico, "cancelable", lider)
+        f_espera = ex.submit(espera)
+        with pytest.raises(_Interrumpido):
+            f_lider.result()
+        assert f_espera.result() == 42
+    assert llamadas == ["lider", "espera"]
+
+
+def test_candado_excluye_entre_hilos():
+    dentro, maximo = [0], [0]
+
+    def seccion():
+        with candados_utils.candado("exclusion"):
+            dentro[0] += 1
+            maximo[0] = max(maximo[0], dentro[0])
+            time.sleep(0.05)
+            dentro[0] -= 1
+
+    for f in _en_paralelo(4, seccion):
+        f.result()
+    assert maximo[0] == 1
+    assert candados_utils.ruta_candado("exclusion").exists()
+
+
+def _construir_en_proceso(marca):
+    with candados_utils.candado("entre_procesos"):
+        if marca.exists():
+            return "reusado"
+        time.sleep(0.3)
+        marca.write_text("x")
+        return "construido"
+
+
+@pytest.mark.skipif(candados_utils.fcntl is None, reason="sin fcntl solo se coordinan hilos")
+def test_candado_excluye_entre_procesos(tmp_path):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(3, mp_context=multiprocessing.get_context("spawn")) as ex:
+        resultados = list(ex.map(_construir_en_proceso, [tmp_path / "marca"] * 3))
+    assert sorted(resultados) == ["construido", "reusado", "reusado"]
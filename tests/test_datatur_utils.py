@@ -0,0 +1,180 @@
+import codecs
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datatur_utils
+
+ENCABEZADO = ["Año", "Mes", "Centro Turístico", "Categoría",
+              "Cuartos disponibles promedio", "Cuartos ocupados promedio", "Porcentaje de ocupación"]
+FILAS = [
+    ["2023", "Enero", "Cancún", "5 estrellas", "1,234.5", "1,000", "81.0"],
+    ["2023", "feb", "Mérida", "4 estrellas", "200", "150", "75"],
+    ["", "mar", "Sin año", "", "1", "1", "1"],
+    ["2024", "3", "Cancún", "5 estrellas", "1,300", "N/D", "-"],
+]
+
+
+def _csv(ruta, filas=FILAS, encabezado=ENCABEZADO, sep=";", encoding="cp1252", bom=b""):
+    texto = "\r\n".join(sep.join(f) for f in [encabezado, *filas]) + "\r\n"
+    ruta.write_bytes(bom + texto.encode(encoding))
+    return ruta
+
+
+@pytest.mark.parametrize("encoding,bom,sep,esperado", [
+    ("cp1252", b"", ";", "cp1252"),
+    ("utf-8", b"", ";", "utf-8"),
+    ("utf-8", codecs.BOM_UTF8, ",", "utf-8-sig"),
+    ("utf-16-le", codecs.BOM_UTF16_LE, "\t", "utf-16"),
+])
+def test_detectar_formato(tmp_path, encoding, bom, sep, esperado):
+    filas = [[c.replace(",", "") for c in f] for f in FILAS]
+    ruta = _csv(tmp_path / "datos.csv", filas, sep=sep, encoding=encoding, bom=bom)
+    assert datatur_utils.detectar_formato(ruta) == (esperado, sep)
+
+
+def test_detectar_formato_muestra_corta_un_caracter(tmp_path):
+    ruta = tmp_path / "corte.csv"
+    texto = "Año;Mes\n" + "2023;Menú ó\n" * 50
+    ruta.write_bytes(texto.encode("utf-8"))
+    corte = texto.encode("utf-8").index("ó".encode("utf-8"), 100) + 1
+    assert datatur_utils.detectar_formato(ruta, tam_muestra=corte) == ("utf-8", ";")
+
+
+@pytest.mark.parametrize("encoding,bom", [("cp1252", b""), ("utf-16-le", codecs.BOM_UTF16_LE)])
+def test_leer_csv_por_bloques(tmp_path, monkeypatch, encoding, bom):
+    monkeypatch.setattr(datatur_utils, "FILAS_POR_BLOQUE", 2)
+    df = datatur_utils.leer_csv(_csv(tmp_path / "datos.csv", encoding=encoding, bom=bom))
+    assert list(df.columns) == ["anio", "mes", "centro_turistico", "categoria", "cuartos_disponibles_pd",
+                                "cuartos_ocupados_pd", "porc_ocupacion"]
+    # La fila sin año se descarta; separador de miles con ';' como separador de campos
+    assert df["anio"].tolist() == [2023, 2023, 2024]
+    assert str(df["anio"].dtype) == "Int16" and str(df["mes"].dtype) == "Int8"
+    assert df["mes"].tolist() == [1, 2, 3]
+    assert df["cuartos_disponibles_pd"].tolist() == [1234.5, 200.0, 1300.0]
+    assert np.isnan(df["cuartos_ocupados_pd"].iloc[2]) and np.isnan(df["porc_ocupacion"].iloc[2])
+    # Las categorías de bloques distintos se unen
+    assert isinstance(df["centro_turistico"].dtype, pd.CategoricalDtype)
+    assert df["centro_turistico"].tolist() == ["Cancún", "Mérida", "Cancún"]
+
+
+def test_leer_csv_columnas_repetidas(tmp_path):
+    encabezado = ["Año", "Mes", "Centro", "Destino", "Cuartos ocupados promedio", "ocup_prom"]
+    filas = [["2023", "1", "Cancún", "", "10", ""],
+             ["2023", "2", "", "Tulum", "", "20"]]
+    df = datatur_utils.leer_csv(_csv(tmp_path / "rep.csv", filas, encabezado, sep=","))
+    assert list(df.columns) == ["anio", "mes", "centro_turistico", "cuartos_ocupados_pd"]
+    assert df["centro_turistico"].tolist() == ["Cancún", "Tulum"]
+    assert df["cuartos_ocupados_pd"].tolist() == [10.0, 20.0]
+
+
+def test_leer_csv_texto_en_columna_numerica(tmp_path, monkeypatch):
+    filas = [["2023", "ene", "Cancún", "5", "1,000", "900", "90%"],
+             ["2023", "feb", "Cancún", "5", "1,000", "s/d", " 85.5 "]]
+    llamadas = []
+    original = pd.read_csv
+
+    def registrar(*a, **kw):
+        if "chunksize" in kw:
+            llamadas.append(kw["dtype"]["Cuartos ocupados promedio"])
+        return original(*a, **kw)
+
+    monkeypatch.setattr(datatur_utils.pd, "read_csv", registrar)
+    df = datatur_utils.leer_csv(_csv(tmp_path / "texto.csv", filas))
+    # Primero el camino rápido (float64); al fallar, como texto y limpieza
+    assert llamadas == ["float64", str]
+    assert df["porc_ocupacion"].tolist() == [90.0, 85.5]
+    assert df["cuartos_ocupados_pd"].iloc[0] == 900.0 and np.isnan(df["cuartos_ocupados_pd"].iloc[1])
+    assert df["cuartos_disponibles_pd"].tolist() == [1000.0, 1000.0]
+
+
+# ==========================================
+# LIBROS EXCEL DENTRO DE ZIP
+# ==========================================
+def _libro(hojas):
+    import io
+
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for titulo, filas in hojas.items():
+        ws = wb.create_sheet(titulo)
+        for f in filas:
+            ws.append(f)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _zip_libros(ruta):
+    import zipfile
+
+    with zipfile.ZipFile(ruta, "w") as zf:
+        zf.writestr("cuadros/llegadas_2023.xlsx", _libro({
+            "Notas": [["Fuente: AFAC"], ["Sin datos de llegadas aquí"]],
+            "Vista07a": [["Cuadro 7.1 Llegadas de pasajeros"], ["Aeropuerto", "Total"], ["CUN", 10.0],
+                         ["MEX", 2.5], [None, None]],
+        }))
+        zf.writestr("cuadros/LEEME.txt", "no es Excel")
+        zf.writestr("cuadros/conectividad_2023.xlsx", _libro({
+            "Rutas": [["Conectividad aérea"], ["Origen", "Destino"], ["CUN", "MEX"]],
+        }))
+        zf.writestr("cuadros/resumen_2023.xlsx", _libro({"Hoja1": [["Llegadas de pasajeros"]]}))
+    return ruta
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_hojas_excel_zip_omite_hojas_que_no_pasan_la_sonda(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(datatur_utils, "EXCEL_WORKERS", workers)
+    zip_path = _zip_libros(tmp_path / "cuadros.zip")
+    hojas = list(datatur_utils.hojas_excel_zip(zip_path, sonda=r"llegadas\s+de\s+pasajeros",
+                                               excluir=("resumen",), filas_sonda=3))
+    assert [(m, h) for m, h, _ in hojas] == [("cuadros/llegadas_2023.xlsx", "Vista07a")]
+    df = hojas[0][2]
+    # Como read_excel(header=None): flotantes enteros como int y sin filas vacías al final
+    assert df.shape == (4, 2)
+    assert df.iloc[2].tolist() == ["CUN", 10] and df.iloc[3].tolist() == ["MEX", 2.5]
+    assert np.isnan(df.iloc[0, 1])
+
+    # Sin sonda se leen todas las hojas de todos los libros, en el orden del ZIP
+    todas = [(m.rsplit("/", 1)[1], h) for m, h, _ in datatur_utils.hojas_excel_zip(zip_path)]
+    assert todas == [("llegadas_2023.xlsx", "Notas"), ("llegadas_2023.xlsx", "Vista07a"),
+                     ("conectividad_2023.xlsx", "Rutas"), ("resumen_2023.xlsx", "Hoja1")]
+
+
+def test_sonda_solo_revisa_las_primeras_filas(tmp_path, monkeypatch):
+    monkeypatch.setattr(datatur_utils, "EXCEL_WORKERS", 1)
+    zip_path = _zip_libros(tmp_path / "cuadros.zip")
+    # El texto de la sonda está en la fila 1 de la hoja; con filas_sonda=0 ninguna hoja pasa
+    assert list(datatur_utils.hojas_excel_zip(zip_path, sonda="Conectividad", filas_sonda=0)) == []
+    assert [h for _, h, _ in datatur_utils.hojas_excel_zip(zip_path, sonda="Conectividad")] == ["Rutas"]
+
+
+def test_tabla_por_zip_por_hash(tmp_path):
+    zip_path = _zip_libros(tmp_path / "cuadros.zip")
+    llamadas = []
+
+    def construir():
+        llamadas.append(1)
+        df = pd.DataFrame({"aeropuerto": ["CUN", "MEX"], "total": [10.0, 2.5]})
+        df.attrs["fuente"] = "AFAC"
+        return df
+
+    df = datatur_utils.tabla_por_zip(zip_path, "llegadas_prueba", construir)
+    assert llamadas == [1] and df.attrs["fuente"] == "AFAC"
+    assert datatur_utils.tabla_por_zip(zip_path, "llegadas_prueba", construir) is df
+
+    # El mismo contenido con otro nombre (otra descarga) también acierta
+    copia = tmp_path / "copia.zip"
+    copia.write_bytes(zip_path.read_bytes())
+    assert datatur_utils.tabla_por_zip(copia, "llegadas_prueba", construir).equals(df)
+    assert llamadas == [1]
+
+    # Un ZIP distinto se vuelve a armar; si `construir` no da tabla no se guarda nada
+    otro = tmp_path / "otro.zip"
+    otro.write_bytes(zip_path.read_bytes() + b"\0")
+    assert datatur_utils.tabla_por_zip(otro, "llegadas_prueba", lambda: None) is None
+    datatur_utils.tabla_por_zip(otro, "llegadas_prueba", construir)
+    assert llamadas == [1, 1]
@@ -0,0 +1,87 @@
+import gzip
+import http.server
+import threading
+
+import pytest
+
+import descargas_utils
+import http_utils
+
+CONTENIDO = bytes(range(256)) * 400   # 100 KiB
+
+
+class _Manejador(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        srv = self.server
+        srv.pedidos.append(dict(self.headers))
+        cuerpo, inicio = CONTENIDO, 0
+        rango = self.headers.get("Range")
+        if srv.modo == "gzip":
+            cuerpo = gzip.compress(CONTENIDO)
+        if rango and self.headers.get("If-Range") == '"v1"':
+            inicio = int(rango.split("=")[1].rstrip("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {inicio}-{len(cuerpo) - 1}/{len(cuerpo)}")
+        else:
+            self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        if srv.modo == "gzip":
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(cuerpo) - inicio))
+        self.end_headers()
+        if srv.cortar:
+            # Se manda la mitad y se corta la conexión
+            srv.cortar -= 1
+            self.wfile.write(cuerpo[inicio:inicio + (len(cuerpo) - inicio) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(cuerpo[inicio:])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor(monkeypatch):
+    monkeypatch.setattr(http_utils, "BACKOFF", 0)
+    # Bloques chicos: lo recibido antes del corte queda en el parcial
+    monkeypatch.setattr(descargas_utils, "TAM_BLOQUE", 4096)
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Manejador)
+    srv.pedidos, srv.modo, srv.cortar = [], "normal", 0
+    hilo = threading.Thread(target=srv.serve_forever, daemon=True)
+    hilo.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _url(srv, nombre):
+    return f"http://127.0.0.1:{srv.server_address[1]}/{nombre}"
+
+
+def test_reanuda_con_range_tras_un_corte(servidor):
+    servidor.cortar = 1
+    ruta = descargas_utils.descargar_archivo(_url(servidor, "reanuda.bin"), tamano=len(CONTENIDO), timeout=10)
+    assert ruta.read_bytes() == CONTENIDO
+    assert len(servidor.pedidos) == 2
+    desde = int(servidor.pedidos[1]["Range"].split("=")[1].rstrip("-"))
+    assert 0 < desde <= len(CONTENIDO) // 2
+    assert not ruta.with_name(ruta.name + ".part").exists()
+
+
+def test_tamano_inesperado_descarta_el_parcial(servidor):
+    url = _url(servidor, "tamano.bin")
+    with pytest.raises(IOError, match="Tamaño inesperado"):
+        descargas_utils.descargar_archivo(url, tamano=len(CONTENIDO) + 1, timeout=10)
+    destino = descargas_utils._ruta_destino(url)
+    assert not destino.exists() and not destino.with_name(destino.name + ".part").exists()
+
+
+def test_respuesta_comprimida_no_se_reanuda(servidor):
+    servidor.modo, servidor.cortar = "gzip", 1
+    ruta = descargas_utils.descargar_archivo(_url(servidor, "gzip.bin"), timeout=10)
+    assert ruta.read_bytes() == CONTENIDO
+    assert servidor.pedidos[0]["Accept-Encoding"] == "identity"
+    assert all("Range" not in p for p in servidor.pedidos)
@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+
+import pytest
+
+import ejecutor_utils
+
+
+def _notebook(ruta, *celdas):
+    ruta.write_text(json.dumps({
+        "cells": [{"cell_type": "code", "source": [c]} for c in celdas],
+        "metadata": {}, "nbformat": 4, "nbformat_minor": 5,
+    }), encoding="utf-8")
+    return ruta
+
+
+def test_pool_importa_modulos_de_la_carpeta_del_notebook(tmp_path):
+    (tmp_path / "vecino_backend.py").write_text("def saludo():\n    return 'hola'\n", encoding="utf-8")
+    nb = _notebook(tmp_path / "usa_vecino.ipynb", "from vecino_backend import saludo\nprint(saludo())")
+    with ejecutor_utils.PoolNotebooks(workers=1, timeout=60, memoria_mb=0) as pool:
+        [(clave, res)] = pool.ejecutar([("nb", nb, {}, None)])
+    assert res["resultado"] == "ok", res["detalle"]
+    assert res["salida"].strip() == "hola"
+
+
+# ==========================================
+# EJECUCIÓN EN HILO (APP)
+# ==========================================
+@pytest.fixture
+def rapido(monkeypatch):
+    monkeypatch.setattr(ejecutor_utils, "INTERVALO", 0.05)
+    monkeypatch.setattr(ejecutor_utils, "GRACIA", 2)
+
+
+def _compilar(fuente):
+    return compile(fuente, "<notebook>", "exec")
+
+
+def test_hilo_captura_stdout_por_hilo_y_lee_entradas(rapido):
+    salidas = {}
+
+    def correr(nombre):
+        code = _compilar("import time\nx = input()\nfor i in range(5):\n    print(x, i)\n    time.sleep(0.01)")
+        salidas[nombre] = ejecutor_utils.ejecutar_en_hilo(code, {}, entradas=[nombre], memoria_mb=0)
+
+    hilos = [threading.Thread(target=correr, args=(n,)) for n in ("a", "b")]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join(10)
+    assert salidas["a"] == "".join(f"a {i}\n" for i in range(5))
+    assert salidas["b"] == "".join(f"b {i}\n" for i in range(5))
+
+
+def test_hilo_relanza_errores_del_notebook(rapido):
+    with pytest.raises(ZeroDivisionError):
+        ejecutor_utils.ejecutar_en_hilo(_compilar("1 / 0"), {}, memoria_mb=0)
+
+
+def test_hilo_cancela_al_agotar_tiempo(rapido):
+    # Un `except Exception` del notebook no debe tragarse la cancelación
+    code = _compilar("while True:\n    try:\n        pass\n    except Exception:\n        pass")
+    with pytest.raises(ejecutor_utils.TiempoAgotado, match="se canceló"):
+        ejecutor_utils.ejecutar_en_hilo(code, {}, timeout=0.3, memoria_mb=0)
+
+
+def test_hilo_bloqueado_en_c_se_desconecta(rapido, monkeypatch):
+    monkeypatch.setattr(ejecutor_utils, "GRACIA", 0.1)
+    code = _compilar("import time\ntime.sleep(1.5)")
+    with pytest.raises(ejecutor_utils.TiempoAgotado, match="sigue bloqueado"):
+        ejecutor_utils.ejecutar_en_hilo(code, {}, timeout=0.2, memoria_mb=0)
+
+
+def test_hilo_se_cancela_si_el_latido_interrumpe(rapido):
+    contexto = {"fin": threading.Event()}
+    code = _compilar("try:\n    while True:\n        pass\nfinally:\n    fin.set()")
+
+    def latido(segundos):
+        if segundos > 0.2:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        ejecutor_utils.ejecutar_en_hilo(code, contexto, timeout=30, latido=latido, memoria_mb=0)
+    assert contexto["fin"].wait(5)
+
+
+@pytest.mark.skipif(ejecutor_utils._rss_mb(os.getpid()) is None, reason="sin /proc")
+def test_hilo_cancela_al_exceder_memoria(rapido):
+    code = _compilar("bloque = b'x' * (300 << 20)\nwhile True:\n    pass")
+    with pytest.raises(ejecutor_utils.MemoriaExcedida, match="se canceló"):
+        ejecutor_utils.ejecutar_en_hilo(code, {}, timeout=30, memoria_mb=100)
+
+
+# ==========================================
+# POOL DE PROCESOS
+# ==========================================
+@pytest.mark.skipif(ejecutor_utils._rss_mb(os.getpid()) is None, reason="sin /proc")
+def test_pool_mata_al_exceder_memoria(tmp_path):
+    nb = _notebook(tmp_path / "glot.ipynb", "bloque = b'x' * (800 << 20)\nimport time\ntime.sleep(60)")
+    ok = _notebook(tmp_path / "ok.ipynb", "print('sigue')")
+    with ejecutor_utils.PoolNotebooks(workers=1, timeout=60, memoria_mb=600) as pool:
+        res = dict(pool.ejecutar([("glot", nb, {}, None), ("ok", ok, {}, None)]))
+    assert res["glot"]["resultado"] == "memoria"
+    # El proceso se reemplazó y atiende el siguiente notebook
+    assert res["ok"]["resultado"] == "ok"
+    assert res["ok"]["salida"].strip() == "sigue"
+
+
+def test_pool_mata_al_agotar_tiempo(tmp_path):
+    nb = _notebook(tmp_path / "lento.ipynb", "import time\ntime.sleep(60)")
+    with ejecutor_utils.PoolNotebooks(workers=1, timeout=1, memoria_mb=0) as pool:
+        [(_, res)] = pool.ejecutar([("lento", nb, {}, None)])
+    assert res["resultado"] == "tiempo"
+
+
+def test_pool_cancela_pendientes_y_en_curso(tmp_path):
+    lento = _notebook(tmp_path / "lento.ipynb", "import time\ntime.sleep(60)")
+    otro = _notebook(tmp_path / "otro.ipynb", "print('no')")
+    with ejecutor_utils.PoolNotebooks(workers=1, timeout=60, memoria_mb=0) as pool:
+        pool.cancelar("otro")
+        threading.Timer(1.0, pool.cancelar, args=("lento",)).start()
+        res = dict(pool.ejecutar([("lento", lento, {}, None), ("otro", otro, {}, None)]))
+    assert res["lento"]["resultado"] == "cancelado"
+    assert res["otro"]["resultado"] == "cancelado"
+    assert res["otro"]["detalle"] == "Cancelado antes de iniciar"
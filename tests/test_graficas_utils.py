@@ -0,0 +1,89 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+import graficas_utils
+
+
+def _serie(n=10_000, semilla=0):
+    rng = np.random.default_rng(semilla)
+    y = np.cumsum(rng.normal(size=n))
+    # Picos aislados que una decimación ingenua perdería
+    if n > 7777:
+        y[1234] = y.max() + 50
+        y[7777] = y.min() - 50
+    return np.arange(n, dtype="float64"), y
+
+
+@pytest.mark.parametrize("metodo", ["lttb", "minmax"])
+@pytest.mark.parametrize("objetivo", [5, 200, 1500])
+def test_decimacion_conserva_bordes_y_extremos(metodo, objetivo):
+    x, y = _serie()
+    idx = graficas_utils.indices_decimacion(x, y, objetivo, metodo)
+    assert len(idx) <= objetivo
+    assert np.all(np.diff(idx) > 0)
+    assert idx[0] == 0 and idx[-1] == len(y) - 1
+    assert {1234, 7777} <= set(idx.tolist())
+
+
+@pytest.mark.parametrize("metodo", ["lttb", "minmax"])
+def test_entradas_cortas_no_cambian(metodo):
+    x, y = _serie(300)
+    assert np.array_equal(graficas_utils.indices_decimacion(x, y, 300, metodo), np.arange(300))
+    assert np.array_equal(graficas_utils.indices_lttb(x, y, 500), np.arange(300))
+    assert np.array_equal(graficas_utils.indices_minmax(y, 500), np.arange(300))
+
+
+@pytest.mark.parametrize("metodo", ["lttb", "minmax"])
+def test_huecos_nan(metodo):
+    x, y = _serie()
+    y[2000:4000] = np.nan
+    y[0] = np.nan
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        idx = graficas_utils.indices_decimacion(x, y, 300, metodo)
+    assert len(idx) <= 300 and idx[0] == 0 and idx[-1] == len(y) - 1
+    assert {1234, 7777} <= set(idx.tolist())
+    # Se conserva al menos un punto dentro del hueco: la línea no lo cruza
+    assert ((idx >= 2000) & (idx < 4000)).any()
+
+    vacio = np.full(1000, np.nan)
+    idx = graficas_utils.indices_decimacion(np.arange(1000), vacio, 100, metodo)
+    assert len(idx) <= 100 and idx[0] == 0 and idx[-1] == 999
+
+
+def test_lttb_con_fechas():
+    fechas = pd.date_range("2000-01-01", periods=5000, freq="D").values
+    _, y = _serie(5000)
+    idx = graficas_utils.indices_lttb(fechas, y, 250)
+    assert len(idx) == 250 and idx[0] == 0 and idx[-1] == 4999
+
+
+def test_decimar_figura():
+    x, y = _serie()
+    texto = [f"p{i}" for i in range(len(y))]
+    fig = go.Figure([
+        go.Scatter(x=x, y=y, mode="lines", text=texto),
+        go.Scatter(x=x[:100], y=y[:100], mode="lines"),
+        go.Bar(x=x, y=y),
+    ])
+    graficas_utils.decimar_figura(fig, max_puntos=400)
+    linea, corta, barras = fig.data
+    xs, ys = graficas_utils._valores(linea.x), graficas_utils._valores(linea.y)
+    assert len(ys) <= 400 and len(xs) == len(ys) == len(linea.text)
+    assert xs[0] == 0 and xs[-1] == len(y) - 1
+    assert ys.max() == y.max() and ys.min() == y.min()
+    # Cada etiqueta sigue con su punto
+    assert all(t == f"p{int(v)}" for t, v in zip(linea.text, xs))
+    assert len(graficas_utils._valores(corta.y)) == 100
+    assert len(graficas_utils._valores(barras.y)) == len(y)
+
+
+def test_decimar_figura_presupuesto_por_ancho():
+    x, y = _serie()
+    fig = go.Figure(go.Scatter(x=x, y=y), layout={"width": 400})
+    graficas_utils.decimar_figura(fig)
+    assert len(graficas_utils._valores(fig.data[0].y)) <= graficas_utils.presupuesto_puntos(400)
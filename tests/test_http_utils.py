@@ -0,0 +1,111 @@
+import pytest
+import requests
+
+import http_utils
+
+
+def _respuesta(url, cuerpo=b"{}", status=200, headers=None):
+    r = requests.Response()
+    r.status_code = status
+    r.url = url
+    r._content = cuerpo
+    r.headers.update(headers or {"ETag": '"v1"'})
+    return r
+
+
+def test_revalidar_fuerza_get_condicional(monkeypatch):
+    pedidos = []
+
+    def falso(url, params, headers, timeout, reintentos, *a, **kw):
+        pedidos.append(dict(headers or {}))
+        return _respuesta(url) if len(pedidos) == 1 else _respuesta(url, b"", status=304)
+
+    monkeypatch.setattr(http_utils, "_get_con_reintentos", falso)
+    url = "https://ejemplo.test/api/serie?id=1"
+    assert http_utils.get(url).from_cache is False
+    assert http_utils.get(url).from_cache is True
+    assert len(pedidos) == 1
+
+    http_utils.revalidar("https://ejemplo.test/api/")
+    r = http_utils.get(url)
+    assert len(pedidos) == 2 and pedidos[1]["If-None-Match"] == '"v1"'
+    assert r.from_cache is True and r.content == b"{}"
+    # Ya revalidada: vuelve a servirse de disco
+    http_utils.get(url)
+    assert len(pedidos) == 2
+
+
+def test_no_guarda_tokens_en_disco(monkeypatch):
+    token = "0123abcd-0123-4567-89ab-0123456789ab"
+    url = f"https://ejemplo.test/INDICATOR/1/es/00/false/BISE/2.0/{token}?type=json"
+    monkeypatch.setattr(http_utils, "_get_con_reintentos",
+                        lambda url, params, *a, **kw: _respuesta(url + "&api_key=secreta"))
+    http_utils.get(url, params={"token": "otro"})
+    metas = "".join(p.read_text() for p in (http_utils._dir_cache() / "meta").glob("*.json"))
+    assert token not in metas and "secreta" not in metas and "otro" not in metas
+    # La respuesta desde disco conserva la URL pedida
+    r = http_utils.get(url, params={"token": "otro"})
+    assert r.from_cache and token in r.url
+
+
+def test_valida_argumentos():
+    with pytest.raises(ValueError):
+        http_utils.get("https://ejemplo.test/x", reintentos=0)
+    with pytest.raises(ValueError):
+        http_utils.get("https://ejemplo.test/x", stream=True)
+
+
+def test_limite_de_ritmo_solo_en_la_red(monkeypatch):
+    import inegi_utils
+
+    class SesionFalsa:
+        def get(self, url, **kw):
+            return _respuesta(url, b'{"Series": []}')
+
+    turnos = []
+    monkeypatch.setattr(http_utils, "sesion", lambda url: SesionFalsa())
+    monkeypatch.setattr(inegi_utils._LIMITADOR, "esperar", lambda: turnos.append(1))
+    url = inegi_utils.url_indicador(["1002000001"], "token")
+    assert inegi_utils.get_json(url) == {"Series": []}
+    assert inegi_utils.get_json(url) == {"Series": []}
+    assert len(turnos) == 1
+
+
+def test_validadores_sin_importar_mayusculas(monkeypatch):
+    pedidos = []
+
+    def falso(url, params, headers, timeout, reintentos, *a, **kw):
+        pedidos.append(dict(headers or {}))
+        if len(pedidos) == 1:
+            return _respuesta(url, headers={"etag": '"v7"', "LAST-MODIFIED": "Tue, 01 Oct 2024 00:00:00 GMT"})
+        return _respuesta(url, b"", status=304)
+
+    monkeypatch.setattr(http_utils, "_get_con_reintentos", falso)
+    url = "https://mayusculas.test/api"
+    http_utils.get(url)
+    r = http_utils.get(url, ttl=0)
+    assert pedidos[1]["If-None-Match"] == '"v7"'
+    assert pedidos[1]["If-Modified-Since"] == "Tue, 01 Oct 2024 00:00:00 GMT"
+    assert r.from_cache and r.headers["ETag"] == '"v7"'
+
+
+def test_borra_el_blob_anterior_si_nadie_lo_usa(monkeypatch):
+    cuerpos = {}
+    monkeypatch.setattr(http_utils, "_get_con_reintentos",
+                        lambda url, params, *a, **kw: _respuesta(url, cuerpos[url]))
+    a, b = "https://blobs.test/a", "https://blobs.test/b"
+    cuerpos.update({a: b"viejo-blobs", b: b"viejo-blobs"})
+    http_utils.get(a)
+    http_utils.get(b)
+    viejo = http_utils._ruta_blob(http_utils.hashlib.sha256(b"viejo-blobs").hexdigest())
+    assert viejo.exists()
+
+    # `b` todavía usa el cuerpo viejo: se conserva
+    cuerpos[a] = b"nuevo-a"
+    assert http_utils.get(a, ttl=0).content == b"nuevo-a"
+    assert viejo.exists()
+
+    cuerpos[b] = b"nuevo-b"
+    assert http_utils.get(b, ttl=0).content == b"nuevo-b"
+    assert not viejo.exists()
+    assert http_utils.get(a).content == b"nuevo-a" and http_utils.get(b).content == b"nuevo-b"
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from matplotlib.path import Path as Trazo
+
+import mapas_utils
+
+
+def _cuadro(x, y, lado=1.0):
+    return [[x, y], [x + lado, y], [x + lado, y + lado], [x, y + lado], [x, y]]
+
+
+def _geojson():
+    # Un lado del cuadro A lleva muchos vértices casi colineales: la simplificación los quita
+    lado_fino = [[i / 100, 1e-5 * (i % 2)] for i in range(1, 100)]
+    anillo_a = [[0, 0], *lado_fino, [1, 0], [1, 1], [0, 1], [0, 0]]
+    return {"type": "FeatureCollection", "features": [
+        {"properties": {"NOMGEO": "Aguascalientes", "CVE": "01"},
+         "geometry": {"type": "Polygon", "coordinates": [anillo_a]}},
+        {"properties": {"NOMGEO": "Baja California Sur", "CVE": "03"},
+         "geometry": {"type": "MultiPolygon", "coordinates": [[_cuadro(3, 0)], [_cuadro(5, 2, 0.5)]]}},
+        {"properties": {"NOMGEO": "Sin geometría"}, "geometry": None},
+    ]}
+
+
+def test_geometrias_desde_geojson():
+    datos = mapas_utils.geometrias_desde_geojson(_geojson(), tol=0.001)
+    assert datos["nombres"].tolist() == ["Aguascalientes", "Baja California Sur"]
+    inicios = datos["inicios"]
+    assert inicios[0] == 0 and inicios[-1] == len(datos["vertices"]) == len(datos["codigos"])
+    # Aguascalientes quedó reducido a sus 4 esquinas + cierre
+    assert inicios[1] == 5
+    # Baja California Sur: dos anillos, cada uno abre con MOVETO y cierra con CLOSEPOLY
+    codigos = datos["codigos"][inicios[1]:inicios[2]]
+    assert (codigos == Trazo.MOVETO).sum() == 2
+    assert (codigos == Trazo.CLOSEPOLY).sum() == 2
+    assert datos["vertices"].dtype == np.float32
+
+
+def test_geometrias_desde_geojson_sin_features():
+    with pytest.raises(ValueError):
+        mapas_utils.geometrias_desde_geojson({"features": []})
+
+
+def test_geometrias_trazos_extension_y_busqueda():
+    geo = mapas_utils.Geometrias(mapas_utils.geometrias_desde_geojson(_geojson()))
+    assert geo.extension == (0.0, 5.5, 0.0, 2.5)
+    assert geo.trazos["Baja California Sur"].contains_point((5.25, 2.25))
+    assert not geo.trazos["Aguascalientes"].contains_point((3.5, 0.5))
+    assert geo.buscar("baja california sur", normalizar=str.lower) == "Baja California Sur"
+    assert geo.buscar("Jalisco") is None
+
+
+def test_cargar_geometrias_construye_una_vez(tmp_path, monkeypatch):
+    llamadas = []
+
+    class _Respuesta:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return _geojson()
+
+    def get(url, **kw):
+        llamadas.append(url)
+        return _Respuesta()
+
+    monkeypatch.setattr(mapas_utils.http_utils, "get", get)
+    monkeypatch.setattr(mapas_utils, "RUTA_EMPAQUETADA", tmp_path / "no_existe.npz")
+    monkeypatch.setattr(mapas_utils, "_GEOMETRIAS", None)
+    geo = mapas_utils.cargar_geometrias()
+    assert geo.nombres == ["Aguascalientes", "Baja California Sur"]
+    assert mapas_utils.cargar_geometrias() is geo
+
+    # Otro proceso encuentra el archivo ya construido y no va a la red
+    monkeypatch.setattr(mapas_utils, "_GEOMETRIAS", None)
+    assert mapas_utils.cargar_geometrias().nombres == geo.nombres
+    assert len(llamadas) == 1
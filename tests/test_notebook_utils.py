@@ -0,0 +1,34 @@
+import json
+import os
+
+import notebook_utils
+
+
+def _notebook(ruta, *celdas):
+    ruta.write_text(json.dumps({"cells": [{"cell_type": "code", "source": [c]} for c in celdas]}),
+                    encoding="utf-8")
+
+
+def test_codigo_compilado_se_reutiliza_hasta_que_cambia_el_archivo(tmp_path):
+    ruta = tmp_path / "nb.ipynb"
+    _notebook(ruta, "x = 1\n")
+    primero = notebook_utils.obtener_codigo_compilado(ruta)
+    assert notebook_utils.obtener_codigo_compilado(ruta) is primero
+
+    _notebook(ruta, "x = 2\n", "y = x + 1\n")
+    st_ = ruta.stat()
+    os.utime(ruta, ns=(st_.st_atime_ns, st_.st_mtime_ns + 1_000_000))
+    nuevo = notebook_utils.obtener_codigo_compilado(ruta)
+    assert nuevo is not primero
+    contexto = {}
+    exec(nuevo, contexto)
+    assert contexto["y"] == 3
+
+
+def test_solo_celdas_de_codigo(tmp_path):
+    ruta = tmp_path / "nb.ipynb"
+    ruta.write_text(json.dumps({"cells": [
+        {"cell_type": "markdown", "source": ["# título"]},
+        {"cell_type": "code", "source": ["a = 5\n"]},
+    ]}), encoding="utf-8")
+    assert notebook_utils.leer_codigo_fuente(ruta).strip() == "a = 5"
@@ -0,0 +1,81 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import turismo_utils
+
+ESTADOS = ["Aguascalientes", "Baja California", "Baja California Sur", "Ciudad de México", "Jalisco"]
+ANIOS = list(range(2010, 2023))
+MESES = [f"[{m:02d}] Mes {m}" for m in range(1, 15)]
+
+
+def _hoja(encabezado_superior, encabezado, filas):
+    crudo = [[None] * (len(encabezado) + 1), [None] + encabezado_superior,
+             ["Etiquetas de fila"] + encabezado]
+    crudo += [[nombre] + valores for nombre, valores in filas]
+    return pd.DataFrame(crudo)
+
+
+@pytest.fixture(scope="module")
+def libro():
+    rng = np.random.default_rng(0)
+    historico = {e: rng.integers(1_000, 9_000, len(ANIOS)).astype(float) for e in ESTADOS}
+    historico["Jalisco"][-1] = np.nan
+    mensual = {k: {e: rng.uniform(0, 100, len(MESES)) for e in ESTADOS} for k in turismo_utils.HOJAS_MENSUALES}
+    mensual["Ocup"].pop("Jalisco")
+    mensual["Perc"]["Ciudad de México"][-2] = np.nan
+
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="openpyxl") as w:
+        _hoja([f"Total {a}" for a in ANIOS], ["x"] * len(ANIOS),
+              [(e.upper(), list(v)) for e, v in historico.items()]).to_excel(
+            w, sheet_name=turismo_utils.HOJA_HISTORICO, header=False, index=False)
+        for key, hoja in turismo_utils.HOJAS_MENSUALES.items():
+            _hoja([None] * len(MESES), MESES, [(e, list(v)) for e, v in mensual[key].items()]).to_excel(
+                w, sheet_name=hoja, header=False, index=False)
+    return turismo_utils.cargar_libro(buf.getvalue()), historico, mensual
+
+
+def test_historico_todos_coincide_con_por_estado(libro):
+    libro, historico, _ = libro
+    todos = turismo_utils.get_data_historico_todos(libro, ESTADOS)
+    assert set(todos["Estado"]) == set(ESTADOS)
+    for e in ESTADOS:
+        por_estado = turismo_utils.get_data_historico(libro, e)
+        esperado = pd.Series(historico[e], index=ANIOS).dropna().iloc[-10:]
+        assert por_estado["Año"].tolist() == esperado.index.tolist()
+        assert por_estado["Valor"].tolist() == esperado.tolist()
+        sel = todos[todos["Estado"] == e]
+        assert sel["Año"].tolist()[-10:] == por_estado["Año"].tolist()
+        assert sel["Valor"].tolist()[-10:] == por_estado["Valor"].tolist()
+
+
+def test_historico_todos_recorta_ultimos_anios(libro):
+    libro, _, _ = libro
+    todos = turismo_utils.get_data_historico_todos(libro, ESTADOS, ultimos=3)
+    assert sorted(todos["Año"].unique()) == ANIOS[-3:]
+    # El año sin dato de Jalisco se omite
+    assert len(todos[todos["Estado"] == "Jalisco"]) == 2
+
+
+def test_mensual_todos_coincide_con_por_estado(libro):
+    libro, _, mensual = libro
+    todos = turismo_utils.get_data_mensual_todos(libro, ESTADOS)
+    assert len(todos) == len(ESTADOS) * 12
+    for e in ESTADOS:
+        data, meses = turismo_utils.get_data_mensual(libro, e)
+        assert meses == [m.split("] ")[-1] for m in MESES[-12:]]
+        sel = todos[todos["Estado"] == e]
+        for key in turismo_utils.HOJAS_MENSUALES:
+            esperado = np.nan_to_num(mensual[key][e][-12:], nan=0.0) if e in mensual[key] else np.zeros(12)
+            assert data[key] == pytest.approx(esperado.tolist())
+            assert sel[key].tolist() == pytest.approx(data[key])
+
+
+def test_estado_inexistente(libro):
+    libro, _, _ = libro
+    assert turismo_utils.get_data_historico(libro, "Atlantis") is None
+    data, _ = turismo_utils.get_data_mensual(libro, "Atlantis")
+    assert all(v == [0.0] * 12 for v in data.values())
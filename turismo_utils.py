@@ -1,8 +1,18 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import unicodedata
 import re
 
+import catalogo_utils
+import graficas_utils
+
 # ==========================================
 # UTILIDADES DE TEXTO
 # ==========================================
@@ -24,212 +34,364 @@ def get_header_info(df_raw):
     return None, None
 
 # ==========================================
-# MOTORES DE EXTRACCIÓN
+# LIBRO PARSEADO (UNA SOLA LECTURA POR ARCHIVO)
 # ==========================================
-def get_data_historico(xls, estado_input):
-    try:
-        df_raw = pd.read_excel(xls, sheet_name='Vista07a', header=None)
-    except Exception as e:
-        return None
+HOJA_HISTORICO = 'Vista07a'
+HOJAS_MENSUALES = {'Disp': 'Vista05', 'Ocup': 'Vista06a', 'Perc': 'Vista09a'}
+MAX_LIBROS = 4  # libros parseados que se conservan en memoria (LRU)
+
+_LIBROS = OrderedDict()  # sha256 del contenido -> LibroTurismo
+_LOCK = threading.Lock()
+
+
+class HojaTurismo:
+    """Bloque numérico de una hoja: filas = etiquetas, columnas = años/meses."""
+
+    def __init__(self, etiquetas, columnas, valores):
+        self.etiquetas = etiquetas            # etiquetas normalizadas, en orden de la hoja
+        self.columnas = columnas              # años (int) o encabezados de mes ("[01] Enero")
+        self.valores = valores                # np.ndarray float64 (NaN = sin dato)
+        self.indice = {}
+        for i, e in enumerate(etiquetas):
+            self.indice.setdefault(e, i)
 
+    def fila(self, estado):
+        """Posición de la fila del estado: exacta y, si no, la primera que lo contenga."""
+        target = normalize(estado)
+        i = self.indice.get(target)
+        if i is None:
+            i = next((k for k, e in enumerate(self.etiquetas) if target in e), None)
+        return i
+
+
+def _parsear_hoja(df_raw, tipo):
     header_idx, state_col_idx = get_header_info(df_raw)
-    if header_idx is None: return None
-
-    # Leer AÑOS de la fila SUPERIOR (header_idx - 1)
-    row_years = df_raw.iloc[header_idx - 1].astype(str).tolist()
-    col_indices = []
-    years_found = []
-    
-    for c_idx, val in enumerate(row_years):
-        match = re.search(r'Total\s*(199\d|20[0-3]\d)', val, re.IGNORECASE)
-        if match:
-            col_indices.append(c_idx)
-            years_found.append(int(match.group(1)))
-            
-    if not col_indices: return None
-
-    # Extraer datos
-    df_data = df_raw.iloc[header_idx+1:].copy()
-    target = normalize(estado_input)
-    # Buscamos normalizando la columna detectada
-    df_data['_norm'] = df_data.iloc[:, state_col_idx].astype(str).apply(normalize)
-    
-    # Intento de match exacto o parcial
-    row_data = df_data[df_data['_norm'] == target]
-    
-    # Si no encuentra exacto, intenta buscar si el string está contenido
-    if row_data.empty:
-        row_data = df_data[df_data['_norm'].str.contains(target, na=False)]
-
-    if row_data.empty: return None
-
-    vals = row_data.iloc[0, col_indices].values
-    data_clean = []
-    for y, v in zip(years_found, vals):
-        try:
-            fv = float(v)
-            if pd.notna(fv):
-                data_clean.append({'Año': y, 'Valor': fv})
-        except:
-            continue
-            
-    df_res = pd.DataFrame(data_clean).sort_values('Año')
-    return df_res.iloc[-10:] # Últimos 10 años
+    if header_idx is None:
+        return None
 
-def get_data_mensual(xls, estado_input):
-    sheets = {'Disp': 'Vista05', 'Ocup': 'Vista06a', 'Perc': 'Vista09a'}
-    data = {}
-    meses_labels = []
-    
-    target = normalize(estado_input)
+    if tipo == 'historico':
+        # AÑOS en la fila SUPERIOR (header_idx - 1)
+        fila_enc = df_raw.iloc[header_idx - 1].astype(str).tolist()
+        col_indices, columnas = [], []
+        for c_idx, val in enumerate(fila_enc):
+            match = re.search(r'Total\s*(199\d|20[0-3]\d)', val, re.IGNORECASE)
+            if match:
+                col_indices.append(c_idx)
+                columnas.append(int(match.group(1)))
+    else:
+        # MESES en la fila de encabezados ("[01] Enero", ...)
+        fila_enc = df_raw.iloc[header_idx].astype(str).tolist()
+        col_indices = [c for c, v in enumerate(fila_enc) if re.match(r'\[\d{2}\]', v)]
+        columnas = [fila_enc[c] for c in col_indices]
+
+    df_data = df_raw.iloc[header_idx + 1:]
+    etiquetas_raw = df_data.iloc[:, state_col_idx].astype(str)
+    mapa = {u: normalize(u) for u in pd.unique(etiquetas_raw)}
+    etiquetas = etiquetas_raw.map(mapa).tolist()
+    valores = (df_data.iloc[:, col_indices].apply(pd.to_numeric, errors='coerce')
+               .to_numpy(dtype='float64') if col_indices
+               else np.empty((len(df_data), 0), dtype='float64'))
+    return HojaTurismo(etiquetas, columnas, valores)
+
+
+class LibroTurismo:
+    """Las cuatro hojas de DataTur que usa la app, parseadas una sola vez.
+
+    Cambiar de estado es solo una búsqueda en `HojaTurismo.indice`; el
+    archivo no se vuelve a leer.
+    """
 
-    for key, sheet in sheets.items():
+    def __init__(self, fuente):
+        hojas = [HOJA_HISTORICO] + list(HOJAS_MENSUALES.values())
+        self.hojas = {}
+        self.error = None
         try:
-            df_raw = pd.read_excel(xls, sheet_name=sheet, header=None)
-            header_idx, state_col_idx = get_header_info(df_raw)
-            if header_idx is None: continue
-            
-            # Identificar columnas de MESES
-            header_row = df_raw.iloc[header_idx].astype(str).tolist()
-            month_indices = []
-            month_names = []
-            
-            for c_idx, val in enumerate(header_row):
-                if re.match(r'\[\d{2}\]', val): 
-                    month_indices.append(c_idx)
-                    month_names.append(val)
-            
-            last_12_indices = month_indices[-12:]
-            if key == 'Disp': 
-                meses_labels = [m.split('] ')[-1] for m in month_names[-12:]]
-
-            # Extraer valor del Estado
-            df_data = df_raw.iloc[header_idx+1:].copy()
-            df_data['_norm'] = df_data.iloc[:, state_col_idx].astype(str).apply(normalize)
-            
-            row = df_data[df_data['_norm'] == target]
-            if row.empty:
-                # Intento búsqueda parcial
-                row = df_data[df_data['_norm'].str.contains(target, na=False)]
-
-            if row.empty:
-                data[key] = [0]*12
-            else:
-                vals = row.iloc[0, last_12_indices].values
-                data[key] = [0 if pd.isna(x) else float(x) for x in vals]
-                
+            crudas = pd.read_excel(fuente, sheet_name=hojas, header=None)
         except Exception:
-            return None
+            # Alguna hoja no existe: se leen por separado las que sí estén
+            crudas = {}
+            for h in hojas:
+                try:
+                    crudas[h] = pd.read_excel(fuente, sheet_name=h, header=None)
+                except Exception as e:
+                    self.error = e
+        for h, df_raw in crudas.items():
+            tipo = 'historico' if h == HOJA_HISTORICO else 'mensual'
+            try:
+                self.hojas[h] = _parsear_hoja(df_raw, tipo)
+            except Exception as e:
+                self.error = e
+
+    def hoja(self, nombre):
+        return self.hojas.get(nombre)
+
+
+def _contenido(archivo):
+    """Bytes del archivo subido (UploadedFile / BytesIO / ruta / bytes)."""
+    if isinstance(archivo, (bytes, bytearray)):
+        return bytes(archivo)
+    if isinstance(archivo, (str, Path)):
+        return Path(archivo).read_bytes()
+    if hasattr(archivo, 'getvalue'):
+        return archivo.getvalue()
+    pos = archivo.tell()
+    archivo.seek(0)
+    datos = archivo.read()
+    archivo.seek(pos)
+    return datos
+
+
+def cargar_libro(archivo):
+    """Devuelve el `LibroTurismo` del archivo, parseándolo solo la primera vez.
+
+    La llave es el hash del contenido, así que volver a subir el mismo Excel
+    (o cambiar de estado en la app) no repite la lectura con openpyxl.
+    """
+    if isinstance(archivo, LibroTurismo):
+        return archivo
+    if isinstance(archivo, pd.ExcelFile):
+        return LibroTurismo(archivo)
+
+    datos = _contenido(archivo)
+    llave = hashlib.sha256(datos).hexdigest()
+    with _LOCK:
+        libro = _LIBROS.get(llave)
+        if libro is not None:
+            _LIBROS.move_to_end(llave)
+            return libro
+
+    libro = LibroTurismo(io.BytesIO(datos))
+    with _LOCK:
+        _LIBROS[llave] = libro
+        while len(_LIBROS) > MAX_LIBROS:
+            _LIBROS.popitem(last=False)
+    return libro
+
+
+# ==========================================
+# MOTORES DE EXTRACCIÓN
+# ==========================================
+def get_data_historico(xls, estado_input):
+    """Llegadas anuales del estado (últimos 10 años). `xls` puede ser el
+    archivo subido, un pd.ExcelFile o un LibroTurismo ya parseado."""
+    df = get_data_historico_todos(xls, [estado_input])
+    if df.empty:
+        return None
+    return df[['Año', 'Valor']].iloc[-10:].reset_index(drop=True) # Últimos 10 años
+
+def get_data_mensual(xls, estado_input):
+    """({'Disp', 'Ocup', 'Perc'}: últimos 12 meses, etiquetas de mes) del estado."""
+    libro = cargar_libro(xls)
+    if any(libro.hoja(sheet) is None for sheet in HOJAS_MENSUALES.values()):
+        return None
+    df = get_data_mensual_todos(libro, [estado_input])
+    if df.empty:
+        return None
+    return {key: df[key].tolist() for key in HOJAS_MENSUALES}, df['Mes'].tolist()
+
+# ==========================================
+# EXTRACCIÓN DE TODOS LOS ESTADOS (UNA PASADA)
+# ==========================================
+def _filas_estados(hoja, estados):
+    """(posiciones en `estados`, posiciones de fila en la hoja) de los estados encontrados."""
+    pares = [(k, hoja.fila(e)) for k, e in enumerate(estados)]
+    pares = [(k, i) for k, i in pares if i is not None]
+    return [k for k, _ in pares], np.array([i for _, i in pares], dtype=np.int64)
+
+
+def get_data_historico_todos(xls, estados=None, ultimos=None):
+    """Llegadas anuales de todos los estados en formato largo.
+
+    Columnas: Estado, Año, Valor. Sin dato -> la fila se omite.
+    `ultimos` recorta a los N años más recientes del libro.
+    """
+    hoja = cargar_libro(xls).hoja(HOJA_HISTORICO)
+    vacio = pd.DataFrame(columns=['Estado', 'Año', 'Valor'])
+    if hoja is None or not hoja.columnas:
+        return vacio
+
+    estados = list(estados or catalogo_utils.ESTADOS_MEXICANOS)
+    pos, filas = _filas_estados(hoja, estados)
+    if not pos:
+        return vacio
+    nombres = [estados[k] for k in pos]
+
+    anios = np.asarray(hoja.columnas)
+    bloque = hoja.valores[filas]
+    orden = np.argsort(anios, kind='stable')
+    if ultimos:
+        orden = orden[-ultimos:]
+    anios, bloque = anios[orden], bloque[:, orden]
+
+    df = pd.DataFrame({
+        'Estado': np.repeat(nombres, len(anios)),
+        'Año': np.tile(anios, len(nombres)),
+        'Valor': bloque.ravel(),
+    })
+    return df.dropna(subset=['Valor']).reset_index(drop=True)
+
+
+def get_data_mensual_todos(xls, estados=None, meses=12):
+    """Cuartos disponibles, ocupados y % de ocupación de todos los estados.
+
+    Columnas: Estado, Mes, Disp, Ocup, Perc (mismas llaves que
+    `get_data_mensual`); un renglón por estado y mes de los últimos `meses`.
+    Un estado sin fila en alguna hoja queda en 0 para esa hoja.
+    """
+    libro = cargar_libro(xls)
+    estados = list(estados or catalogo_utils.ESTADOS_MEXICANOS)
+    columnas = ['Estado', 'Mes', 'Disp', 'Ocup', 'Perc']
+
+    base = libro.hoja(HOJAS_MENSUALES['Disp'])
+    if base is None or not base.columnas:
+        return pd.DataFrame(columns=columnas)
+    etiquetas = [m.split('] ')[-1] for m in base.columnas[-meses:]]
+    n = len(etiquetas)
+
+    df = pd.DataFrame({
+        'Estado': np.repeat(estados, n),
+        'Mes': np.tile(etiquetas, len(estados)),
+    })
+    for key, sheet in HOJAS_MENSUALES.items():
+        hoja = libro.hoja(sheet)
+        bloque = np.zeros((len(estados), n))
+        if hoja is not None and hoja.columnas:
+            pos, filas = _filas_estados(hoja, estados)
+            ult = hoja.valores[filas][:, -n:]
+            bloque[pos, n - ult.shape[1]:] = np.nan_to_num(ult, nan=0.0)
+        df[key] = bloque.ravel()
+    return df[columnas]
 
-    if len(data) < 3: return None
-    return data, meses_labels
 
 # ==========================================
 # GENERADOR DE GRÁFICAS (DEVUELVE FIGURAS)
 # ==========================================
-def generar_figuras(df_hist, data_men, estado, palette, font_family):
-    """Genera objetos Figure de Plotly usando la paleta y fuente de Streamlit."""
-    figs = {}
-    
-    # Colores desde la paleta de la App
+def _colores(palette):
+    """Colores primario, secundario y de acento desde la paleta de la App."""
     c_primary = palette[0] if len(palette) > 0 else "#1f2a44"
     c_secondary = palette[1] if len(palette) > 1 else "#889064"
     c_accent = palette[2] if len(palette) > 2 else "#ff9f18"
+    return c_primary, c_secondary, c_accent
+
+
+def _figura_historico(df_hist, estado, palette, font_family):
+    c_primary, _, _ = _colores(palette)
+    fig1 = go.Figure()
+    fig1.add_trace(go.Bar(
+        x=df_hist['Año'], y=df_hist['Valor'],
+        marker_color=c_primary,
+        text=[f"{x:,.0f}" for x in df_hist['Valor']],
+        textposition='outside'
+    ))
+
+    rango = f"{df_hist['Año'].min()}-{df_hist['Año'].max()}"
+    fig1.update_layout(
+        # === MODIFICACIÓN 1: Título Centrado ===
+        title=dict(
+            text=f"Llegada de Turistas - {estado} ({rango})", 
+            x=0.5, 
+            xanchor='center'
+        ),
+        yaxis_title="Turistas",
+        template="plotly_white",
+        font=dict(family=font_family),
+        height=450,
+        # === MODIFICACIÓN 2: Margen inferior aumentado ===
+        margin=dict(l=20, r=20, t=50, b=100)
+    )
+
+    # === MODIFICACIÓN 3: Leyenda de Fuente ===
+    fig1.add_annotation(
+        text="Fuente: Datatur - Secretaría de Turismo (SECTUR)",
+        xref="paper", yref="paper",
+        x=0, y=-0.25,
+        showarrow=False,
+        xanchor='left', yanchor='top',
+        font=dict(size=11, color="gray", family=font_family)
+    )
+
+    return fig1
+
+
+def _figura_mensual(data_men, estado, palette, font_family):
+    c_primary, c_secondary, c_accent = _colores(palette)
+    vals, meses = data_men
+    fig2 = go.Figure()
+
+    # Disponibles
+    fig2.add_trace(go.Bar(
+        x=meses, y=vals['Disp'], name="Cuartos Disponibles",
+        marker_color=c_primary
+    ))
+    # Ocupados
+    fig2.add_trace(go.Bar(
+        x=meses, y=vals['Ocup'], name="Cuartos Ocupados",
+        marker_color=c_secondary,
+        text=[f"{x:,.0f}" for x in vals['Ocup']],
+        textposition='auto'
+    ))
+    # Porcentaje
+    perc = [x * 100 for x in vals['Perc']]
+    fig2.add_trace(go.Scatter(
+        x=meses, y=perc, name="% Ocupación",
+        mode="lines+markers+text",
+        line=dict(color=c_accent, width=3),
+        text=[f"{x:.1f}%" for x in perc],
+        textposition="top center",
+        yaxis="y2"
+    ))
+
+    fig2.update_layout(
+        # === MODIFICACIÓN 1: Título Centrado ===
+        title=dict(
+            text=f"Actividad Hotelera (Últimos 12 Meses) - {estado}", 
+            x=0.5, 
+            xanchor='center'
+        ),
+        yaxis_title="Cuartos",
+        yaxis2=dict(title="%", overlaying="y", side="right", range=[0, 105], showgrid=False),
+        barmode="group",
+        template="plotly_white",
+        font=dict(family=font_family),
+        legend=dict(orientation="h", y=-0.2, x=0.5, xanchor="center"),
+        height=550,
+        # === MODIFICACIÓN 2: Margen inferior aumentado (b=130 para librar leyenda y fuente) ===
+        margin=dict(l=20, r=20, t=50, b=130)
+    )
+
+    # === MODIFICACIÓN 3: Leyenda de Fuente ===
+    fig2.add_annotation(
+        text="Fuente: Datatur - Secretaría de Turismo (SECTUR)",
+        xref="paper", yref="paper",
+        x=0, y=-0.35, # Debajo de la leyenda de series
+        showarrow=False,
+        xanchor='left', yanchor='top',
+        font=dict(size=11, color="gray", family=font_family)
+    )
+
+    return graficas_utils.decimar_figura(fig2)
+
+
+def generar_figuras(df_hist, data_men, estado, palette, font_family):
+    """Genera objetos Figure de Plotly usando la paleta y fuente de Streamlit.
+
+    Las figuras salen de la caché de graficas_utils cuando ya se armaron con
+    los mismos datos, estado, paleta y fuente.
+    """
+    figs = {}
 
     # --- GRÁFICA 1: HISTÓRICO ---
     if df_hist is not None and not df_hist.empty:
-        fig1 = go.Figure()
-        fig1.add_trace(go.Bar(
-            x=df_hist['Año'], y=df_hist['Valor'],
-            marker_color=c_primary,
-            text=[f"{x:,.0f}" for x in df_hist['Valor']],
-            textposition='outside'
-        ))
-        
-        rango = f"{df_hist['Año'].min()}-{df_hist['Año'].max()}"
-        fig1.update_layout(
-            # === MODIFICACIÓN 1: Título Centrado ===
-            title=dict(
-                text=f"Llegada de Turistas - {estado} ({rango})", 
-                x=0.5, 
-                xanchor='center'
-            ),
-            yaxis_title="Turistas",
-            template="plotly_white",
-            font=dict(family=font_family),
-            height=450,
-            # === MODIFICACIÓN 2: Margen inferior aumentado ===
-            margin=dict(l=20, r=20, t=50, b=100)
-        )
-        
-        # === MODIFICACIÓN 3: Leyenda de Fuente ===
-        fig1.add_annotation(
-            text="Fuente: Datatur - Secretaría de Turismo (SECTUR)",
-            xref="paper", yref="paper",
-            x=0, y=-0.25,
-            showarrow=False,
-            xanchor='left', yanchor='top',
-            font=dict(size=11, color="gray", family=font_family)
-        )
-        
-        figs['historico'] = fig1
+        llave = graficas_utils.llave_figura("turismo/historico", estado=estado, paleta=palette,
+                                            fuente=font_family, datos=df_hist)
+        figs['historico'] = graficas_utils.figura_en_cache(
+            llave, lambda: _figura_historico(df_hist, estado, palette, font_family))
 
     # --- GRÁFICA 2: MENSUAL ---
     if data_men:
-        vals, meses = data_men
-        fig2 = go.Figure()
-        
-        # Disponibles
-        fig2.add_trace(go.Bar(
-            x=meses, y=vals['Disp'], name="Cuartos Disponibles",
-            marker_color=c_primary
-        ))
-        # Ocupados
-        fig2.add_trace(go.Bar(
-            x=meses, y=vals['Ocup'], name="Cuartos Ocupados",
-            marker_color=c_secondary,
-            text=[f"{x:,.0f}" for x in vals['Ocup']],
-            textposition='auto'
-        ))
-        # Porcentaje
-        perc = [x * 100 for x in vals['Perc']]
-        fig2.add_trace(go.Scatter(
-            x=meses, y=perc, name="% Ocupación",
-            mode="lines+markers+text",
-            line=dict(color=c_accent, width=3),
-            text=[f"{x:.1f}%" for x in perc],
-            textposition="top center",
-            yaxis="y2"
-        ))
-        
-        fig2.update_layout(
-            # === MODIFICACIÓN 1: Título Centrado ===
-            title=dict(
-                text=f"Actividad Hotelera (Últimos 12 Meses) - {estado}", 
-                x=0.5, 
-                xanchor='center'
-            ),
-            yaxis_title="Cuartos",
-            yaxis2=dict(title="%", overlaying="y", side="right", range=[0, 105], showgrid=False),
-            barmode="group",
-            template="plotly_white",
-            font=dict(family=font_family),
-            legend=dict(orientation="h", y=-0.2, x=0.5, xanchor="center"),
-            height=550,
-            # === MODIFICACIÓN 2: Margen inferior aumentado (b=130 para librar leyenda y fuente) ===
-            margin=dict(l=20, r=20, t=50, b=130)
-        )
-        
-        # === MODIFICACIÓN 3: Leyenda de Fuente ===
-        fig2.add_annotation(
-            text="Fuente: Datatur - Secretaría de Turismo (SECTUR)",
-            xref="paper", yref="paper",
-            x=0, y=-0.35, # Debajo de la leyenda de series
-            showarrow=False,
-            xanchor='left', yanchor='top',
-            font=dict(size=11, color="gray", family=font_family)
-        )
-        
-        figs['mensual'] = fig2
-        
+        llave = graficas_utils.llave_figura("turismo/mensual", estado=estado, paleta=palette,
+                                            fuente=font_family, datos=data_men)
+        figs['mensual'] = graficas_utils.figura_en_cache(
+            llave, lambda: _figura_mensual(data_men, estado, palette, font_family))
+
     return figs